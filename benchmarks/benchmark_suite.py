@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks des trois outils (mp4-to-png, resize_images, sprite_cutter)
+================================================================================
+Génère localement des fixtures synthétiques (vidéos ffmpeg `color` + `testsrc`, atlas
+et photos dessinés avec Pillow) à plusieurs résolutions, chronomètre les points d'entrée
+principaux de chaque outil et enregistre les résultats en JSON.
+Avec --compare, les résultats sont comparés à un fichier de référence (régressions signalées).
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import PIL
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+for tool_dir in ('mp4-to-png', 'sprite_cutter', 'resize_images'):
+    sys.path.insert(0, str(REPO_ROOT / tool_dir))
+
+from converter_loader import load_converter
+from benchmark_sprite_cutter import make_atlas, make_fragments
+from benchmark_resize import make_photo
+from sprite_cutter import remove_white_background, find_sprite_bounds, merge_nearby_sprites
+from resize_images import resize_images
+
+# Version du format du fichier de résultats
+RESULTS_VERSION = 1
+
+TOOLS = ['mp4', 'resize', 'cutter']
+
+# Écart relatif au-delà duquel un benchmark est signalé (0.10 = 10 %)
+DEFAULT_THRESHOLD = 0.10
+
+DEFAULT_VIDEO_SIZES = ['320x240', '640x480', '1280x720']
+DEFAULT_ATLAS_SIZES = [1024, 2048, 4096]
+DEFAULT_PHOTO_SIZES = ['1500x1000', '4000x3000']
+DEFAULT_FRAGMENTS = [1000, 10000]
+
+# Paramètres fixes des fixtures
+VIDEO_DURATION = 2
+VIDEO_FPS = 10
+SPRITE_HEIGHT = 128
+TOLERANCE = 30
+PHOTO_COUNT = 3
+RESIZE_WIDTH = 800
+THRESHOLD = 240
+MERGE_DISTANCE = 20
+
+
+def parse_size(value):
+    """'640x480' -> (640, 480)"""
+    width, height = (int(v) for v in value.lower().split('x'))
+    return width, height
+
+
+def make_video(path, size, duration=VIDEO_DURATION):
+    """
+    Crée une vidéo synthétique : fond uni blanc (`color`) sur lequel une mire `testsrc`
+    colorée se déplace, pour que la suppression du fond ait un vrai sujet à préserver.
+
+    Args:
+        path: Chemin du fichier MP4 à créer
+        size: Tuple (width, height)
+        duration: Durée en secondes
+    """
+    width, height = size
+    subject = f"{width // 3 // 2 * 2}x{height // 3 // 2 * 2}"
+    graph = (
+        f"color=c=white:s={width}x{height}:d={duration}:r=30[bg];"
+        f"testsrc=s={subject}:d={duration}:r=30[fg];"
+        f"[bg][fg]overlay=x='(W-w)/2+sin(t*3)*W/6':y='(H-h)/2',format=yuv420p"
+    )
+    cmd = ['ffmpeg', '-loglevel', 'error', '-y', '-filter_complex', graph, '-t', str(duration), str(path)]
+    subprocess.run(cmd, check=True)
+
+
+def timed(func, repeat):
+    """
+    Exécute func() `repeat` fois, sortie standard masquée (les outils sont bavards).
+
+    Returns:
+        Liste des durées en secondes
+    """
+    runs = []
+    for _ in range(repeat):
+        with redirect_stdout(io.StringIO()):
+            begin = time.perf_counter()
+            func()
+            runs.append(time.perf_counter() - begin)
+    return runs
+
+
+class Suite:
+    """Collecte les mesures : une entrée par benchmark, identifiée par 'outil.fonction[fixture]'"""
+
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = {}
+
+    def run(self, tool, function, fixture, func, **params):
+        bench_id = f"{tool}.{function}[{fixture}]"
+        print(f"   {bench_id:<48}", end=' ', flush=True)
+        runs = timed(func, self.repeat)
+        self.results[bench_id] = {
+            'tool': tool,
+            'function': function,
+            'fixture': fixture,
+            'params': params,
+            'best': min(runs),
+            'mean': statistics.mean(runs),
+            'runs': runs,
+        }
+        print(f"{min(runs):>8.3f}s")
+
+
+def bench_mp4(suite, video_sizes, work_dir):
+    """extract_frames, remove_background et create_sprite_sheet sur des vidéos synthétiques"""
+    converter = load_converter()
+    for size_text in video_sizes:
+        size = parse_size(size_text)
+        video = work_dir / f"video_{size_text}.mp4"
+        make_video(video, size)
+
+        def extract():
+            with tempfile.TemporaryDirectory(dir=work_dir) as frames_dir:
+                converter.extract_frames(str(video), 0, VIDEO_DURATION, VIDEO_FPS, frames_dir)
+
+        suite.run('mp4', 'extract_frames', size_text, extract,
+                  duration=VIDEO_DURATION, fps=VIDEO_FPS)
+
+        # Frames de référence partagées par les mesures suivantes
+        frames_dir = work_dir / f"frames_{size_text}"
+        frames_dir.mkdir()
+        with redirect_stdout(io.StringIO()):
+            frames = converter.extract_frames(str(video), 0, VIDEO_DURATION, VIDEO_FPS, str(frames_dir))
+            bg_colors = converter.detect_background_color(frames[0], detect_checkerboard=False)
+
+        def remove_all():
+            for frame in frames:
+                converter.remove_background(frame, bg_colors, TOLERANCE)
+
+        suite.run('mp4', 'remove_background', size_text, remove_all,
+                  frames=len(frames), tolerance=TOLERANCE)
+
+        output = work_dir / f"sheet_{size_text}.png"
+        suite.run('mp4', 'create_sprite_sheet', size_text,
+                  lambda: converter.create_sprite_sheet(frames, str(output), SPRITE_HEIGHT, True, TOLERANCE),
+                  frames=len(frames), height=SPRITE_HEIGHT, transparent=True)
+
+
+def bench_resize(suite, photo_sizes, work_dir):
+    """resize_images sur des dossiers de photos JPEG synthétiques"""
+    for size_text in photo_sizes:
+        photos_dir = work_dir / f"photos_{size_text}"
+        photos_dir.mkdir()
+        for i in range(PHOTO_COUNT):
+            make_photo(photos_dir / f"photo_{i:02d}.jpg", parse_size(size_text), seed=i)
+
+        def resize():
+            shutil.rmtree(photos_dir / 'resized', ignore_errors=True)
+            resize_images(str(photos_dir), target_width=RESIZE_WIDTH, confirm=False, jobs=1)
+
+        suite.run('resize', 'resize_images', size_text, resize,
+                  photos=PHOTO_COUNT, width=RESIZE_WIDTH, jobs=1)
+
+
+def bench_cutter(suite, atlas_sizes, fragment_counts):
+    """remove_white_background, find_sprite_bounds et merge_nearby_sprites"""
+    for size in atlas_sizes:
+        atlas = make_atlas(size)
+        fixture = f"{size}x{size}"
+        suite.run('cutter', 'remove_white_background', fixture,
+                  lambda: remove_white_background(atlas, THRESHOLD), threshold=THRESHOLD)
+        suite.run('cutter', 'find_sprite_bounds', fixture,
+                  lambda: find_sprite_bounds(atlas, THRESHOLD), threshold=THRESHOLD)
+
+    for count in fragment_counts:
+        fragments = make_fragments(count)
+        suite.run('cutter', 'merge_nearby_sprites', f"{count} fragments",
+                  lambda: merge_nearby_sprites(fragments, MERGE_DISTANCE), max_distance=MERGE_DISTANCE)
+
+
+def environment():
+    """Contexte de la mesure, enregistré avec les résultats"""
+    ffmpeg_version = None
+    if shutil.which('ffmpeg'):
+        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+        ffmpeg_version = result.stdout.split('\n', 1)[0]
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'pillow': PIL.__version__,
+        'numpy': np.__version__,
+        'ffmpeg': ffmpeg_version,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Affiche la comparaison avec une référence et retourne le nombre de régressions.
+    Rapport = meilleur temps actuel / meilleur temps de référence.
+    """
+    print()
+    print(f"📊 Comparaison avec la référence (seuil: ±{threshold:.0%})")
+    print(f"   {'benchmark':<48} | {'référence':>10} | {'actuel':>10} | {'rapport':>7} | état")
+    print(f"   {'-' * 48}-+-{'-' * 10}-+-{'-' * 10}-+-{'-' * 7}-+-{'-' * 14}")
+    regressions = 0
+    for bench_id, current in results.items():
+        reference = baseline.get(bench_id)
+        if reference is None:
+            print(f"   {bench_id:<48} | {'-':>10} | {current['best']:>9.3f}s | {'-':>7} | 🆕 nouveau")
+            continue
+        ratio = current['best'] / reference['best'] if reference['best'] else float('inf')
+        if ratio > 1 + threshold:
+            status = "🐢 régression"
+            regressions += 1
+        elif ratio < 1 - threshold:
+            status = "🚀 plus rapide"
+        else:
+            status = "≈ stable"
+        print(f"   {bench_id:<48} | {reference['best']:>9.3f}s | {current['best']:>9.3f}s | "
+              f"{ratio:>6.2f}x | {status}")
+    for bench_id in baseline:
+        if bench_id not in results:
+            print(f"   {bench_id:<48} | {baseline[bench_id]['best']:>9.3f}s | {'-':>10} | {'-':>7} | absent")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmarks des trois outils sur des fixtures synthétiques, résultats en JSON',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  %(prog)s                                        # Tous les outils, résultats dans benchmark-results.json
+  %(prog)s --quick                                # Petites fixtures uniquement (CI)
+  %(prog)s --tools cutter --atlas-sizes 2048 8192
+  %(prog)s -o apres.json --compare avant.json     # Signale les régressions (code de sortie 1)
+        """
+    )
+
+    parser.add_argument(
+        '--output', '-o',
+        default='benchmark-results.json',
+        help='Fichier JSON des résultats (défaut: benchmark-results.json)'
+    )
+
+    parser.add_argument(
+        '--compare',
+        default=None,
+        metavar='REFERENCE',
+        help='Fichier de résultats de référence à comparer'
+    )
+
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f'Écart relatif signalé comme régression (défaut: {DEFAULT_THRESHOLD})'
+    )
+
+    parser.add_argument(
+        '--tools',
+        nargs='+',
+        choices=TOOLS,
+        default=TOOLS,
+        help='Outils mesurés: mp4, resize, cutter (défaut: tous)'
+    )
+
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Nombre de mesures par benchmark, le meilleur temps est comparé (défaut: 3)'
+    )
+
+    parser.add_argument(
+        '--quick',
+        action='store_true',
+        help='Uniquement la plus petite fixture de chaque série'
+    )
+
+    parser.add_argument(
+        '--video-sizes',
+        nargs='+',
+        default=DEFAULT_VIDEO_SIZES,
+        help=f"Résolutions des vidéos synthétiques (défaut: {' '.join(DEFAULT_VIDEO_SIZES)})"
+    )
+
+    parser.add_argument(
+        '--atlas-sizes',
+        type=int,
+        nargs='+',
+        default=DEFAULT_ATLAS_SIZES,
+        help=f"Côtés des atlas synthétiques (défaut: {' '.join(map(str, DEFAULT_ATLAS_SIZES))})"
+    )
+
+    parser.add_argument(
+        '--photo-sizes',
+        nargs='+',
+        default=DEFAULT_PHOTO_SIZES,
+        help=f"Tailles des photos pour resize_images (défaut: {' '.join(DEFAULT_PHOTO_SIZES)})"
+    )
+
+    parser.add_argument(
+        '--fragments',
+        type=int,
+        nargs='+',
+        default=DEFAULT_FRAGMENTS,
+        help=f"Nombres de fragments pour la fusion (défaut: {' '.join(map(str, DEFAULT_FRAGMENTS))})"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        for size in args.video_sizes + args.photo_sizes:
+            parse_size(size)
+    except ValueError:
+        print("❌ Erreur: les tailles doivent être au format LARGEURxHAUTEUR (ex: 640x480)")
+        sys.exit(1)
+    if args.repeat < 1:
+        print("❌ Erreur: --repeat doit être supérieur ou égal à 1")
+        sys.exit(1)
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)['results']
+        except (OSError, json.JSONDecodeError, KeyError) as e:
+            print(f"❌ Erreur: Impossible de lire la référence '{args.compare}': {e}")
+            sys.exit(1)
+
+    if args.quick:
+        args.video_sizes = args.video_sizes[:1]
+        args.atlas_sizes = args.atlas_sizes[:1]
+        args.photo_sizes = args.photo_sizes[:1]
+        args.fragments = args.fragments[:1]
+
+    tools = list(args.tools)
+    if 'mp4' in tools and not shutil.which('ffmpeg'):
+        print("⚠️  ffmpeg introuvable : benchmarks mp4 ignorés")
+        tools.remove('mp4')
+
+    print("=" * 70)
+    print("⏱️  SUITE DE BENCHMARKS")
+    print("=" * 70)
+    print(f"🧰 Outils: {', '.join(tools)}")
+    print(f"🔁 Mesures par benchmark: {args.repeat} (meilleur temps retenu)")
+    print()
+
+    suite = Suite(args.repeat)
+    with tempfile.TemporaryDirectory(prefix='tooling-bench-') as temp_dir:
+        work_dir = Path(temp_dir)
+        if 'mp4' in tools:
+            print("🎬 mp4-to-png")
+            bench_mp4(suite, args.video_sizes, work_dir)
+            print()
+        if 'resize' in tools:
+            print("🖼️  resize_images")
+            bench_resize(suite, args.photo_sizes, work_dir)
+            print()
+        if 'cutter' in tools:
+            print("✂️  sprite_cutter")
+            bench_cutter(suite, args.atlas_sizes, args.fragments)
+            print()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': RESULTS_VERSION,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'environment': environment(),
+            'repeat': args.repeat,
+            'results': suite.results,
+        }, f, indent=2)
+    print(f"💾 Résultats enregistrés: {args.output} ({len(suite.results)} benchmark(s))")
+
+    if baseline is not None:
+        regressions = compare(suite.results, baseline, args.threshold)
+        print()
+        if regressions:
+            print(f"❌ {regressions} régression(s) au-delà de {args.threshold:.0%}")
+            sys.exit(1)
+        print("✅ Aucune régression")
+
+
+if __name__ == '__main__':
+    main()
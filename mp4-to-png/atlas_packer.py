@@ -0,0 +1,115 @@
+"""
+Placement de rectangles dans un atlas (MaxRects, règle « bottom-left »)
+Utilisé par mp4-to-sprite --layout=packed : les frames rognées à leur boîte alpha sont
+placées dans la sheet la plus petite trouvée, de largeur au plus max_width
+
+- Les rectangles libres maximaux sont conservés (ils peuvent se chevaucher) : un rectangle
+  est placé là où son bord bas est le plus haut possible, puis le plus à gauche
+- Plusieurs largeurs de bac sont essayées autour de la racine carrée de la surface totale ;
+  la disposition retenue est celle de plus petite surface (puis la plus carrée)
+"""
+
+import math
+
+# Facteurs appliqués à la racine carrée de la surface totale pour les largeurs essayées
+WIDTH_FACTORS = (0.75, 1.0, 1.25, 1.5, 2.0, 3.0)
+
+
+def contains(outer, inner):
+    """Vrai si le rectangle inner (x, y, w, h) est entièrement dans outer"""
+    return (inner[0] >= outer[0] and inner[1] >= outer[1]
+            and inner[0] + inner[2] <= outer[0] + outer[2]
+            and inner[1] + inner[3] <= outer[1] + outer[3])
+
+
+class MaxRectsBin:
+    """Bac de dimensions fixes ; free contient les rectangles libres maximaux (x, y, w, h)"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.free = [(0, 0, width, height)]
+
+    def insert(self, width, height):
+        """Place un rectangle ; retourne sa position (x, y) ou None s'il ne tient plus"""
+        best = None
+        for fx, fy, fw, fh in self.free:
+            if width <= fw and height <= fh and (best is None or (fy + height, fx) < best):
+                best = (fy + height, fx)
+        if best is None:
+            return None
+        x, y = best[1], best[0] - height
+        self._split(x, y, width, height)
+        return x, y
+
+    def _split(self, x, y, width, height):
+        """Découpe les rectangles libres recouverts par le rectangle placé, puis retire les inclus"""
+        kept = []
+        created = []
+        for rect in self.free:
+            fx, fy, fw, fh = rect
+            if x >= fx + fw or x + width <= fx or y >= fy + fh or y + height <= fy:
+                kept.append(rect)
+                continue
+            # Jusqu'à quatre bandes libres autour du rectangle placé
+            if x > fx:
+                created.append((fx, fy, x - fx, fh))
+            if x + width < fx + fw:
+                created.append((x + width, fy, fx + fw - x - width, fh))
+            if y > fy:
+                created.append((fx, fy, fw, y - fy))
+            if y + height < fy + fh:
+                created.append((fx, y + height, fw, fy + fh - y - height))
+
+        # Les rectangles conservés ne s'incluent pas entre eux : seuls les nouveaux sont comparés
+        unique = []
+        for i, rect in enumerate(created):
+            if any(contains(other, rect) for other in kept):
+                continue
+            if any(contains(other, rect) and (other != rect or j < i) for j, other in enumerate(created) if j != i):
+                continue
+            unique.append(rect)
+        kept = [rect for rect in kept if not any(contains(other, rect) for other in unique)]
+        self.free = kept + unique
+
+
+def pack_in_width(sizes, order, bin_width):
+    """
+    Place les rectangles (dans l'ordre donné) dans un bac de largeur bin_width
+    La hauteur du bac (somme des hauteurs) suffit toujours : seule la largeur contraint le placement
+    """
+    atlas = MaxRectsBin(bin_width, sum(height for _, height in sizes))
+    positions = [None] * len(sizes)
+    for index in order:
+        positions[index] = atlas.insert(*sizes[index])
+    return positions
+
+
+def pack_rects(sizes, max_width, padding=0):
+    """
+    Place des rectangles (largeur, hauteur) dans un atlas de largeur au plus max_width
+    padding: marge (en pixels) laissée à droite et en bas de chaque rectangle
+    Un rectangle plus large que max_width élargit l'atlas à sa largeur
+    Retourne (positions [(x, y)] dans l'ordre de sizes, largeur_atlas, hauteur_atlas)
+    """
+    if not sizes:
+        return [], 0, 0
+    padded = [(width + padding, height + padding) for width, height in sizes]
+    widest = max(width for width, _ in padded)
+    limit = max(max_width + padding, widest)
+    # Plus hauts d'abord (puis plus larges) : les lignes se remplissent par rectangles de hauteur voisine
+    order = sorted(range(len(sizes)), key=lambda i: (padded[i][1], padded[i][0]), reverse=True)
+
+    side = math.sqrt(sum(width * height for width, height in padded))
+    widths = sorted({min(limit, max(widest, math.ceil(side * factor))) for factor in WIDTH_FACTORS} | {limit})
+
+    best = None
+    for bin_width in widths:
+        positions = pack_in_width(padded, order, bin_width)
+        # Dimensions réelles : la marge après le dernier rectangle n'est pas conservée
+        width = max(x + w for (x, _), (w, _) in zip(positions, sizes))
+        height = max(y + h for (_, y), (_, h) in zip(positions, sizes))
+        score = (width * height, max(width, height))
+        if best is None or score < best[0]:
+            best = (score, positions, width, height)
+    return best[1], best[2], best[3]
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'extraction des frames selon la position de départ
+Compare le positionnement avant l'entrée (-ss avant -i) et après l'entrée (-ss après -i)
+pour un segment de durée fixe pris à différents --start d'une longue vidéo
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+from converter_loader import load_converter
+
+
+def time_extraction(converter, video_path, start, duration, fps, seek):
+    """Extrait un segment en flux mémoire et retourne (secondes, nombre de frames)"""
+    begin = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        count = sum(1 for _ in converter.stream_frames(video_path, start, start + duration, fps, seek=seek))
+    return time.perf_counter() - begin, count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare le temps d\'extraction d\'un segment selon sa position dans la vidéo',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  %(prog)s master.mp4
+  %(prog)s master.mp4 --offsets 0 60 300 900 --duration 1 --fps 12
+        """
+    )
+    parser.add_argument('input', help='Vidéo source (idéalement longue)')
+    parser.add_argument('--offsets', type=float, nargs='+', default=None,
+                        help='Positions de départ en secondes (défaut: 0, 10%%, 25%%, 50%%, 90%% de la durée)')
+    parser.add_argument('--duration', type=float, default=1,
+                        help='Durée du segment extrait en secondes (défaut: 1)')
+    parser.add_argument('--fps', type=int, default=10,
+                        help='Images par seconde extraites (défaut: 10)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Nombre de mesures par configuration, le minimum est gardé (défaut: 1)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ Erreur: Le fichier '{args.input}' n'existe pas")
+        sys.exit(1)
+
+    converter = load_converter()
+    converter.check_dependencies()
+
+    offsets = args.offsets
+    if offsets is None:
+        total = converter.get_video_duration(args.input)
+        offsets = [round(max(0, total * ratio - args.duration), 2) for ratio in (0, 0.1, 0.25, 0.5, 0.9)]
+
+    print("=" * 70)
+    print("⏱️  BENCHMARK EXTRACTION")
+    print("=" * 70)
+    print(f"📁 Entrée: {args.input}")
+    print(f"🎞️  Segment: {args.duration}s à {args.fps} fps")
+    print()
+    print(f"   {'start (s)':>10} | {'seek input':>12} | {'seek output':>12} | {'gain':>7} | frames")
+    print(f"   {'-' * 10}-+-{'-' * 12}-+-{'-' * 12}-+-{'-' * 7}-+-------")
+
+    for start in offsets:
+        results = {}
+        for seek in ('input', 'output'):
+            timings = [time_extraction(converter, args.input, start, args.duration, args.fps, seek)
+                       for _ in range(args.repeat)]
+            results[seek] = (min(t for t, _ in timings), timings[0][1])
+        fast, fast_frames = results['input']
+        slow, slow_frames = results['output']
+        frames = f"{fast_frames}" if fast_frames == slow_frames else f"{fast_frames}/{slow_frames}"
+        print(f"   {start:>10.2f} | {fast:>11.3f}s | {slow:>11.3f}s | {slow / fast:>6.1f}x | {frames}")
+
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""
+Chargement de mp4-to-sprite.py comme module Python
+Le nom du script contient des tirets : il n'est pas importable avec import, il est chargé par
+chemin et enregistré dans sys.modules sous le nom mp4_to_sprite
+
+- Un seul chargement par processus : le script batch, l'API bibliothèque (sprite_builder) et
+  les benchmarks partagent le même module
+- L'enregistrement dans sys.modules rend ses fonctions utilisables depuis les processus d'un pool
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+MODULE_NAME = 'mp4_to_sprite'
+SCRIPT_PATH = Path(__file__).resolve().parent / 'mp4-to-sprite.py'
+
+
+def load_converter():
+    """Importe mp4-to-sprite.py (ou retourne le module déjà chargé)"""
+    if MODULE_NAME in sys.modules:
+        return sys.modules[MODULE_NAME]
+    spec = importlib.util.spec_from_file_location(MODULE_NAME, SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[MODULE_NAME] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        # Chargement échoué : ne pas laisser un module à moitié initialisé
+        del sys.modules[MODULE_NAME]
+        raise
+    return module
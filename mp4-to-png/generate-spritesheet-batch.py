@@ -5,11 +5,15 @@ Vérifie que tous les fichiers requis sont présents avant de générer
 """
 
 import argparse
+import io
 import os
 import sys
-import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
 from pathlib import Path
 
+from converter_loader import load_converter
+
 # ============================================================================
 # CONFIGURATION : Liste des fichiers requis (émotions/actions)
 # ============================================================================
@@ -34,6 +38,15 @@ DEFAULT_CONFIG = {
     "fps": 12,
     "start": 0,
     "end": None,  # None = durée totale de la vidéo
+    "png_preset": None,  # None = préréglage du fichier de config ou de mp4-to-sprite.py
+    "palette": None,  # Nombre de couleurs de la palette PNG8 partagée, None = RGBA complet
+    "format": None,  # png, webp ou both (None = fichier de config ou png)
+    "webp_mode": None,  # lossless ou near-lossless (None = fichier de config ou lossless)
+    "background_model": None,  # frame ou temporal (None = fichier de config ou frame)
+    "model_frames": None,  # Frames d'apprentissage du modèle temporel (None = fichier de config ou défaut)
+    "background_detection": None,  # first ou every (None = fichier de config ou first)
+    "layout": None,  # grid ou packed (None = fichier de config ou grid)
+    "dedup": None,  # Seuil de déduplication des frames (0 = identiques, None = fichier de config ou désactivée)
 }
 
 # ============================================================================
@@ -98,9 +111,123 @@ def display_status(found, missing):
     
     return len(missing) == 0
 
-def generate_spritesheets(source_dir, output_dir, config_file=None):
+def build_job_params(config_file=None):
+    """
+    Calcule les paramètres effectifs d'une génération, avec les mêmes priorités
+    que la ligne de commande de mp4-to-sprite.py : valeurs par défaut du script,
+    puis fichier de config, puis options imposées par le batch
+    """
+    params = {
+        "size": 128,
+        "width": None,
+        "transparent": False,
+        "tolerance": 30,
+        "fps": 10,
+        "start": 0,
+        "end": None,
+        "png_preset": load_converter().DEFAULT_PNG_PRESET,
+        "palette": None,
+        "format": load_converter().DEFAULT_SHEET_FORMAT,
+        "webp_mode": load_converter().DEFAULT_WEBP_MODE,
+        "background_model": load_converter().DEFAULT_BACKGROUND_MODEL,
+        "model_frames": load_converter().DEFAULT_MODEL_FRAMES,
+        "background_detection": load_converter().DEFAULT_BACKGROUND_DETECTION,
+        "layout": load_converter().DEFAULT_LAYOUT,
+        "dedup": None,
+        "assembly": load_converter().DEFAULT_ASSEMBLY,
+        "extraction": 'pipe',
+        "jobs": 0,  # Animations générées en parallèle (0 = nombre de cœurs)
+    }
+    
+    if config_file:
+        config = load_converter().load_config(config_file)
+        load_converter().validate_config(config, config_file)
+        params.update({key: value for key, value in config.items() if key in params})
+    
+    params["size"] = DEFAULT_CONFIG["size"]
+    params["fps"] = DEFAULT_CONFIG["fps"]
+    params["start"] = DEFAULT_CONFIG["start"]
+    if DEFAULT_CONFIG["width"]:
+        params["width"] = DEFAULT_CONFIG["width"]
+    if DEFAULT_CONFIG["transparent"]:
+        params["transparent"] = True
+        params["tolerance"] = DEFAULT_CONFIG["tolerance"]
+    if DEFAULT_CONFIG["end"]:
+        params["end"] = DEFAULT_CONFIG["end"]
+    if DEFAULT_CONFIG["png_preset"]:
+        params["png_preset"] = DEFAULT_CONFIG["png_preset"]
+    if DEFAULT_CONFIG["palette"]:
+        params["palette"] = DEFAULT_CONFIG["palette"]
+    if DEFAULT_CONFIG["format"]:
+        params["format"] = DEFAULT_CONFIG["format"]
+    if DEFAULT_CONFIG["webp_mode"]:
+        params["webp_mode"] = DEFAULT_CONFIG["webp_mode"]
+    if DEFAULT_CONFIG["background_model"]:
+        params["background_model"] = DEFAULT_CONFIG["background_model"]
+    if DEFAULT_CONFIG["model_frames"]:
+        params["model_frames"] = DEFAULT_CONFIG["model_frames"]
+    if DEFAULT_CONFIG["background_detection"]:
+        params["background_detection"] = DEFAULT_CONFIG["background_detection"]
+    if DEFAULT_CONFIG["layout"]:
+        params["layout"] = DEFAULT_CONFIG["layout"]
+    if DEFAULT_CONFIG["dedup"] is not None:
+        params["dedup"] = DEFAULT_CONFIG["dedup"]
+    
+    return params
+
+def generate_one(file_name, file_path, output_file, params, cache=None):
+    """
+    Génère le spritesheet d'une animation dans le processus courant
+    La sortie du convertisseur est capturée pour ne pas mélanger les logs des animations
+    Retourne (nom, succès, (frames, largeur, hauteur, formats) ou None, log) (voir build_sprite_sheet)
     """
-    Génère un spritesheet par animation en appelant mp4-to-sprite.py pour chaque fichier
+    converter = load_converter()
+    log = io.StringIO()
+    
+    try:
+        with redirect_stdout(log):
+            end = params["end"]
+            if end is None:
+                end = converter.get_video_duration(str(file_path))
+            if params["start"] >= end:
+                print("❌ Erreur: --start doit être inférieur à --end")
+                return file_name, False, None, log.getvalue()
+            
+            result = converter.build_sprite_sheet(
+                str(file_path),
+                str(output_file),
+                target_height=params["size"],
+                transparent=params["transparent"],
+                tolerance=params["tolerance"],
+                fps=params["fps"],
+                start_time=params["start"],
+                end_time=end,
+                target_width=params["width"],
+                extraction=params["extraction"],
+                cache=cache,
+                png_preset=params["png_preset"],
+                palette=params["palette"],
+                sheet_format=params["format"],
+                webp_mode=params["webp_mode"],
+                background_model=params["background_model"],
+                model_frames=params["model_frames"],
+                background_detection=params["background_detection"],
+                assembly=params["assembly"],
+                sheet_layout=params["layout"],
+                dedup=params["dedup"]
+            )
+        return file_name, True, result, log.getvalue()
+    except converter.SpriteSheetError as e:
+        return file_name, False, None, log.getvalue() + f"❌ {e}\n"
+    except Exception as e:
+        return file_name, False, None, log.getvalue() + f"❌ Erreur: {e}\n"
+
+def generate_spritesheets(source_dir, output_dir, config_file=None, jobs=None, use_cache=True, cache_dir=None):
+    """
+    Génère un spritesheet par animation avec les fonctions de mp4-to-sprite.py,
+    importées directement (pas de sous-processus par fichier)
+    Les animations sont générées en parallèle sur un pool borné de `jobs` processus
+    (None = valeur du fichier de config, 0 = nombre de cœurs)
     Chaque animation génère son propre fichier avec division automatique si > 4096px
     """
     found, missing = check_required_files(source_dir)
@@ -118,29 +245,37 @@ def generate_spritesheets(source_dir, output_dir, config_file=None):
             print("❌ Génération annulée")
             sys.exit(1)
     
+    # Charge le convertisseur et vérifie ffmpeg une seule fois pour tout le batch
+    converter = load_converter()
+    converter.check_dependencies()
+    try:
+        params = build_job_params(config_file)
+    except converter.SpriteSheetError as e:
+        print(f"❌ Erreur: {e}")
+        sys.exit(1)
+    cache = converter.SpriteCache(cache_dir) if use_cache else None
+    
+    if jobs is None:
+        jobs = params["jobs"]
+    if not jobs:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(found)))
+    
     print("=" * 70)
     print("🎬 GÉNÉRATION DES SPRITESHEETS")
     print("=" * 70)
     print(f"📁 Dossier source: {source_dir}")
     print(f"📁 Dossier de sortie: {output_dir}")
+    print(f"⚙️  Générations en parallèle: {jobs}")
+    print(f"🗜️  Encodage PNG: {params['png_preset']}")
+    if params["palette"]:
+        print(f"🎨 Palette partagée: {params['palette']} couleurs (PNG8)")
+    print(f"🖼️  Format: {params['format']}" + (f" (WebP {params['webp_mode']})" if params['format'] != 'png' else ""))
+    print(f"📦 Disposition: {params['layout']}")
+    if params["dedup"] is not None:
+        print(f"🔁 Déduplication: " + (f"seuil {params['dedup']}" if params["dedup"] else "frames identiques"))
     print()
     
-    # Vérifie que mp4-to-sprite.py existe
-    script_path = Path(__file__).parent / "mp4-to-sprite.py"
-    if not script_path.exists():
-        print(f"❌ Erreur: mp4-to-sprite.py non trouvé dans {script_path.parent}")
-        sys.exit(1)
-    
-    # Construit la commande de base
-    base_cmd = [
-        sys.executable,
-        str(script_path),
-    ]
-    
-    # Ajoute les options de config si un fichier est fourni
-    if config_file:
-        base_cmd.extend(["--config", config_file])
-    
     # Crée le dossier de sortie s'il n'existe pas
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
@@ -148,59 +283,46 @@ def generate_spritesheets(source_dir, output_dir, config_file=None):
     # Génère un spritesheet par animation
     success_count = 0
     fail_count = 0
+    descriptions = {file_name: description for file_name, description, _ in found}
     
     print(f"🔄 Génération de {len(found)} spritesheet(s)...")
     print()
     
-    for i, (file_name, description, file_path) in enumerate(found, 1):
-        output_file = output_path / f"{file_name}.png"
-        print(f"📹 [{i}/{len(found)}] {file_name} ({description})")
-        
-        # Construit la commande pour ce fichier
-        cmd = base_cmd.copy()
-        cmd.extend([
-            str(file_path),
-            "--size", str(DEFAULT_CONFIG["size"]),
-            "--fps", str(DEFAULT_CONFIG["fps"]),
-            "--start", str(DEFAULT_CONFIG["start"]),
-            "--output", str(output_file),
-        ])
-        
-        # Ajoute les options conditionnelles
-        if DEFAULT_CONFIG["width"]:
-            cmd.extend(["--width", str(DEFAULT_CONFIG["width"])])
-        
-        if DEFAULT_CONFIG["transparent"]:
-            cmd.append("--transparent")
-            cmd.extend(["--tolerance", str(DEFAULT_CONFIG["tolerance"])])
-        
-        if DEFAULT_CONFIG["end"]:
-            cmd.extend(["--end", str(DEFAULT_CONFIG["end"])])
+    outputs = {
+        file_name: converter.sheet_outputs(output_path / f"{file_name}.png", params["format"], params["layout"],
+                                           params["dedup"])
+        for file_name, _, _ in found
+    }
+    
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(generate_one, file_name, file_path, output_path / f"{file_name}.png", params, cache)
+            for file_name, _, file_path in found
+        ]
         
-        # Exécute la commande
-        try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            print(f"      ✅ {file_name}.png généré avec succès")
-            success_count += 1
-        except subprocess.CalledProcessError as e:
-            print(f"      ❌ Erreur lors de la génération de {file_name}")
-            # Affiche seulement les dernières lignes de l'erreur pour ne pas surcharger
-            error_lines = e.stderr.strip().split('\n')
-            if len(error_lines) > 5:
-                print(f"      ... ({len(error_lines) - 5} lignes supprimées)")
+        # Affiche les résultats au fur et à mesure qu'ils se terminent
+        for i, future in enumerate(as_completed(futures), 1):
+            file_name, ok, result, log = future.result()
+            print(f"📹 [{i}/{len(found)}] {file_name} ({descriptions[file_name]})")
+            
+            if ok:
+                num_frames, frame_w, frame_h, formats = result
+                names = " + ".join(path.name for path in outputs[file_name].values())
+                print(f"      ✅ {names} généré avec succès ({num_frames} frames, {frame_w}x{frame_h}px)")
+                if len(formats) > 1:
+                    # Tableau comparatif construit à partir des mesures retournées (--format both)
+                    for line in converter.format_report_lines(formats):
+                        print(f"      {line}")
+                success_count += 1
+            else:
+                print(f"      ❌ Erreur lors de la génération de {file_name}")
+                # Affiche seulement les dernières lignes de l'erreur pour ne pas surcharger
+                error_lines = log.strip().split('\n')
+                if len(error_lines) > 5:
+                    print(f"      ... ({len(error_lines) - 5} lignes supprimées)")
                 for line in error_lines[-5:]:
                     print(f"      {line}")
-            else:
-                print(f"      {e.stderr}")
-            fail_count += 1
-        except Exception as e:
-            print(f"      ❌ Erreur: {e}")
-            fail_count += 1
+                fail_count += 1
     
     # Résumé
     print()
@@ -216,10 +338,13 @@ def generate_spritesheets(source_dir, output_dir, config_file=None):
         print("💡 Utilisation dans React Native:")
         print(f"   const animations = {{")
         for file_name, description, _ in found:
-            output_file = output_path / f"{file_name}.png"
-            if output_file.exists():
+            output_files = list(outputs[file_name].values())
+            if all(output_file.exists() for output_file in output_files):
+                sheet_files = [path for kind, path in outputs[file_name].items() if kind != 'json']
                 print(f"     {file_name}: {{")
-                print(f"       src: '/assets/{file_name}.png',")
+                print(f"       src: '/assets/{sheet_files[-1].name}',")
+                if 'json' in outputs[file_name]:
+                    print(f"       atlas: '/assets/{outputs[file_name]['json'].name}',")
                 print(f"       frameHeight: {DEFAULT_CONFIG['size']},")
                 if DEFAULT_CONFIG['width']:
                     print(f"       frameWidth: {DEFAULT_CONFIG['width']},")
@@ -238,6 +363,14 @@ Exemples:
   %(prog)s ./videos --output-dir=sprites
   %(prog)s ./videos --output-dir=sprites --config=config.json
   %(prog)s ./videos --output-dir=sprites --size=256 --width=256
+  %(prog)s ./videos --output-dir=sprites --jobs=4
+  %(prog)s ./videos --output-dir=sprites --png-preset=fast
+  %(prog)s ./videos --output-dir=sprites --palette
+  %(prog)s ./videos --output-dir=sprites --format=both
+  %(prog)s ./videos --output-dir=sprites --background-model=temporal
+  %(prog)s ./videos --output-dir=sprites --background-detection=every
+  %(prog)s ./videos --output-dir=sprites --layout=packed
+  %(prog)s ./videos --output-dir=sprites --dedup=4
 
 Le script vérifie d'abord que tous les fichiers requis sont présents,
 puis génère un spritesheet par animation (chaque animation dans son propre fichier).
@@ -257,6 +390,40 @@ Les spritesheets sont automatiquement divisés en plusieurs lignes si > 4096px.
                        help='Largeur fixe des frames (optionnel)')
     parser.add_argument('--fps', type=int,
                        help=f'FPS pour l\'extraction (défaut: {DEFAULT_CONFIG["fps"]})')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                       help='Nombre d\'animations générées en parallèle (défaut: 0 = nombre de cœurs)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Désactive le cache incrémental (toutes les animations sont régénérées)')
+    parser.add_argument('--cache-dir', default=None,
+                       help='Dossier du cache (défaut: $MP4_SPRITE_CACHE ou ~/.cache/mp4-to-sprite)')
+    
+    parser.add_argument('--png-preset', choices=list(load_converter().PNG_PRESETS), default=None,
+                       help='Encodage PNG des spritesheets: fast (CI), balanced, smallest (release), '
+                            'palette (PNG8, avec perte) (défaut: smallest)')
+    parser.add_argument('--palette', type=int, nargs='?', const=load_converter().DEFAULT_PALETTE_COLORS,
+                       default=None, metavar='COULEURS',
+                       help='Spritesheets en PNG8 indexé, palette unique partagée par toutes les frames '
+                            f'(sans valeur: {load_converter().DEFAULT_PALETTE_COLORS} couleurs)')
+    parser.add_argument('--format', choices=load_converter().SHEET_FORMATS, default=None,
+                       help='Format des spritesheets: png, webp, ou both pour les deux côte à côte '
+                            'avec comparaison (défaut: png)')
+    parser.add_argument('--webp-mode', choices=list(load_converter().WEBP_MODES), default=None,
+                       help='Encodage WebP: lossless ou near-lossless (défaut: lossless)')
+    parser.add_argument('--background-model', choices=load_converter().BACKGROUND_MODELS, default=None,
+                       help='Suppression du fond: frame (analyse complète de chaque frame) ou temporal '
+                            '(modèle de fond partagé entre frames, caméra fixe) (défaut: frame)')
+    parser.add_argument('--model-frames', type=int, default=None,
+                       help='Frames d\'apprentissage du modèle de fond temporel '
+                            f'(défaut: {load_converter().DEFAULT_MODEL_FRAMES})')
+    parser.add_argument('--background-detection', choices=load_converter().BACKGROUND_DETECTIONS, default=None,
+                       help='Détection de la couleur de fond: first = sur la première frame, every = sur chaque '
+                            'frame (fond qui change au cours du clip) (défaut: first)')
+    parser.add_argument('--layout', choices=load_converter().LAYOUTS, default=None,
+                       help='Disposition des spritesheets: grid (cases de taille fixe) ou packed (frames '
+                            'rognées et dédupliquées + table des frames JSON) (défaut: grid)')
+    parser.add_argument('--dedup', type=int, nargs='?', const=0, default=None, metavar='SEUIL',
+                       help='Poses tenues traitées et stockées une fois, durées dans la table des frames JSON '
+                            '(sans valeur: frames identiques ; SEUIL 1-255: quasi-doublons)')
     
     args = parser.parse_args()
     
@@ -267,6 +434,36 @@ Les spritesheets sont automatiquement divisés en plusieurs lignes si > 4096px.
         DEFAULT_CONFIG["width"] = args.width
     if args.fps:
         DEFAULT_CONFIG["fps"] = args.fps
+    if args.png_preset:
+        DEFAULT_CONFIG["png_preset"] = args.png_preset
+    if args.format:
+        DEFAULT_CONFIG["format"] = args.format
+    if args.webp_mode:
+        DEFAULT_CONFIG["webp_mode"] = args.webp_mode
+    if args.background_model:
+        DEFAULT_CONFIG["background_model"] = args.background_model
+    if args.model_frames is not None:
+        if args.model_frames < 1:
+            print("❌ Erreur: --model-frames doit être au moins 1")
+            sys.exit(1)
+        DEFAULT_CONFIG["model_frames"] = args.model_frames
+    if args.background_detection:
+        DEFAULT_CONFIG["background_detection"] = args.background_detection
+    if args.layout:
+        DEFAULT_CONFIG["layout"] = args.layout
+    if args.jobs is not None and args.jobs < 0:
+        print("❌ Erreur: --jobs doit être positif (0 = tous les cœurs)")
+        sys.exit(1)
+    if args.dedup is not None:
+        if not 0 <= args.dedup <= 255:
+            print("❌ Erreur: --dedup doit être compris entre 0 et 255")
+            sys.exit(1)
+        DEFAULT_CONFIG["dedup"] = args.dedup
+    if args.palette is not None:
+        if not 2 <= args.palette <= 256:
+            print("❌ Erreur: --palette doit être compris entre 2 et 256 couleurs")
+            sys.exit(1)
+        DEFAULT_CONFIG["palette"] = args.palette
     
     # Vérifie que le dossier source existe
     if not os.path.isdir(args.source_dir):
@@ -274,7 +471,8 @@ Les spritesheets sont automatiquement divisés en plusieurs lignes si > 4096px.
         sys.exit(1)
     
     # Génère les spritesheets
-    generate_spritesheets(args.source_dir, args.output_dir, args.config)
+    generate_spritesheets(args.source_dir, args.output_dir, args.config, args.jobs,
+                          use_cache=not args.no_cache, cache_dir=args.cache_dir)
 
 if __name__ == '__main__':
     main()
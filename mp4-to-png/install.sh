@@ -53,7 +53,7 @@ echo ""
 echo "📚 Installation des dépendances Python..."
 if command -v pip3 &> /dev/null; then
     pip3 install -r requirements.txt --break-system-packages 2>/dev/null || pip3 install -r requirements.txt
-    echo "   ✅ Pillow installé"
+    echo "   ✅ Pillow et NumPy installés"
 else
     echo "❌ pip3 n'est pas installé"
     echo "   Installez-le avec: sudo apt install python3-pip"
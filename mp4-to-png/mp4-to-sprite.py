@@ -10,10 +10,104 @@ import os
 import sys
 from pathlib import Path
 from PIL import Image
+import numpy as np
 import tempfile
 import shutil
 import json
-from collections import deque
+import io
+import hashlib
+import math
+import time
+from fractions import Fraction
+from itertools import chain, accumulate
+from collections import deque, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, lru_cache
+from sprite_cache import SpriteCache, hash_file, DEFAULT_CACHE_SIZE_MB
+from stage_profiler import StageProfiler
+from atlas_packer import pack_rects
+
+# Modules partagés entre les outils du dépôt (encodage PNG et WebP, étiquetage par runs)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'shared'))
+from png_encoding import PNG_PRESETS, save_png, format_size
+from webp_encoding import WEBP_MODES, DEFAULT_WEBP_MODE, save_webp, decode_time
+from run_labeling import edge_connected_mask
+
+# Avance (en secondes) du positionnement rapide sur --start avant la découpe exacte (--seek input) ;
+# sans marge, le filtre fps ne choisit pas toujours les mêmes frames qu'avec --seek output
+SEEK_MARGIN = 1.0
+
+# Préréglage PNG par défaut des sprite sheets (équivalent de l'ancien optimize=True)
+DEFAULT_PNG_PRESET = 'smallest'
+
+# Taille de palette par défaut de --palette (PNG8 avec alpha)
+DEFAULT_PALETTE_COLORS = 256
+
+# Largeur maximale d'une sprite sheet (limite React Native)
+MAX_SHEET_WIDTH = 4096
+
+# Assemblage : direct = frames copiées dans la sheet préallouée dès leur traitement,
+# frames = frames traitées gardées en mémoire puis collées dans la sheet
+ASSEMBLY_MODES = ['direct', 'frames']
+DEFAULT_ASSEMBLY = 'direct'
+
+# Disposition : grid = grille de cases de taille fixe, packed = atlas de frames rognées et
+# dédupliquées avec une table des frames JSON (position, rognage, durée)
+LAYOUTS = ['grid', 'packed']
+DEFAULT_LAYOUT = 'grid'
+
+# Marge entre deux frames de l'atlas (évite les débordements au filtrage bilinéaire)
+ATLAS_PADDING = 1
+
+# Formats de sortie des sprite sheets (both = PNG et WebP côte à côte)
+SHEET_FORMATS = ['png', 'webp', 'both']
+DEFAULT_SHEET_FORMAT = 'png'
+
+# Modèles de fond : frame = détection complète sur chaque frame, temporal = modèle partagé entre frames
+BACKGROUND_MODELS = ['frame', 'temporal']
+DEFAULT_BACKGROUND_MODEL = 'frame'
+
+# Nombre de frames analysées entièrement pour construire le modèle de fond temporel
+DEFAULT_MODEL_FRAMES = 5
+
+# Détection de la couleur de fond : sur la première frame, ou sur chaque frame (fond qui change)
+BACKGROUND_DETECTIONS = ['first', 'every']
+DEFAULT_BACKGROUND_DETECTION = 'first'
+
+# Couleur de fond : couleur exacte la plus fréquente de la bordure (None), ou moyenne de l'amas
+# le plus peuplé d'un histogramme quantifié par ce pas (opt-in, ex. 8 pour un fond très bruité)
+DEFAULT_BORDER_QUANTIZE = None
+
+# Mode exact : écart par canal jusqu'auquel un pixel de bordure compte comme du fond (confiance)
+BORDER_NOISE_SPREAD = 8
+
+# En dessous de cette part de la bordure expliquée par le fond détecté, un avertissement est affiché
+LOW_BACKGROUND_CONFIDENCE = 0.5
+
+# Côté maximal des vignettes en niveaux de gris comparées par --dedup avec un seuil
+DEDUP_THUMBNAIL_SIZE = 32
+
+# Extraction des frames : pipe = flux mémoire depuis ffmpeg, disk = fichiers PNG temporaires
+EXTRACTION_MODES = ['pipe', 'disk']
+
+# Valeurs autorisées des options à choix fixés d'un fichier de configuration (voir validate_config) ;
+# en ligne de commande, les mêmes listes sont les choices d'argparse
+CONFIG_CHOICES = {
+    'extraction': EXTRACTION_MODES,
+    'png_preset': list(PNG_PRESETS),
+    'format': SHEET_FORMATS,
+    'webp_mode': list(WEBP_MODES),
+    'background_model': BACKGROUND_MODELS,
+    'background_detection': BACKGROUND_DETECTIONS,
+    'assembly': ASSEMBLY_MODES,
+    'layout': LAYOUTS,
+}
+
+class SpriteSheetError(Exception):
+    """
+    Échec de génération (extraction ffmpeg, vidéo illisible, aucune frame...)
+    Levée par les fonctions du pipeline ; la ligne de commande l'affiche puis quitte avec le code 1
+    """
 
 def check_dependencies():
     """Vérifie que ffmpeg est installé"""
@@ -27,7 +121,20 @@ def check_dependencies():
         print("   Installez-le avec: sudo apt install ffmpeg")
         sys.exit(1)
 
-def extract_frames(video_path, start_time, end_time, fps, temp_dir):
+def ffmpeg_input_args(video_path, start_time, duration, seek='input'):
+    """
+    Arguments ffmpeg d'entrée et de découpe du segment
+    seek='input' : positionnement hybride, ffmpeg saute à la keyframe précédant start_time - SEEK_MARGIN
+                   (-ss avant -i), puis la découpe exacte se fait en sortie (-ss après -i) sur les
+                   horodatages d'origine (-copyts) : mêmes frames qu'avec seek='output'
+    seek='output' : -ss après -i, tout est décodé depuis le début du fichier (lent sur les longues vidéos)
+    """
+    if seek == 'input':
+        coarse = max(0.0, start_time - SEEK_MARGIN)
+        return ['-ss', str(coarse), '-copyts', '-i', video_path, '-ss', str(start_time), '-t', str(duration)]
+    return ['-i', video_path, '-ss', str(start_time), '-t', str(duration)]
+
+def extract_frames(video_path, start_time, end_time, fps, temp_dir, seek='input'):
     """Extrait les frames de la vidéo avec ffmpeg"""
     duration = end_time - start_time
     
@@ -36,9 +143,7 @@ def extract_frames(video_path, start_time, end_time, fps, temp_dir):
     # Commande ffmpeg pour extraire les frames
     cmd = [
         'ffmpeg',
-        '-i', video_path,
-        '-ss', str(start_time),
-        '-t', str(duration),
+        *ffmpeg_input_args(video_path, start_time, duration, seek),
         '-vf', f'fps={fps}',
         '-q:v', '1',  # Qualité maximale
         f'{temp_dir}/frame_%04d.png'
@@ -47,8 +152,7 @@ def extract_frames(video_path, start_time, end_time, fps, temp_dir):
     try:
         subprocess.run(cmd, check=True, capture_output=True)
     except subprocess.CalledProcessError as e:
-        print(f"❌ Erreur lors de l'extraction: {e.stderr.decode()}")
-        sys.exit(1)
+        raise SpriteSheetError(f"Erreur lors de l'extraction: {e.stderr.decode()}") from e
     
     # Compte les frames extraites
     frames = sorted(Path(temp_dir).glob('frame_*.png'))
@@ -56,96 +160,375 @@ def extract_frames(video_path, start_time, end_time, fps, temp_dir):
     
     return frames
 
-def detect_background_color(image_path, sample_size=5, detect_checkerboard=True):
+def get_video_duration(video_path, default=10):
+    """Obtient la durée de la vidéo avec ffprobe (default si indisponible)"""
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1',
+        video_path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        return float(result.stdout.strip())
+    except:
+        print(f"⚠️  Impossible de détecter la durée, utilisation de {default}s")
+        return default
+
+def probe_video_size(video_path):
     """
-    Détecte la couleur de fond en échantillonnant les bords de l'image
-    Gère aussi les fonds quadrillés (checkerboard) gris/blanc si activé
+    Lit les dimensions (largeur, hauteur) des frames produites par ffmpeg, avec ffprobe
+    ffmpeg applique la rotation d'affichage (matrice d'affichage des vidéos de téléphone,
+    ou ancien tag rotate) : largeur et hauteur codées sont inversées pour une rotation de ±90°
+    """
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'stream=width,height:stream_side_data=rotation:stream_tags=rotate',
+        '-of', 'json',
+        video_path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        stream = json.loads(result.stdout)['streams'][0]
+        width, height = int(stream['width']), int(stream['height'])
+        rotation = stream.get('tags', {}).get('rotate', 0)
+        for side_data in stream.get('side_data_list', []):
+            rotation = side_data.get('rotation', rotation)
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError, KeyError, IndexError) as e:
+        raise SpriteSheetError(f"Impossible de lire les dimensions de la vidéo: {e}") from e
+    if round(float(rotation)) % 180:
+        return height, width
+    return width, height
+
+def probe_frame_rate(video_path):
+    """Lit la fréquence d'images du flux vidéo avec ffprobe (fraction exacte, ex: 30000/1001)"""
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'stream=r_frame_rate',
+        '-of', 'default=noprint_wrappers=1:nokey=1',
+        video_path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        return Fraction(result.stdout.strip())
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError, ZeroDivisionError) as e:
+        raise SpriteSheetError(f"Impossible de lire la fréquence d'images de la vidéo: {e}") from e
+
+@lru_cache(maxsize=None)
+def passthrough_args():
+    """
+    Option ffmpeg gardant les frames telles quelles (sans duplication ni suppression) :
+    -fps_mode (ffmpeg ≥ 5.1), sinon -vsync, dépréciée depuis
+    """
+    cmd = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', 'nullsrc=s=16x16:d=0.04',
+        '-fps_mode', 'passthrough',
+        '-f', 'null', '-'
+    ]
+    try:
+        supported = subprocess.run(cmd, capture_output=True).returncode == 0
+    except FileNotFoundError:
+        supported = False
+    return ['-fps_mode', 'passthrough'] if supported else ['-vsync', 'passthrough']
+
+def stream_frames(video_path, start_time, end_time, fps, pix_fmt='rgb24', seek='input', time_ranges=None):
+    """
+    Extrait les frames en mémoire : ffmpeg écrit des frames brutes (rgb24 ou rgba)
+    sur sa sortie standard, lues une par une dans un buffer de taille fixe
+    Générateur : ne garde que quelques frames en mémoire, aucun fichier temporaire
+    La taille de sortie est imposée (-s) : le buffer correspond toujours aux frames reçues
+    time_ranges: liste optionnelle de plages (début, fin) en secondes, sur les horodatages d'origine
+    de la vidéo, des frames à garder ; les autres sont écartées par ffmpeg avant conversion (elles
+    restent décodées). Sélection par instant et non par numéro : le compteur de frames du filtre
+    démarre à la keyframe de positionnement, pas à start_time
+    """
+    duration = end_time - start_time
+    width, height = probe_video_size(video_path)
+    mode = 'RGBA' if pix_fmt == 'rgba' else 'RGB'
+    frame_size = width * height * len(mode)
+    
+    print(f"📹 Extraction des frames de {start_time}s à {end_time}s ({duration}s, flux mémoire {pix_fmt})...")
+    
+    video_filter = f'fps={fps}'
+    if time_ranges:
+        selected = '+'.join(f'between(t,{first:.6f},{last:.6f})' for first, last in time_ranges)
+        video_filter += f",select='{selected}'"
+    
+    cmd = [
+        'ffmpeg',
+        '-loglevel', 'error',
+        *ffmpeg_input_args(video_path, start_time, duration, seek),
+        '-vf', video_filter,
+        *passthrough_args(),
+        '-f', 'rawvideo',
+        '-pix_fmt', pix_fmt,
+        '-s', f'{width}x{height}',
+        'pipe:1'
+    ]
+    
+    # stderr dans un fichier temporaire : évite tout blocage si ffmpeg est bavard
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file)
+        buffer = bytearray(frame_size)
+        view = memoryview(buffer)
+        completed = False
+        try:
+            while True:
+                # Remplit le buffer avec exactement une frame
+                filled = 0
+                while filled < frame_size:
+                    read = process.stdout.readinto(view[filled:])
+                    if not read:
+                        break
+                    filled += read
+                if filled < frame_size:
+                    break
+                # frombytes copie les données : le buffer peut être réutilisé
+                yield Image.frombytes(mode, (width, height), buffer)
+            completed = True
+        finally:
+            # Arrêt anticipé (générateur fermé ou erreur) : ffmpeg est interrompu
+            if not completed:
+                process.kill()
+            process.stdout.close()
+            return_code = process.wait()
+        
+        if return_code != 0:
+            stderr_file.seek(0)
+            raise SpriteSheetError(f"Erreur lors de l'extraction: {stderr_file.read().decode(errors='replace')}")
+
+def open_frame(frame, mode):
+    """Ouvre une frame qui peut être un chemin de fichier ou une image déjà décodée"""
+    if isinstance(frame, Image.Image):
+        return frame.convert(mode)
+    return Image.open(frame).convert(mode)
+
+class FrameDeduplicator:
+    """
+    Regroupe les frames consécutives identiques ou quasi identiques dès l'extraction (--dedup)
+    Seule la première frame d'une série est traitée et stockée ; holds[k] compte les frames
+    d'origine représentées par la k-ième frame gardée (pour rejouer le timing d'origine)
+    
+    threshold: 0 = frames identiques au pixel près (empreinte du contenu décodé) ; sinon écart
+    maximal (0-255) entre vignettes en niveaux de gris de DEDUP_THUMBNAIL_SIZE px, mesuré par
+    rapport à la première frame de la série (une dérive lente finit par ouvrir une nouvelle série)
+    """
+    
+    def __init__(self, threshold=0):
+        self.threshold = threshold
+        self.reference = None
+        self.holds = []
+    
+    def signature(self, frame):
+        img = frame if isinstance(frame, Image.Image) else Image.open(frame)
+        if not self.threshold:
+            return img.size, hashlib.blake2b(img.tobytes(), digest_size=16).digest()
+        gray = img.convert('L')
+        # Moyenne par blocs : le bruit d'encodage s'efface, un détail qui bouge (clignement) reste visible
+        return gray.size, np.asarray(gray.reduce(max(1, max(gray.size) // DEDUP_THUMBNAIL_SIZE)), dtype=np.int16)
+    
+    def add(self, frame):
+        """Retourne True si la frame ouvre une nouvelle série (à traiter), False si elle prolonge la précédente"""
+        signature = self.signature(frame)
+        if self.reference is not None and signature[0] == self.reference[0]:
+            if self.threshold:
+                duplicate = np.abs(signature[1] - self.reference[1]).max() <= self.threshold
+            else:
+                duplicate = signature[1] == self.reference[1]
+            if duplicate:
+                self.holds[-1] += 1
+                return False
+        self.reference = signature
+        self.holds.append(1)
+        return True
+    
+    def filter(self, frames, profiler=None):
+        """Générateur : laisse passer la première frame de chaque série"""
+        profiler = profiler or StageProfiler(enabled=False)
+        for frame in frames:
+            with profiler.stage('dedup'):
+                keep = self.add(frame)
+            if keep:
+                yield frame
+    
+    def report(self):
+        """Affiche le nombre de frames gardées (après consommation des frames)"""
+        total = sum(self.holds)
+        mode = f"seuil {self.threshold}" if self.threshold else "identiques"
+        print(f"🔁 Déduplication ({mode}): {total} frames → {len(self.holds)} gardée(s), "
+              f"{total - len(self.holds)} doublon(s) non traité(s)")
+
+def border_pixels(img):
+    """
+    Pixels RGB (N, 3) de la bordure complète de l'image (1 px sur les quatre côtés)
+    Les bandes sont découpées avant la conversion : le reste de l'image n'est pas lu
     """
-    img = Image.open(image_path).convert('RGB')
     width, height = img.size
+    strips = [
+        img.crop((0, 0, width, 1)),
+        img.crop((0, height - 1, width, height)),
+        img.crop((0, 1, 1, max(1, height - 1))),
+        img.crop((width - 1, 1, width, max(1, height - 1))),
+    ]
+    return np.concatenate([np.asarray(strip.convert('RGB')).reshape(-1, 3) for strip in strips])
+
+def dominant_color(pixels, quantize=DEFAULT_BORDER_QUANTIZE):
+    """
+    Couleur dominante d'un ensemble de pixels (N, 3)
+    quantize=None : couleur exacte la plus fréquente ; l'amas regroupe les pixels à au plus
+    BORDER_NOISE_SPREAD d'écart par canal (bruit de compression autour de cette couleur)
+    quantize=N : histogramme quantifié au pas N, chaque case est comptée avec ses 26 voisines
+    (un amas à cheval sur deux cases n'est pas coupé en deux) ; couleur = moyenne de l'amas
+    Retourne (couleur, masque booléen des pixels de l'amas)
+    """
+    if not quantize:
+        codes = (pixels[:, 0].astype(np.int32) << 16) | (pixels[:, 1].astype(np.int32) << 8) | pixels[:, 2]
+        values, counts = np.unique(codes, return_counts=True)
+        peak = int(values[counts.argmax()])
+        color = (peak >> 16, peak >> 8 & 0xFF, peak & 0xFF)
+        spread = np.abs(pixels.astype(np.int16) - np.array(color, dtype=np.int16))
+        return color, (spread <= BORDER_NOISE_SPREAD).all(axis=1)
     
-    # Échantillonne les bords de l'image (pas seulement le coin)
-    colors = []
+    bins = pixels.astype(np.int32) // quantize
+    # Codes sur une grille avec une case de marge de chaque côté : les voisines restent uniques
+    levels = 255 // quantize + 3
+    codes = ((bins[:, 0] + 1) * levels + bins[:, 1] + 1) * levels + bins[:, 2] + 1
+    occupied, counts = np.unique(codes, return_counts=True)
     
-    # Bord supérieur
-    for x in range(min(sample_size * 10, width)):
-        colors.append(img.getpixel((x, 0)))
+    offsets = np.array([(dr * levels + dg) * levels + db
+                        for dr in (-1, 0, 1) for dg in (-1, 0, 1) for db in (-1, 0, 1)])
+    neighbours = occupied[:, None] + offsets[None, :]
+    positions = np.minimum(np.searchsorted(occupied, neighbours), len(occupied) - 1)
+    scores = np.where(occupied[positions] == neighbours, counts[positions], 0).sum(axis=1)
     
-    # Bord inférieur
-    for x in range(min(sample_size * 10, width)):
-        colors.append(img.getpixel((x, height - 1)))
+    peak = occupied[scores.argmax()]
+    peak_bin = np.array([peak // (levels * levels), peak // levels % levels, peak % levels]) - 1
+    members = (np.abs(bins - peak_bin) <= 1).all(axis=1)
+    color = tuple(int(value) for value in np.rint(pixels[members].mean(axis=0)))
+    return color, members
+
+def checkerboard_tile(line, colors, tolerance=30):
+    """
+    Taille des cases d'une alternance régulière entre deux couleurs le long d'une ligne de pixels (N, 3)
+    Période estimée par FFT, puis vérifiée par comparaisons décalées (alternance à 1 case,
+    répétition à 2 cases) ; None si la ligne n'alterne pas régulièrement
+    """
+    line = line.astype(np.int16)
+    first, second = (np.abs(line - np.array(color, dtype=np.int16)).sum(axis=1) for color in colors)
+    valid = np.minimum(first, second) < tolerance
+    # Au moins 70% des pixels doivent correspondre à une des deux couleurs
+    if len(line) < 8 or valid.mean() < 0.7:
+        return None
     
-    # Bord gauche
-    for y in range(min(sample_size * 10, height)):
-        colors.append(img.getpixel((0, y)))
+    signal = np.where(valid, np.where(first <= second, 1.0, -1.0), 0.0)
+    spectrum = np.abs(np.fft.rfft(signal))
+    spectrum[0] = 0
+    frequency = int(spectrum.argmax())
+    if frequency == 0:
+        return None
+    estimate = len(signal) / (2 * frequency)
     
-    # Bord droit
-    for y in range(min(sample_size * 10, height)):
-        colors.append(img.getpixel((width - 1, y)))
+    def agreement(shift, same):
+        both = valid[:-shift] & valid[shift:]
+        if not both.any():
+            return 0.0
+        equal = signal[:-shift] == signal[shift:]
+        return float((equal if same else ~equal)[both].mean())
     
-    # Détecte si c'est un pattern quadrillé (checkerboard)
-    unique_colors = list(set(colors))
+    best_score, best_tile = 0.0, None
+    for tile in sorted({max(2, int(estimate) + delta) for delta in (-1, 0, 1, 2)}):
+        if 2 * tile >= len(signal):
+            continue
+        score = min(agreement(tile, same=False), agreement(2 * tile, same=True))
+        if score > best_score:
+            best_score, best_tile = score, tile
+    return best_tile if best_score >= 0.9 else None
+
+def analyze_background(frame, detect_checkerboard=True, quantize=DEFAULT_BORDER_QUANTIZE):
+    """
+    Analyse vectorisée du fond sur la bordure complète de l'image (rapide : utilisable à chaque frame)
+    - Couleur dominante de tous les pixels de bordure : exacte par défaut, ou amas d'un
+      histogramme quantifié avec quantize (voir dominant_color)
+    - Quadrillage (si detect_checkerboard) : deuxième amas gris et contrasté, dont l'alternance est
+      vérifiée horizontalement (bord haut ou bas) et verticalement (bord gauche ou droit), quelle
+      que soit la taille des cases (des rayures n'alternent que dans un sens)
+    Retourne {'colors': couleurs de fond, 'confidence': part des pixels de bordure expliqués par
+    ces couleurs (0-1), 'checkerboard': taille des cases en pixels ou None}
+    """
+    img = frame if isinstance(frame, Image.Image) else Image.open(frame)
+    pixels = border_pixels(img)
+    color, members = dominant_color(pixels, quantize)
+    result = {'colors': [color], 'confidence': float(members.mean()), 'checkerboard': None}
     
-    # Si la détection de checkerboard est activée et qu'on a 2 couleurs, vérifie si c'est vraiment un checkerboard
-    if detect_checkerboard and len(unique_colors) == 2:
-        r1, g1, b1 = unique_colors[0]
-        r2, g2, b2 = unique_colors[1]
-        
-        # Vérifie si ce sont des nuances de gris (checkerboard typique)
-        is_gray1 = abs(r1 - g1) < 10 and abs(g1 - b1) < 10
-        is_gray2 = abs(r2 - g2) < 10 and abs(g2 - b2) < 10
-        
-        # Vérifie aussi que les couleurs sont très différentes (typique d'un checkerboard)
-        color_diff = abs(r1 - r2) + abs(g1 - g2) + abs(b1 - b2)
-        
-        # Vérifie qu'il y a vraiment un pattern alterné (checkerboard)
-        # Échantillonne quelques pixels pour vérifier l'alternance
-        has_checkerboard_pattern = False
-        if is_gray1 and is_gray2 and color_diff > 100:  # Couleurs très différentes
-            # Vérifie l'alternance sur le bord supérieur
-            pattern_found = 0
-            sample_count = min(20, width)
-            for x in range(sample_count):
-                pixel = img.getpixel((x, 0))
-                expected_color = unique_colors[0] if (x // 8) % 2 == 0 else unique_colors[1]  # Pattern 8x8 typique
-                # Vérifie si le pixel correspond à la couleur attendue
-                dist1 = abs(pixel[0] - expected_color[0]) + abs(pixel[1] - expected_color[1]) + abs(pixel[2] - expected_color[2])
-                dist2 = abs(pixel[0] - unique_colors[0][0]) + abs(pixel[1] - unique_colors[0][1]) + abs(pixel[2] - unique_colors[0][2])
-                dist3 = abs(pixel[0] - unique_colors[1][0]) + abs(pixel[1] - unique_colors[1][1]) + abs(pixel[2] - unique_colors[1][2])
-                if min(dist2, dist3) < 30:  # Le pixel correspond à une des 2 couleurs
-                    pattern_found += 1
-            
-            # Si au moins 70% des pixels correspondent au pattern, c'est probablement un checkerboard
-            if pattern_found / sample_count > 0.7:
-                has_checkerboard_pattern = True
-        
-        if has_checkerboard_pattern:
-            print(f"🔍 Fond quadrillé détecté: {unique_colors[0]} et {unique_colors[1]}")
-            return unique_colors  # Retourne les 2 couleurs
-    
-    # Sinon, prend la couleur la plus fréquente
-    most_common = max(set(colors), key=colors.count)
-    
-    # Si la couleur dominante est très claire (blanc ou presque blanc), 
-    # on ne cherche pas de checkerboard pour éviter les faux positifs
-    r, g, b = most_common
-    is_very_light = (r + g + b) > 700  # Très clair (sur 765 max)
-    
-    # Si c'est très clair, on désactive la détection de checkerboard même si activée
-    if is_very_light and detect_checkerboard and len(unique_colors) == 2:
-        print(f"🔍 Couleur de fond très claire détectée: RGB{most_common}")
-        print(f"   (Détection de checkerboard ignorée pour éviter les faux positifs)")
-        return [most_common]
-    
-    print(f"🔍 Couleur de fond détectée: RGB{most_common}")
-    return [most_common]
-
-def is_color_match(pixel, bg_color, tolerance):
-    """Vérifie si un pixel correspond à une couleur de fond avec tolérance"""
-    r, g, b = pixel[:3]  # Prend seulement RGB
-    br, bg_val, bb = bg_color
-    color_distance = abs(r - br) + abs(g - bg_val) + abs(b - bb)
-    return color_distance < tolerance
+    if not detect_checkerboard or members.all():
+        return result
+    
+    second, others = dominant_color(pixels[~members], quantize)
+    colors = [color, second]
+    
+    # Nuances de gris très différentes (quadrillage typique) présentes sur une bonne part de la bordure
+    is_gray = all(abs(r - g) < 10 and abs(g - b) < 10 for r, g, b in colors)
+    color_diff = sum(abs(a - b) for a, b in zip(color, second))
+    if not is_gray or color_diff <= 100 or others.sum() < 0.2 * len(pixels):
+        return result
+    
+    width, height = img.size
+    
+    def edge_tile(boxes):
+        # Premier bord (parmi deux opposés) qui alterne régulièrement : l'autre peut être masqué par le sujet
+        for box in boxes:
+            tile = checkerboard_tile(np.asarray(img.crop(box).convert('RGB')).reshape(-1, 3), colors)
+            if tile:
+                return tile
+        return None
+    
+    horizontal = edge_tile([(0, 0, width, 1), (0, height - 1, width, height)])
+    vertical = edge_tile([(0, 0, 1, height), (width - 1, 0, width, height)])
+    # Cases carrées : même taille dans les deux sens (à un pixel près)
+    if not horizontal or not vertical or abs(horizontal - vertical) > 1:
+        return result
+    
+    return {
+        'colors': colors,
+        'confidence': float(members.sum() + others.sum()) / len(pixels),
+        'checkerboard': horizontal,
+    }
+
+def detect_background_color(image_path, detect_checkerboard=True, quantize=DEFAULT_BORDER_QUANTIZE):
+    """
+    Détecte la couleur de fond sur la bordure de l'image (voir analyze_background)
+    Gère aussi les fonds quadrillés (checkerboard) gris/blanc si activé
+    Retourne la liste des couleurs de fond
+    """
+    analysis = analyze_background(image_path, detect_checkerboard, quantize)
+    colors = analysis['colors']
+    confidence = analysis['confidence']
+    
+    if analysis['checkerboard']:
+        print(f"🔍 Fond quadrillé détecté: {colors[0]} et {colors[1]} "
+              f"(cases de {analysis['checkerboard']}px, confiance {confidence:.0%})")
+    else:
+        print(f"🔍 Couleur de fond détectée: RGB{colors[0]} (confiance {confidence:.0%})")
+    if confidence < LOW_BACKGROUND_CONFIDENCE:
+        print("⚠️  Confiance faible: le fond n'est peut-être pas uni, ou le sujet touche les bords")
+    
+    return colors
+
+def color_match_mask(rgb, bg_colors, tolerance):
+    """
+    Calcule en une seule passe le masque des pixels proches d'une des couleurs de fond
+    rgb: tableau numpy (hauteur, largeur, 3+) en uint8
+    Même critère que la version pixel par pixel : distance |dr|+|dg|+|db| < tolérance
+    """
+    rgb = rgb[..., :3].astype(np.int16)
+    match = np.zeros(rgb.shape[:2], dtype=bool)
+    for bg_color in bg_colors:
+        distance = np.abs(rgb - np.array(bg_color[:3], dtype=np.int16)).sum(axis=2)
+        match |= distance < tolerance
+    return match
 
 def remove_background(image_path, bg_colors, tolerance=30):
     """
@@ -153,73 +536,132 @@ def remove_background(image_path, bg_colors, tolerance=30):
     connectées aux bords (pas les zones intérieures du sprite)
     bg_colors: liste de couleurs à rendre transparentes
     """
-    img = Image.open(image_path).convert('RGBA')
-    width, height = img.size
+    img = open_frame(image_path, 'RGBA')
+    pixels = np.array(img)
     
-    # Crée un masque pour marquer les pixels de fond connectés aux bords
-    # 0 = à rendre transparent, 1 = à garder
-    mask = [[1] * width for _ in range(height)]
-    
-    # Marque les pixels de fond sur les bords et utilise flood fill avec queue
-    queue = deque()
-    
-    # Vérifie tous les bords et ajoute les pixels de fond à la queue
-    for y in range(height):
-        for x in range(width):
-            # Si c'est sur un bord
-            if x == 0 or x == width - 1 or y == 0 or y == height - 1:
-                pixel = img.getpixel((x, y))
-                # Vérifie si c'est une couleur de fond
-                for bg_color in bg_colors:
-                    if is_color_match(pixel, bg_color, tolerance):
-                        mask[y][x] = 0  # Marque comme fond
-                        queue.append((x, y))
-                        break
+    # Masque de tolérance pour toutes les couleurs de fond en une passe,
+    # puis étiquetage des régions connectées aux bords (4-connexité)
+    background = edge_connected_mask(color_match_mask(pixels, bg_colors, tolerance))
     
-    # Flood fill depuis les bords pour trouver tous les pixels de fond connectés
-    # Utilise une queue pour une efficacité optimale
-    while queue:
-        x, y = queue.popleft()
-        
-        # Vérifie les 4 voisins (filtre les None)
-        neighbors = []
-        if x > 0:
-            neighbors.append((x-1, y))
-        if x < width-1:
-            neighbors.append((x+1, y))
-        if y > 0:
-            neighbors.append((x, y-1))
-        if y < height-1:
-            neighbors.append((x, y+1))
-        
-        for nx, ny in neighbors:
-            if mask[ny][nx] == 1:
-                # Vérifie si ce voisin est aussi une couleur de fond
-                pixel = img.getpixel((nx, ny))
-                for bg_color in bg_colors:
-                    if is_color_match(pixel, bg_color, tolerance):
-                        mask[ny][nx] = 0  # Marque comme fond
-                        queue.append((nx, ny))
-                        break
+    # Écrit directement l'alpha : le fond devient transparent, le reste est conservé tel quel
+    pixels[..., 3][background] = 0
+    pixels_made_transparent = int(background.sum())
     
-    # Applique le masque : rend transparent uniquement les pixels marqués comme fond
-    new_data = []
-    pixels_made_transparent = 0
-    
-    for y in range(height):
-        for x in range(width):
-            pixel = img.getpixel((x, y))
-            if mask[y][x] == 0:
-                # Rendre transparent
-                new_data.append((pixel[0], pixel[1], pixel[2], 0))
-                pixels_made_transparent += 1
-            else:
-                # Garder le pixel tel quel
-                new_data.append(pixel)
+    return Image.fromarray(pixels, 'RGBA'), pixels_made_transparent
+
+def color_distance(a, b):
+    """
+    Distance |dr|+|dg|+|db| entre deux tableaux RGB uint8 de même forme (résultat uint16)
+    Calculée en uint8 canal par canal (max - min) : évite la conversion complète en int16
+    """
+    diff = np.maximum(a, b)
+    diff -= np.minimum(a, b)
+    distance = diff[..., 0].astype(np.uint16)
+    distance += diff[..., 1]
+    distance += diff[..., 2]
+    return distance
+
+class TemporalBackground:
+    """
+    Modèle de fond temporel partagé entre les frames d'un même clip (caméra fixe)
+    
+    - Apprentissage : les `warmup` premières frames sont analysées entièrement (comme remove_background) ;
+      la couleur moyenne de chaque pixel de fond forme le fond de référence par pixel
+    - Ensuite, seuls les pixels dont la couleur a bougé d'au moins tolérance/2 depuis leur dernière
+      évaluation sont réexaminés (fond global ou fond de référence du pixel) ; ailleurs, le masque
+      précédent est conservé. Le fond de référence suit les pixels réévalués comme fond, ce qui
+      absorbe les dérives lentes d'éclairage sans scintillement d'une frame à l'autre
+    - La connexion aux bords est recalculée sur chaque frame (un sprite qui bouge peut ouvrir ou
+      fermer un passage vers le bord) ; elle est sautée si aucun pixel n'a changé d'état
+    
+    Le modèle garde un état entre les frames : les frames doivent être traitées dans l'ordre,
+    dans un seul processus
+    """
+    
+    def __init__(self, bg_colors, tolerance=30, warmup=DEFAULT_MODEL_FRAMES):
+        self.bg_colors = bg_colors
+        self.tolerance = tolerance
+        self.warmup = max(1, warmup)
+        self.recomputed_pixels = 0
+        self.reset()
     
-    img.putdata(new_data)
+    def reset(self):
+        """Oublie le modèle (nouveau clip) ; le compteur de pixels réexaminés est conservé"""
+        self.frames_seen = 0
+        self.reference = None   # Couleur de chaque pixel lors de sa dernière évaluation
+        self.match = None       # Pixels proches du fond (avant connexion aux bords)
+        self.background = None  # Masque de fond de la frame précédente
+        self.plate = None       # Fond de référence par pixel
+        self.plate_valid = None
+        self.plate_sum = None
+        self.plate_count = None
+    
+    def learn(self, rgb):
+        """Analyse complète d'une frame d'apprentissage et accumulation du fond de référence"""
+        self.match = color_match_mask(rgb, self.bg_colors, self.tolerance)
+        self.background = edge_connected_mask(self.match)
+        if self.plate_sum is None or self.plate_sum.shape[:2] != rgb.shape[:2]:
+            self.plate_sum = np.zeros(rgb.shape[:2] + (3,), dtype=np.uint32)
+            self.plate_count = np.zeros(rgb.shape[:2], dtype=np.uint32)
+        self.plate_sum[self.background] += rgb[self.background]
+        self.plate_count += self.background
+        self.frames_seen += 1
+        self.recomputed_pixels += self.match.size
+        
+        if self.frames_seen == self.warmup:
+            self.plate_valid = self.plate_count > 0
+            count = np.maximum(self.plate_count, 1)[..., None]
+            self.plate = ((self.plate_sum + count // 2) // count).astype(np.uint8)
+            self.plate_sum = self.plate_count = None
+    
+    def update(self, rgb):
+        """Réexamine uniquement les pixels qui ont changé depuis leur dernière évaluation"""
+        changed = np.flatnonzero(color_distance(rgb, self.reference) >= (self.tolerance + 1) // 2)
+        if not len(changed):
+            return
+        self.recomputed_pixels += len(changed)
+        
+        # Vues à plat (tableaux contigus) : seuls les pixels changés sont lus ou écrits
+        colors = rgb.reshape(-1, 3)[changed]
+        plate = self.plate.reshape(-1, 3)
+        match = self.match.reshape(-1)
+        
+        # Fond global (couleurs détectées) ou fond de référence appris pour ce pixel
+        matched = color_match_mask(colors[None], self.bg_colors, self.tolerance)[0]
+        matched |= self.plate_valid.reshape(-1)[changed] & (color_distance(colors, plate[changed]) < self.tolerance)
+        
+        self.reference.reshape(-1, 3)[changed] = colors
+        # Le fond de référence suit les pixels reconnus comme fond (dérive d'éclairage)
+        learned = changed[matched]
+        plate[learned] = colors[matched]
+        self.plate_valid.reshape(-1)[learned] = True
+        
+        if np.any(match[changed] != matched):
+            match[changed] = matched
+            self.background = edge_connected_mask(self.match)
     
-    return img, pixels_made_transparent
+    def remove(self, frame):
+        """
+        Équivalent de remove_background pour la frame suivante du clip
+        Retourne (image RGBA, pixels_rendus_transparents)
+        """
+        img = open_frame(frame, 'RGBA')
+        rgb = np.asarray(img.convert('RGB'))
+        
+        if self.reference is not None and self.reference.shape != rgb.shape:
+            # Dimensions différentes : nouveau clip, le modèle repart de zéro
+            self.reset()
+        
+        if self.frames_seen < self.warmup:
+            self.learn(rgb)
+            self.reference = rgb.copy()
+        else:
+            self.update(rgb)
+        
+        alpha = np.array(img.getchannel('A'))
+        alpha[self.background] = 0
+        img.putalpha(Image.fromarray(alpha, 'L'))
+        return img, int(self.background.sum())
 
 def resize_image(img, target_height, target_width=None):
     """
@@ -271,136 +713,1049 @@ def resize_image(img, target_height, target_width=None):
         
         return final_img
 
+def process_frame(frame, bg_colors, tolerance, target_height, target_width=None, background=None,
+                  detect_background=False):
+    """
+    Traite une frame complète : suppression du fond (si bg_colors) puis redimensionnement
+    Fonction de niveau module pour pouvoir être exécutée dans un pool de processus
+    background: TemporalBackground optionnel, remplace remove_background (traitement séquentiel)
+    detect_background: redétecte la couleur de fond sur cette frame (fond qui change au cours du clip)
+    Retourne (image, pixels_rendus_transparents, timings)
+    timings: {étape: (secondes_mur, secondes_CPU)} mesurés dans le processus qui traite la frame
+    """
+    timings = {}
+    transparent_pixels = 0
+    if bg_colors and detect_background and not background:
+        begin_wall, begin_cpu = time.perf_counter(), time.process_time()
+        bg_colors = analyze_background(frame, detect_checkerboard=False)['colors']
+        timings['detect_background_color'] = (time.perf_counter() - begin_wall, time.process_time() - begin_cpu)
+    
+    begin_wall, begin_cpu = time.perf_counter(), time.process_time()
+    if background:
+        img, transparent_pixels = background.remove(frame)
+        stage = 'remove_background'
+    elif bg_colors:
+        img, transparent_pixels = remove_background(frame, bg_colors, tolerance)
+        stage = 'remove_background'
+    else:
+        img = open_frame(frame, 'RGBA')
+        stage = 'open_frame'
+    middle_wall, middle_cpu = time.perf_counter(), time.process_time()
+    timings[stage] = (middle_wall - begin_wall, middle_cpu - begin_cpu)
+    
+    img = resize_image(img, target_height, target_width)
+    timings['resize_image'] = (time.perf_counter() - middle_wall, time.process_time() - middle_cpu)
+    
+    return img, transparent_pixels, timings
+
+def map_frames(func, frames, jobs=1):
+    """
+    Applique func à chaque frame en conservant l'ordre
+    jobs > 1 : répartit le travail sur un pool de processus, avec un nombre borné
+    de frames en cours pour ne pas consommer tout un générateur d'avance
+    """
+    if jobs <= 1:
+        yield from map(func, frames)
+        return
+    
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for frame in frames:
+            pending.append(executor.submit(func, frame))
+            if len(pending) >= jobs * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def process_segment_frame(task):
+    """
+    Traite une frame routée vers un segment :
+    task = (segment, (frame, bg_colors, tolérance, hauteur, largeur, modèle_de_fond, détection_par_frame))
+    Retourne (segment, image, pixels_rendus_transparents, timings)
+    """
+    segment, args = task
+    return (segment, *process_frame(*args))
+
 def load_config(config_path):
-    """Charge un fichier de configuration JSON"""
+    """Charge un fichier de configuration JSON ; lève SpriteSheetError si absent ou invalide"""
     try:
         with open(config_path, 'r', encoding='utf-8') as f:
             config = json.load(f)
-        print(f"📋 Configuration chargée depuis: {config_path}")
-        return config
     except FileNotFoundError:
-        print(f"⚠️  Fichier de config non trouvé: {config_path}")
-        return {}
+        raise SpriteSheetError(f"Fichier de config non trouvé: {config_path}") from None
     except json.JSONDecodeError as e:
-        print(f"❌ Erreur de parsing JSON dans {config_path}: {e}")
-        sys.exit(1)
+        raise SpriteSheetError(f"JSON invalide dans {config_path}: {e}") from None
+    print(f"📋 Configuration chargée depuis: {config_path}")
+    return config
 
-def create_sprite_sheet(frames, output_path, target_height, transparent, tolerance, target_width=None):
+def validate_config(config, config_path):
     """
-    Crée la sprite sheet à partir des frames
-    Divise automatiquement en plusieurs lignes si la largeur dépasse 4096px (limite React Native)
+    Vérifie les options à choix fixés d'un fichier de configuration (table CONFIG_CHOICES)
+    Les valeurs de la ligne de commande sont déjà vérifiées par argparse ; lève SpriteSheetError
     """
-    MAX_WIDTH = 4096  # Limite React Native
-    
-    print(f"\n🎨 Création de la sprite sheet...")
+    for key, allowed in CONFIG_CHOICES.items():
+        if key in config and config[key] not in allowed:
+            raise SpriteSheetError(f"Valeur inconnue pour '{key}' dans {config_path}: {config[key]!r} "
+                                   f"(disponibles: {', '.join(allowed)})")
+
+def process_frames(frames, target_height, transparent, tolerance, *, target_width=None, jobs=1, profiler=None,
+                   background_model=DEFAULT_BACKGROUND_MODEL, model_frames=DEFAULT_MODEL_FRAMES,
+                   background_detection=DEFAULT_BACKGROUND_DETECTION, canvas=None):
+    """
+    Détecte la couleur de fond sur la première frame (si transparent) puis traite toutes les frames :
+    suppression du fond + redimensionnement, éventuellement en parallèle (ordre conservé)
+    frames peut être une liste de fichiers PNG ou un générateur d'images (flux ffmpeg)
+    background_model: frame (détection complète par frame) ou temporal (TemporalBackground appris
+    sur les model_frames premières frames, traitement séquentiel)
+    background_detection: first (couleur de fond détectée sur la première frame) ou every
+    (redétectée sur chaque frame, ignoré avec le modèle temporel qui suit déjà les dérives)
+    canvas: SheetCanvas optionnel qui reçoit chaque frame traitée (sinon, les frames sont gardées dans une liste)
+    Retourne (frames_traitées ou canvas, couleurs_de_fond, pixels_rendus_transparents_par_frame)
+    """
+    profiler = profiler or StageProfiler(enabled=False)
+    total = len(frames) if hasattr(frames, '__len__') else None
+    frames = iter(frames)
+    first_frame = next(frames, None)
     
-    if not frames:
-        print("❌ Aucune frame à traiter")
-        sys.exit(1)
+    if first_frame is None:
+        raise SpriteSheetError("Aucune frame à traiter")
     
     # Détecte la couleur de fond sur la première frame
     bg_colors = None
     if transparent:
         # Désactive la détection de checkerboard par défaut pour éviter les faux positifs
         # (peut être réactivée si nécessaire)
-        bg_colors = detect_background_color(frames[0], detect_checkerboard=False)
+        with profiler.stage('detect_background_color'):
+            bg_colors = detect_background_color(first_frame, detect_checkerboard=False)
+    
+    # Modèle de fond temporel : état partagé entre frames, donc un seul processus
+    background = None
+    if transparent and background_model == 'temporal':
+        background = TemporalBackground(bg_colors, tolerance, model_frames)
+        if jobs > 1:
+            print("⚠️  Modèle de fond temporel: traitement séquentiel (--jobs ignoré)")
+            jobs = 1
+        if background_detection == 'every':
+            print("⚠️  Modèle de fond temporel: couleur de fond détectée sur la première frame uniquement")
     
     # Traite chaque frame
-    processed_frames = []
+    processed_frames = canvas if canvas is not None else []
     total_transparent_pixels = 0
     
-    for i, frame_path in enumerate(frames, 1):
-        print(f"   Traitement frame {i}/{len(frames)}...", end='\r')
-        
-        # Ouvre et traite la frame
-        if transparent and bg_colors:
-            img, transparent_pixels = remove_background(frame_path, bg_colors, tolerance)
-            total_transparent_pixels += transparent_pixels
-        else:
-            img = Image.open(frame_path).convert('RGBA')
-        
-        # Redimensionne
-        img = resize_image(img, target_height, target_width)
+    # Suppression du fond + redimensionnement, éventuellement en parallèle (ordre conservé)
+    worker = partial(
+        process_frame,
+        bg_colors=bg_colors,
+        tolerance=tolerance,
+        target_height=target_height,
+        target_width=target_width,
+        background=background,
+        detect_background=background_detection == 'every'
+    )
+    results = map_frames(worker, chain([first_frame], frames), jobs)
+    
+    for i, (img, transparent_pixels, timings) in enumerate(results, 1):
+        progress = f"{i}/{total}" if total else f"{i}"
+        print(f"   Traitement frame {progress}...", end='\r')
+        for stage, (wall, cpu) in timings.items():
+            profiler.record(stage, wall, cpu, i - 1)
+        total_transparent_pixels += transparent_pixels
         processed_frames.append(img)
     
     print()  # Nouvelle ligne après la progression
     
+    avg_transparent = total_transparent_pixels // len(processed_frames)
     if transparent:
-        avg_transparent = total_transparent_pixels // len(frames)
         print(f"✅ Transparence appliquée (~{avg_transparent} pixels/frame)")
+    if background:
+        height, width = background.reference.shape[:2]
+        share = background.recomputed_pixels / (len(processed_frames) * height * width)
+        print(f"🧠 Modèle de fond temporel: {share:.1%} des pixels "
+              f"réexaminés ({min(model_frames, len(processed_frames))} frame(s) d'apprentissage)")
+    
+    return processed_frames, bg_colors, avg_transparent
+
+def create_sprite_sheet(frames, output_path, target_height, transparent, tolerance, *, target_width=None, jobs=1,
+                        png_preset=DEFAULT_PNG_PRESET, palette=None, sheet_format=DEFAULT_SHEET_FORMAT,
+                        webp_mode=DEFAULT_WEBP_MODE, profiler=None, background_model=DEFAULT_BACKGROUND_MODEL,
+                        model_frames=DEFAULT_MODEL_FRAMES, background_detection=DEFAULT_BACKGROUND_DETECTION,
+                        assembly=DEFAULT_ASSEMBLY, expected_frames=None, sheet_layout=DEFAULT_LAYOUT, fps=None,
+                        dedup=None):
+    """
+    Crée la sprite sheet à partir des frames
+    Divise automatiquement en plusieurs lignes si la largeur dépasse 4096px (limite React Native)
+    jobs: nombre de processus pour le traitement des frames (1 = séquentiel)
+    palette: nombre de couleurs de la palette partagée (PNG8), None = RGBA complet
+    sheet_format: png, webp ou both (voir sheet_outputs)
+    profiler: StageProfiler optionnel (mesures par étape et par frame)
+    background_model, model_frames, background_detection: voir process_frames
+    assembly: direct (SheetCanvas préalloué pour expected_frames frames, ou len(frames)) ou frames
+    sheet_layout: grid, ou packed (FrameAtlas, durées des frames calculées à partir de fps, alors requis)
+    dedup: None, ou seuil de FrameDeduplicator (0 = frames identiques) : les séries de frames
+    consécutives identiques ne sont traitées qu'une fois, leurs durées (fps requis) vont dans la table des frames
+    """
+    profiler = profiler or StageProfiler(enabled=False)
+    print(f"\n🎨 Création de la sprite sheet...")
+    
+    sprite_sheet, layout, _, _ = render_sprite_sheet(
+        frames, target_height, transparent, tolerance,
+        target_width=target_width,
+        jobs=jobs,
+        profiler=profiler,
+        background_model=background_model,
+        model_frames=model_frames,
+        background_detection=background_detection,
+        assembly=assembly,
+        expected_frames=expected_frames,
+        sheet_layout=sheet_layout,
+        fps=fps,
+        dedup=dedup
+    )
+    return save_sprite_sheet(sprite_sheet, layout, output_path, png_preset=png_preset, palette=palette,
+                             sheet_format=sheet_format, webp_mode=webp_mode, profiler=profiler)
+
+def render_sprite_sheet(frames, target_height, transparent, tolerance, *, target_width=None, jobs=1, profiler=None,
+                        background_model=DEFAULT_BACKGROUND_MODEL, model_frames=DEFAULT_MODEL_FRAMES,
+                        background_detection=DEFAULT_BACKGROUND_DETECTION, assembly=DEFAULT_ASSEMBLY,
+                        expected_frames=None, sheet_layout=DEFAULT_LAYOUT, fps=None, dedup=None):
+    """
+    Frames -> sprite sheet en mémoire : déduplication, traitement, assemblage et table des frames
+    Partagé par la ligne de commande (create_sprite_sheet) et l'API bibliothèque (sprite_builder)
+    Paramètres : voir create_sprite_sheet ; expected_frames dimensionne le SheetCanvas quand
+    frames est un générateur (flux mémoire)
+    Retourne (sprite_sheet, disposition, couleurs_de_fond, pixels_transparents_par_frame),
+    disposition telle que retournée par layout_sprite_sheet
+    fps est requis avec sheet_layout='packed' ou dedup (durées de la table des frames) ; SpriteSheetError sinon
+    """
+    if sheet_layout == 'packed' and fps is None:
+        raise SpriteSheetError("fps requis avec la disposition packed (durées de la table des frames)")
+    if dedup is not None and fps is None:
+        raise SpriteSheetError("fps requis avec la déduplication (durées des frames maintenues)")
+    profiler = profiler or StageProfiler(enabled=False)
+    canvas = None
+    if sheet_layout == 'packed':
+        canvas = FrameAtlas(fps)
+    elif assembly == 'direct':
+        canvas = SheetCanvas(len(frames) if hasattr(frames, '__len__') else expected_frames or 1)
+    deduplicator = None
+    if dedup is not None:
+        deduplicator = FrameDeduplicator(dedup)
+        frames = deduplicator.filter(frames, profiler)
+    processed_frames, bg_colors, transparent_pixels = process_frames(
+        frames, target_height, transparent, tolerance,
+        target_width=target_width,
+        jobs=jobs,
+        profiler=profiler,
+        background_model=background_model,
+        model_frames=model_frames,
+        background_detection=background_detection,
+        canvas=canvas
+    )
+    
+    durations = None
+    if deduplicator:
+        deduplicator.report()
+        durations = frame_durations(len(processed_frames), fps, deduplicator.holds)
+    sprite_sheet, layout = layout_sprite_sheet(processed_frames, profiler, durations)
+    return sprite_sheet, layout, bg_colors, transparent_pixels
+
+def frame_map_path(output_path):
+    """Table des frames JSON d'un atlas (--layout packed) : même nom que la sheet, extension .json"""
+    return Path(output_path).with_suffix('.json')
+
+def write_frame_map(frame_map, outputs):
+    """
+    Écrit la table des frames JSON d'une sortie (voir sheet_outputs)
+    meta.image est fixé ici, d'après les fichiers de cette sortie : la table restaurée depuis
+    le cache pour une autre sortie désigne ainsi toujours la sheet à côté d'elle
+    """
+    # Image de référence : le PNG s'il est produit, sinon le WebP
+    frame_map['meta']['image'] = next(path for name, path in outputs.items() if name != 'json').name
+    with open(outputs['json'], 'w', encoding='utf-8') as f:
+        json.dump(frame_map, f, indent=2)
+
+def sheet_outputs(output_path, sheet_format=DEFAULT_SHEET_FORMAT, sheet_layout=DEFAULT_LAYOUT, dedup=None):
+    """
+    Fichiers produits pour une sortie, par format : {'png': chemin, 'webp': chemin, 'json': chemin}
+    Le PNG garde le nom demandé, le WebP le même nom avec l'extension .webp ; la table des
+    frames JSON n'est produite qu'avec sheet_layout='packed' ou la déduplication (dedup)
+    """
+    output_path = Path(output_path)
+    outputs = {}
+    if sheet_format in ('png', 'both'):
+        outputs['png'] = output_path
+    if sheet_format in ('webp', 'both'):
+        outputs['webp'] = output_path.with_suffix('.webp')
+    if sheet_layout == 'packed' or dedup is not None:
+        outputs['json'] = frame_map_path(output_path)
+    return outputs
+
+def measure_decode_times(formats):
+    """Ajoute à chaque format produit (voir save_sprite_sheet) son temps de décodage, decode_seconds"""
+    for entry in formats:
+        entry['decode_seconds'] = decode_time(entry['path'])
+    return formats
+
+def format_report_lines(formats):
+    """
+    Tableau comparatif des formats produits pour une même sprite sheet : encodage, décodage et taille
+    formats: liste de {format, path, encode_seconds, bytes, decode_seconds} (voir measure_decode_times)
+    Retourne les lignes du tableau (en-tête, séparateur, une ligne par format, rapports si deux formats)
+    """
+    lines = [
+        f"{'format':>6} | {'encodage':>9} | {'décodage':>9} | {'taille':>10}",
+        f"{'-' * 6}-+-{'-' * 9}-+-{'-' * 9}-+-{'-' * 10}",
+    ]
+    for entry in formats:
+        lines.append(f"{entry['format']:>6} | {entry['encode_seconds']:>8.3f}s | {entry['decode_seconds']:>8.4f}s | "
+                     f"{format_size(entry['bytes']):>10}")
+    if len(formats) == 2:
+        # Rapports second / premier : < 1 signifie plus petit ou plus rapide
+        first, second = formats
+        lines.append(f"→ {second['format']} / {first['format']}: "
+                     f"taille ×{second['bytes'] / max(first['bytes'], 1):.2f}, "
+                     f"encodage ×{second['encode_seconds'] / max(first['encode_seconds'], 1e-9):.2f}, "
+                     f"décodage ×{second['decode_seconds'] / max(first['decode_seconds'], 1e-9):.2f}")
+    return lines
+
+def print_format_report(formats):
+    """Affiche le tableau comparatif des formats (voir format_report_lines)"""
+    print("📊 Comparaison des formats:")
+    for line in format_report_lines(formats):
+        print(f"   {line}")
+
+def grid_layout(count, frame_width):
+    """
+    Grille de la sprite sheet : (frames_par_ligne, nombre_de_lignes)
+    Une seule ligne si la largeur totale tient dans MAX_SHEET_WIDTH, sinon des lignes pleines
+    """
+    if frame_width * count <= MAX_SHEET_WIDTH:
+        return count, 1
+    # Au moins une frame par ligne
+    frames_per_line = max(1, MAX_SHEET_WIDTH // frame_width)
+    return frames_per_line, (count + frames_per_line - 1) // frames_per_line  # Arrondi supérieur
+
+def print_layout(count, frame_width, frame_height, frames_per_line, num_lines):
+    """Affiche les dimensions de la sprite sheet finale"""
+    total_width = frame_width * count
+    actual_width = frames_per_line * frame_width
+    print(f"📐 Dimensions frame: {frame_width}x{frame_height}px")
+    print(f"📐 Total frames: {count}")
+    if num_lines == 1:
+        print(f"📐 Largeur totale: {total_width}px (≤ {MAX_SHEET_WIDTH}px, une seule ligne)")
+        print(f"📐 Sprite sheet finale: {actual_width}x{frame_height}px (1 ligne)")
+    else:
+        print(f"📐 Largeur totale: {total_width}px (> {MAX_SHEET_WIDTH}px, division en {num_lines} ligne(s))")
+        print(f"📐 Frames par ligne: {frames_per_line} (limite: {MAX_SHEET_WIDTH}px)")
+        print(f"📐 Largeur de chaque ligne: {actual_width}px (identique pour toutes)")
+        print(f"📐 Sprite sheet finale: {actual_width}x{frame_height * num_lines}px ({num_lines} ligne(s))")
+
+class SheetCanvas:
+    """
+    Sprite sheet assemblée au fil du traitement (--assembly direct)
+    La grille est calculée dès la première frame à partir du nombre de frames attendu ; chaque frame
+    traitée est copiée dans sa case d'un buffer RGBA préalloué puis libérée. Le pic mémoire est
+    d'une sheet plus les quelques frames en cours, au lieu de toutes les frames plus la sheet.
     
-    # Calcule les dimensions d'une frame
-    frame_width = processed_frames[0].width
-    frame_height = processed_frames[0].height
+    S'utilise comme la liste des frames traitées (append, len) ; si le nombre réel de frames
+    diffère de l'estimation, la grille est recalculée et les cases déjà écrites recopiées
+    """
+    
+    def __init__(self, expected_frames):
+        self.expected_frames = max(1, expected_frames)
+        self.count = 0
+        self.buffer = None
+        self.frame_size = None
+        self.grid = None
+    
+    def __len__(self):
+        return self.count
     
-    # Calcule la largeur totale nécessaire
-    total_width = frame_width * len(processed_frames)
+    def _cell(self, index, grid):
+        frame_width, frame_height = self.frame_size
+        return (index % grid[0]) * frame_width, (index // grid[0]) * frame_height
+    
+    def _allocate(self, capacity):
+        """(Ré)alloue le buffer pour `capacity` frames et y recopie les cases déjà écrites"""
+        frame_width, frame_height = self.frame_size
+        grid = grid_layout(capacity, frame_width)
+        buffer = np.zeros((grid[1] * frame_height, grid[0] * frame_width, 4), dtype=np.uint8)
+        if self.grid is not None and grid[0] == self.grid[0]:
+            # Même nombre de colonnes : les cases gardent leur position
+            rows = min(grid[1], self.grid[1]) * frame_height
+            buffer[:rows] = self.buffer[:rows]
+        else:
+            for index in range(self.count):
+                x, y = self._cell(index, self.grid)
+                new_x, new_y = self._cell(index, grid)
+                buffer[new_y:new_y + frame_height, new_x:new_x + frame_width] = \
+                    self.buffer[y:y + frame_height, x:x + frame_width]
+        self.buffer, self.grid = buffer, grid
     
-    # Si la largeur totale est <= 4096px, une seule ligne suffit
-    if total_width <= MAX_WIDTH:
-        # Une seule ligne avec la largeur exacte
-        num_lines = 1
-        actual_width = total_width
-        frames_per_line = len(processed_frames)
+    def append(self, frame):
+        """Copie une frame traitée dans sa case"""
+        if self.buffer is None:
+            self.frame_size = frame.size
+            self._allocate(self.expected_frames)
+        elif frame.size != self.frame_size:
+            raise SpriteSheetError(f"Frame de taille {frame.size[0]}x{frame.size[1]}px, "
+                                   f"attendu {self.frame_size[0]}x{self.frame_size[1]}px")
+        if self.count >= self.grid[0] * self.grid[1]:
+            # Plus de frames que prévu : capacité augmentée de moitié
+            self._allocate(max(self.count + 1, self.count * 3 // 2))
         
-        print(f"📐 Dimensions frame: {frame_width}x{frame_height}px")
-        print(f"📐 Total frames: {len(processed_frames)}")
-        print(f"📐 Largeur totale: {total_width}px (≤ {MAX_WIDTH}px, une seule ligne)")
+        frame_width, frame_height = self.frame_size
+        x, y = self._cell(self.count, self.grid)
+        self.buffer[y:y + frame_height, x:x + frame_width] = np.asarray(
+            frame if frame.mode == 'RGBA' else frame.convert('RGBA')
+        )
+        self.count += 1
+    
+    def finish(self, profiler=None):
+        """Ajuste la grille au nombre réel de frames ; retourne (sprite_sheet, disposition) sans copie du buffer"""
+        profiler = profiler or StageProfiler(enabled=False)
+        with profiler.stage('layout'):
+            frame_width, frame_height = self.frame_size
+            grid = grid_layout(self.count, frame_width)
+            if grid[0] == self.grid[0]:
+                # Lignes en trop retirées par une vue (le buffer reste contigu)
+                self.buffer = self.buffer[:grid[1] * frame_height]
+                self.grid = grid
+            else:
+                self._allocate(self.count)
+            print_layout(self.count, frame_width, frame_height, *self.grid)
+            # Image partageant la mémoire du buffer (pas de copie de la sheet)
+            sprite_sheet = Image.fromarray(self.buffer, 'RGBA')
         
-        # Crée la sprite sheet
-        sprite_sheet = Image.new('RGBA', (actual_width, frame_height), (0, 0, 0, 0))
+        return sprite_sheet, {
+            'frames': self.count,
+            'frame_width': frame_width,
+            'frame_height': frame_height,
+            'columns': self.grid[0],
+            'rows': self.grid[1],
+        }
+
+def frame_durations(count, fps, holds=None):
+    """
+    Durées des frames en millisecondes, arrondies sans dérive (leur somme suit le temps réel)
+    holds: nombre de frames d'origine représentées par chaque frame (FrameDeduplicator), 1 par défaut
+    """
+    ends = list(accumulate(holds if holds is not None else [1] * count))
+    return [round(end * 1000 / fps) - round(start * 1000 / fps) for start, end in zip([0] + ends[:-1], ends)]
+
+def frame_map_entry(index, position, size, offset, source_size, duration):
+    """Entrée de la table des frames (format « JSON array » de TexturePacker, durée en ms)"""
+    return {
+        'filename': f'frame_{index:04d}',
+        'frame': {'x': position[0], 'y': position[1], 'w': size[0], 'h': size[1]},
+        'rotated': False,
+        'trimmed': tuple(size) != tuple(source_size),
+        'spriteSourceSize': {'x': offset[0], 'y': offset[1], 'w': size[0], 'h': size[1]},
+        'sourceSize': {'w': source_size[0], 'h': source_size[1]},
+        'duration': duration,
+    }
+
+def grid_frame_map(layout, durations):
+    """Table des frames d'une grille (--dedup sans --layout packed) : cases entières, sans rognage"""
+    frame_size = (layout['frame_width'], layout['frame_height'])
+    columns = layout['columns']
+    return {
+        'frames': [
+            frame_map_entry(i, ((i % columns) * frame_size[0], (i // columns) * frame_size[1]), frame_size,
+                            (0, 0), frame_size, duration)
+            for i, duration in enumerate(durations)
+        ],
+        'meta': {
+            'app': 'mp4-to-sprite',
+            'format': 'RGBA8888',
+            'size': {'w': columns * frame_size[0], 'h': layout['rows'] * frame_size[1]},
+            'scale': '1',
+        },
+    }
+
+class FrameAtlas:
+    """
+    Atlas de frames rognées et dédupliquées (--layout packed)
+    Chaque frame traitée est rognée à la boîte englobante de son canal alpha dès sa réception,
+    puis comparée aux précédentes (empreinte du contenu rogné) : seules les images uniques sont
+    gardées. finish() les place avec le packer MaxRects (largeur ≤ MAX_SHEET_WIDTH) et produit
+    la table des frames : position dans la sheet, décalage du rognage et durée de chaque frame.
+    
+    S'utilise comme la liste des frames traitées (append, len), comme SheetCanvas
+    """
+    
+    def __init__(self, fps):
+        self.fps = fps
+        self.images = []
+        self.entries = []
+        self.digests = {}
+        self.frame_size = None
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def append(self, frame):
+        """Rogne la frame traitée et l'ajoute (une seule fois si son contenu rogné a déjà été vu)"""
+        if frame.mode != 'RGBA':
+            frame = frame.convert('RGBA')
+        if self.frame_size is None:
+            self.frame_size = frame.size
+        elif frame.size != self.frame_size:
+            raise SpriteSheetError(f"Frame de taille {frame.size[0]}x{frame.size[1]}px, "
+                                   f"attendu {self.frame_size[0]}x{self.frame_size[1]}px")
         
-        # Place toutes les frames sur une ligne
-        for i, frame in enumerate(processed_frames):
-            x_offset = i * frame_width
-            sprite_sheet.paste(frame, (x_offset, 0))
+        # Frame entièrement transparente : un pixel transparent suffit
+        bbox = frame.getchannel('A').getbbox() or (0, 0, 1, 1)
+        trimmed = frame.crop(bbox)
+        digest = (trimmed.size, hashlib.blake2b(trimmed.tobytes(), digest_size=16).digest())
+        image = self.digests.get(digest)
+        if image is None:
+            image = self.digests[digest] = len(self.images)
+            self.images.append(trimmed)
+        self.entries.append((image, bbox[0], bbox[1]))
+    
+    def finish(self, profiler=None, durations=None):
+        """
+        Place les images uniques et retourne (sprite_sheet, disposition) avec la table des frames
+        durations: durées des frames en ms (--dedup), sinon 1000 / fps pour chaque frame
+        """
+        profiler = profiler or StageProfiler(enabled=False)
+        durations = durations or frame_durations(len(self.entries), self.fps)
+        with profiler.stage('layout'):
+            positions, width, height = pack_rects([image.size for image in self.images], MAX_SHEET_WIDTH,
+                                                  ATLAS_PADDING)
+            sprite_sheet = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+            for image, position in zip(self.images, positions):
+                sprite_sheet.paste(image, position)
+            
+            frame_width, frame_height = self.frame_size
+            frames = []
+            for i, ((image, x, y), duration) in enumerate(zip(self.entries, durations)):
+                frames.append(frame_map_entry(i, positions[image], self.images[image].size, (x, y),
+                                              self.frame_size, duration))
+            
+            # Comparaison avec la grille de cases de taille fixe (--layout grid)
+            columns, rows = grid_layout(len(self.entries), frame_width)
+            grid_pixels = columns * frame_width * rows * frame_height
+            used = sum(image.width * image.height for image in self.images)
+            print(f"📐 Dimensions frame: {frame_width}x{frame_height}px")
+            print(f"📐 Total frames: {len(self.entries)} ({len(self.images)} image(s) unique(s) après rognage)")
+            print(f"📦 Atlas: {width}x{height}px, occupation {used / (width * height):.0%} "
+                  f"(grille: {columns * frame_width}x{rows * frame_height}px, "
+                  f"surface ×{width * height / grid_pixels:.2f})")
+            if height > MAX_SHEET_WIDTH:
+                print(f"⚠️  Hauteur de l'atlas > {MAX_SHEET_WIDTH}px : réduire --size ou --fps")
         
-        print(f"📐 Sprite sheet finale: {actual_width}x{frame_height}px (1 ligne)")
+        return sprite_sheet, {
+            'frames': len(self.entries),
+            'frame_width': frame_width,
+            'frame_height': frame_height,
+            'unique_frames': len(self.images),
+            'frame_map': {
+                'frames': frames,
+                'meta': {
+                    'app': 'mp4-to-sprite',
+                    'format': 'RGBA8888',
+                    'size': {'w': width, 'h': height},
+                    'scale': '1',
+                    'frameRate': self.fps,
+                },
+            },
+        }
+
+def layout_sprite_sheet(processed_frames, profiler=None, durations=None):
+    """
+    Place les frames traitées sur la sprite sheet, en mémoire
+    Divise automatiquement en plusieurs lignes si la largeur dépasse 4096px (limite React Native)
+    processed_frames: liste d'images, SheetCanvas déjà rempli (--assembly direct) ou FrameAtlas (--layout packed)
+    Retourne (sprite_sheet, disposition) avec disposition = {frames, frame_width, frame_height, columns, rows}
+    (FrameAtlas : {frames, frame_width, frame_height, unique_frames, frame_map}, voir FrameAtlas.finish)
+    durations: durées des frames en ms (--dedup) ; ajoute durations et frame_map (table des frames) à la disposition
+    """
+    if isinstance(processed_frames, FrameAtlas):
+        sprite_sheet, layout = processed_frames.finish(profiler, durations)
+    elif isinstance(processed_frames, SheetCanvas):
+        sprite_sheet, layout = processed_frames.finish(profiler)
     else:
-        # Plusieurs lignes nécessaires
-        # Calcule combien de frames peuvent tenir sur une ligne (max 4096px)
-        frames_per_line = MAX_WIDTH // frame_width
-        if frames_per_line == 0:
-            frames_per_line = 1  # Au moins une frame par ligne
-        
-        # Calcule le nombre de lignes nécessaires
-        num_lines = (len(processed_frames) + frames_per_line - 1) // frames_per_line  # Arrondi supérieur
-        
-        # Toutes les lignes ont la même largeur = largeur d'une ligne pleine
-        actual_width = frames_per_line * frame_width
-        
-        print(f"📐 Dimensions frame: {frame_width}x{frame_height}px")
-        print(f"📐 Total frames: {len(processed_frames)}")
-        print(f"📐 Largeur totale: {total_width}px (> {MAX_WIDTH}px, division en {num_lines} ligne(s))")
-        print(f"📐 Frames par ligne: {frames_per_line} (limite: {MAX_WIDTH}px)")
-        print(f"📐 Largeur de chaque ligne: {actual_width}px (identique pour toutes)")
+        sprite_sheet, layout = paste_sprite_sheet(processed_frames, profiler)
+    if durations:
+        layout['durations'] = durations
+        if 'frame_map' not in layout:
+            layout['frame_map'] = grid_frame_map(layout, durations)
+    return sprite_sheet, layout
+
+def paste_sprite_sheet(processed_frames, profiler=None):
+    """Colle une liste de frames traitées sur une grille (--assembly frames) ; voir layout_sprite_sheet"""
+    profiler = profiler or StageProfiler(enabled=False)
+    with profiler.stage('layout'):
+        # Calcule les dimensions d'une frame et la grille
+        frame_width = processed_frames[0].width
+        frame_height = processed_frames[0].height
+        frames_per_line, num_lines = grid_layout(len(processed_frames), frame_width)
+        print_layout(len(processed_frames), frame_width, frame_height, frames_per_line, num_lines)
         
-        # Crée la sprite sheet
-        sprite_height = frame_height * num_lines
-        sprite_sheet = Image.new('RGBA', (actual_width, sprite_height), (0, 0, 0, 0))
+        # Crée la sprite sheet (les cases vides de la dernière ligne restent transparentes)
+        sprite_sheet = Image.new('RGBA', (frames_per_line * frame_width, num_lines * frame_height), (0, 0, 0, 0))
         
         # Place les frames ligne par ligne
-        frame_index = 0
-        for line in range(num_lines):
-            y_offset = line * frame_height
-            frames_in_this_line = min(frames_per_line, len(processed_frames) - frame_index)
-            
-            for i in range(frames_in_this_line):
-                x_offset = i * frame_width
-                sprite_sheet.paste(processed_frames[frame_index], (x_offset, y_offset))
-                frame_index += 1
-            
-            # Les lignes incomplètes auront automatiquement du transparent à droite
-            # (créé par Image.new avec fond transparent)
+        for i, frame in enumerate(processed_frames):
+            sprite_sheet.paste(frame, ((i % frames_per_line) * frame_width, (i // frames_per_line) * frame_height))
+    
+    return sprite_sheet, {
+        'frames': len(processed_frames),
+        'frame_width': frame_width,
+        'frame_height': frame_height,
+        'columns': frames_per_line,
+        'rows': num_lines,
+    }
+
+def assemble_sprite_sheet(processed_frames, output_path, *, png_preset=DEFAULT_PNG_PRESET, palette=None,
+                          sheet_format=DEFAULT_SHEET_FORMAT, webp_mode=DEFAULT_WEBP_MODE, profiler=None,
+                          durations=None):
+    """
+    Assemble les frames traitées en sprite sheet (voir layout_sprite_sheet) et la sauvegarde
+    png_preset: préréglage d'encodage PNG (fast, balanced, smallest, palette)
+    palette: nombre de couleurs de la palette PNG8, calculée sur la sheet assemblée pour être
+    partagée par toutes les frames (None = celle du préréglage, RGBA complet sinon)
+    sheet_format: png, webp ou both ; webp_mode: lossless ou near-lossless
+    Le WebP est encodé depuis la sheet RGBA (--palette ne concerne que le PNG)
+    Avec un FrameAtlas ou des durations (--dedup), la table des frames est écrite à côté de la
+    sheet (voir frame_map_path)
+    profiler: StageProfiler optionnel (étapes layout, encode_png, encode_webp)
+    Retourne (nombre_frames, largeur_frame, hauteur_frame, formats) (voir save_sprite_sheet)
+    """
+    profiler = profiler or StageProfiler(enabled=False)
+    sprite_sheet, layout = layout_sprite_sheet(processed_frames, profiler, durations)
+    return save_sprite_sheet(sprite_sheet, layout, output_path, png_preset=png_preset, palette=palette,
+                             sheet_format=sheet_format, webp_mode=webp_mode, profiler=profiler)
+
+def save_sprite_sheet(sprite_sheet, layout, output_path, *, png_preset=DEFAULT_PNG_PRESET, palette=None,
+                      sheet_format=DEFAULT_SHEET_FORMAT, webp_mode=DEFAULT_WEBP_MODE, profiler=None):
+    """
+    Encode et sauvegarde une sprite sheet assemblée (voir layout_sprite_sheet) dans chaque format
+    Paramètres d'encodage : voir assemble_sprite_sheet ; la table des frames de la disposition
+    (FrameAtlas ou --dedup) est écrite à côté de la sheet (voir frame_map_path)
+    Retourne (nombre_frames, largeur_frame, hauteur_frame, formats), formats étant la liste des
+    fichiers produits {format, path, encode_seconds, bytes}, avec decode_seconds si plusieurs
+    formats sont comparés (voir format_report_lines)
+    """
+    profiler = profiler or StageProfiler(enabled=False)
+    outputs = sheet_outputs(output_path, sheet_format)
+    formats = []
+    if 'png' in outputs:
+        colors = palette or PNG_PRESETS[png_preset]['colors']
+        if colors:
+            # Référence RGBA encodée en mémoire avec les mêmes réglages zlib pour mesurer le gain
+            with profiler.stage('palette_report'):
+                _, rgba_size = save_png(sprite_sheet, io.BytesIO(), png_preset, colors=0)
+        with profiler.stage('encode_png'):
+            encode_time, file_size = save_png(sprite_sheet, outputs['png'], png_preset, colors=colors)
+        print(f"💾 Sprite sheet sauvegardée: {outputs['png']} ({file_size // 1024} KB)")
+        print(f"🗜️  Encodage PNG ({png_preset}): {encode_time:.2f}s, {format_size(file_size)}")
+        if colors:
+            print(f"🎨 Palette partagée de {colors} couleurs (PNG8 avec alpha): "
+                  f"{format_size(rgba_size)} en RGBA → {format_size(file_size)} "
+                  f"({rgba_size / max(file_size, 1):.1f}x plus petit)")
+        formats.append({'format': 'PNG', 'path': str(outputs['png']), 'encode_seconds': encode_time,
+                        'bytes': file_size})
+    if 'webp' in outputs:
+        with profiler.stage('encode_webp'):
+            encode_time, file_size = save_webp(sprite_sheet, outputs['webp'], webp_mode)
+        print(f"💾 Sprite sheet sauvegardée: {outputs['webp']} ({file_size // 1024} KB)")
+        print(f"🗜️  Encodage WebP ({webp_mode}): {encode_time:.2f}s, {format_size(file_size)}")
+        formats.append({'format': 'WebP', 'path': str(outputs['webp']), 'encode_seconds': encode_time,
+                        'bytes': file_size})
+    if len(formats) > 1:
+        with profiler.stage('format_report'):
+            print_format_report(measure_decode_times(formats))
+    if 'frame_map' in layout:
+        write_frame_map(layout['frame_map'], {**outputs, 'json': frame_map_path(output_path)})
+        print(f"🗺️  Table des frames: {frame_map_path(output_path)} "
+              f"({layout['frames']} frames, {layout.get('unique_frames', layout['frames'])} image(s), "
+              f"durées en ms)")
+    
+    return layout['frames'], layout['frame_width'], layout['frame_height'], formats
+
+def load_segments(manifest_path, defaults):
+    """
+    Charge un manifeste JSON de segments nommés à découper dans une même vidéo
+    Chaque segment peut redéfinir fps, size, width, transparent, tolerance et output,
+    les autres valeurs viennent de defaults (options de la ligne de commande)
+    Lève SpriteSheetError si le manifeste ou l'un de ses segments est invalide
+    """
+    manifest = load_config(manifest_path)
+    entries = manifest.get('segments', manifest) if isinstance(manifest, dict) else manifest
+    if not entries:
+        raise SpriteSheetError(f"Aucun segment défini dans {manifest_path}")
+    
+    output_dir = Path(manifest.get('output_dir', '.')) if isinstance(manifest, dict) else Path('.')
+    
+    segments = []
+    for entry in entries:
+        if 'name' not in entry or 'start' not in entry or 'end' not in entry:
+            raise SpriteSheetError(f"Segment invalide (name, start et end sont requis): {entry}")
+        segment = dict(defaults)
+        segment.update(entry)
+        if segment['start'] >= segment['end']:
+            raise SpriteSheetError(f"Segment '{segment['name']}': start doit être inférieur à end")
+        segment['output'] = str(output_dir / entry.get('output', f"{segment['name']}.png"))
+        segments.append(segment)
+    
+    return segments
+
+def build_segment_sheets(video_path, segments, *, jobs=1, pix_fmt='rgb24', seek='input',
+                         png_preset=DEFAULT_PNG_PRESET, palette=None, sheet_format=DEFAULT_SHEET_FORMAT, webp_mode=DEFAULT_WEBP_MODE,
+                         profiler=None, background_model=DEFAULT_BACKGROUND_MODEL, model_frames=DEFAULT_MODEL_FRAMES,
+                         background_detection=DEFAULT_BACKGROUND_DETECTION, assembly=DEFAULT_ASSEMBLY,
+                         sheet_layout=DEFAULT_LAYOUT, dedup=None):
+    """
+    Découpe plusieurs segments d'une même vidéo en ne la décodant qu'une seule fois
+    La vidéo est décodée à sa fréquence native sur l'union des segments, puis chaque
+    frame est routée vers les segments qui en ont besoin (fps propre à chaque segment)
+    Avec un profiler, les timings par frame suivent l'ordre de traitement (tous segments confondus)
+    background_model='temporal' : un TemporalBackground par segment, traitement séquentiel
+    background_detection='every' : couleur de fond redétectée sur chaque frame (voir process_frames)
+    assembly='direct' : un SheetCanvas par segment, dimensionné pour son nombre de frames attendu
+    sheet_layout='packed' : un FrameAtlas par segment (table des frames JSON à côté de chaque sheet)
+    dedup : un FrameDeduplicator par segment, appliqué aux frames routées vers ce segment
+    Retourne la liste des (segment, nombre_frames, largeur_frame, hauteur_frame, formats)
+    """
+    profiler = profiler or StageProfiler(enabled=False)
+    source_fps = probe_frame_rate(video_path)
+    first_start = min(segment['start'] for segment in segments)
+    last_end = max(segment['end'] for segment in segments)
+    
+    # Index de frame décodée -> segments qui l'utilisent
+    # Même sélection que le filtre fps de ffmpeg sur une extraction séparée du segment :
+    # la frame k est la dernière frame source dont l'instant précède start + (k + 0.5) / fps
+    # (calcul en fractions exactes pour ne pas dériver sur les fréquences type 30000/1001)
+    def exact(value):
+        return Fraction(value).limit_denominator(1000000)
+    
+    first_decoded = math.ceil(exact(first_start) * source_fps)
+    routes = defaultdict(list)
+    ranges = []
+    counts = []
+    for index, segment in enumerate(segments):
+        fps = exact(segment['fps'])
+        count = round((segment['end'] - segment['start']) * segment['fps'])
+        counts.append(count)
+        wanted = [
+            max(0, math.ceil((exact(segment['start']) + (k + Fraction(1, 2)) / fps) * source_fps) - 1 - first_decoded)
+            for k in range(count)
+        ]
+        for frame_index in wanted:
+            routes[frame_index].append(index)
+        if wanted:
+            ranges.append((wanted[0], wanted[-1]))
+    
+    # Fusionne les plages qui se chevauchent : ffmpeg n'envoie que ces frames
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    # Plages d'instants correspondantes : demi-frame de marge autour des instants des frames décodées
+    time_ranges = [
+        (float((first_decoded + first - Fraction(1, 2)) / source_fps),
+         float((first_decoded + last + Fraction(1, 2)) / source_fps))
+        for first, last in merged
+    ]
+    
+    print(f"\n🎨 Découpe de {len(segments)} segment(s) en un seul décodage ({float(source_fps):g} fps natifs)...")
+    
+    bg_colors = {}
+    backgrounds = {}
+    deduplicators = {index: FrameDeduplicator(dedup) for index in range(len(segments))} if dedup is not None else {}
+    if background_model == 'temporal' and jobs > 1:
+        print("⚠️  Modèle de fond temporel: traitement séquentiel (--jobs ignoré)")
+        jobs = 1
+    
+    def tasks():
+        decoded = profiler.iterate(
+            'extraction',
+            stream_frames(video_path, first_start, last_end, source_fps, pix_fmt, seek, time_ranges),
+            per_frame=False
+        )
+        indices = chain.from_iterable(range(first, last + 1) for first, last in merged)
+        for i, frame in zip(indices, decoded):
+            for index in routes.pop(i, []):
+                segment = segments[index]
+                if deduplicators:
+                    with profiler.stage('dedup'):
+                        keep = deduplicators[index].add(frame)
+                    if not keep:
+                        continue
+                if index not in bg_colors:
+                    # Couleur de fond détectée sur la première frame de chaque segment
+                    bg_colors[index] = None
+                    if segment['transparent']:
+                        print(f"   [{segment['name']}]", end=' ')
+                        with profiler.stage('detect_background_color'):
+                            bg_colors[index] = detect_background_color(frame, detect_checkerboard=False)
+                        if background_model == 'temporal':
+                            backgrounds[index] = TemporalBackground(bg_colors[index], segment['tolerance'],
+                                                                    model_frames)
+                yield index, (frame, bg_colors[index], segment['tolerance'], segment['size'], segment['width'],
+                              backgrounds.get(index), background_detection == 'every')
+            if not routes:
+                # Toutes les frames utiles sont décodées : inutile d'aller plus loin
+                decoded.close()
+                break
+    
+    if sheet_layout == 'packed':
+        processed = {index: FrameAtlas(segment['fps']) for index, segment in enumerate(segments)}
+    elif assembly == 'direct':
+        processed = {index: SheetCanvas(count) for index, count in enumerate(counts)}
+    else:
+        processed = defaultdict(list)
+    transparent_totals = defaultdict(int)
+    for i, (index, img, transparent_pixels, timings) in enumerate(map_frames(process_segment_frame, tasks(), jobs), 1):
+        processed[index].append(img)
+        transparent_totals[index] += transparent_pixels
+        for stage, (wall, cpu) in timings.items():
+            profiler.record(stage, wall, cpu, i - 1)
+        print(f"   Traitement frame {i}...", end='\r')
+    print()
+    
+    results = []
+    for index, segment in enumerate(segments):
+        # Retiré du dictionnaire : la mémoire du segment est libérée une fois sa sheet écrite
+        frames = processed.pop(index, [])
+        print(f"\n🎞️  Segment '{segment['name']}': {segment['start']}s → {segment['end']}s, "
+              f"{len(frames)} frames à {segment['fps']} fps")
+        if not frames:
+            print("❌ Aucune frame pour ce segment (hors de la vidéo ?)")
+            continue
+        if segment['transparent']:
+            print(f"✅ Transparence appliquée (~{transparent_totals[index] // len(frames)} pixels/frame)")
+        durations = None
+        if deduplicators:
+            deduplicators[index].report()
+            durations = frame_durations(len(frames), segment['fps'], deduplicators[index].holds)
+        results.append((segment, *assemble_sprite_sheet(
+            frames, segment['output'],
+            png_preset=png_preset,
+            palette=palette,
+            sheet_format=sheet_format,
+            webp_mode=webp_mode,
+            profiler=profiler,
+            durations=durations
+        )))
+    
+    return results
+
+def build_sprite_sheet(video_path, output_path, *, target_height, transparent, tolerance, fps,
+                       start_time, end_time, target_width=None, jobs=1, extraction='pipe',
+                       pix_fmt='rgb24', cache=None, seek='input', png_preset=DEFAULT_PNG_PRESET,
+                       palette=None, sheet_format=DEFAULT_SHEET_FORMAT, webp_mode=DEFAULT_WEBP_MODE,
+                       profiler=None, background_model=DEFAULT_BACKGROUND_MODEL, model_frames=DEFAULT_MODEL_FRAMES,
+                       background_detection=DEFAULT_BACKGROUND_DETECTION, assembly=DEFAULT_ASSEMBLY,
+                       sheet_layout=DEFAULT_LAYOUT, dedup=None):
+    """
+    Pipeline complet : extraction des frames puis création de la sprite sheet
+    Avec un cache (SpriteCache), une sprite sheet déjà générée avec les mêmes paramètres
+    est réutilisée telle quelle, et les frames décodées sont réutilisées si seuls les
+    paramètres de traitement (taille, largeur, transparence, tolérance) ont changé
+    profiler: StageProfiler optionnel (--profile, --metrics-json)
+    background_model, model_frames, background_detection: modèle et détection du fond (voir process_frames)
+    assembly: direct (sheet préallouée pour (end - start) * fps frames) ou frames (voir create_sprite_sheet)
+    sheet_layout: grid ou packed (atlas + table des frames JSON, mise en cache avec la sheet)
+    dedup: seuil de déduplication des frames extraites (None = désactivée, voir FrameDeduplicator) ;
+    les frames décodées mises en cache restent complètes
+    Retourne (nombre_frames, largeur_frame, hauteur_frame, formats) (voir save_sprite_sheet) ;
+    formats est vide si la sprite sheet vient du cache (aucun encodage)
+    """
+    profiler = profiler or StageProfiler(enabled=False)
+    sheet_key = frames_key = None
+    if cache:
+        with profiler.stage('cache_lookup'):
+            video_hash = hash_file(video_path)
+        extraction_params = {
+            'fps': fps,
+            'start': float(start_time),
+            'end': float(end_time),
+            'pix_fmt': pix_fmt,
+            'seek': seek,
+        }
+        frames_key = cache.make_key(video_hash, **extraction_params)
+        sheet_key = cache.make_key(
+            video_hash,
+            size=target_height,
+            width=target_width,
+            transparent=bool(transparent),
+            tolerance=tolerance if transparent else None,
+            background_model=background_model if transparent else None,
+            model_frames=model_frames if transparent and background_model == 'temporal' else None,
+            background_detection=background_detection if transparent else None,
+            png_preset=png_preset,
+            palette=palette,
+            sheet_format=sheet_format,
+            webp_mode=webp_mode if sheet_format != 'png' else None,
+            sheet_layout=sheet_layout,
+            dedup=dedup,
+            **extraction_params
+        )
+        
+        with profiler.stage('cache_lookup'):
+            cached_sheets, meta = cache.get_sheet(sheet_key)
+        if cached_sheets:
+            print(f"♻️  Sprite sheet trouvée dans le cache (extraction et traitement ignorés)")
+            outputs = sheet_outputs(output_path, sheet_format, sheet_layout, dedup)
+            for name, path in outputs.items():
+                if name == 'json':
+                    # Table des frames : meta.image désigne la sheet de cette sortie, pas celle mise en cache
+                    with open(cached_sheets[name], encoding='utf-8') as f:
+                        write_frame_map(json.load(f), outputs)
+                else:
+                    shutil.copyfile(cached_sheets[name], path)
+                print(f"💾 Sprite sheet copiée: {path}")
+            return meta['frames'], meta['frame_width'], meta['frame_height'], []
+    
+    temp_dir = None
+    try:
+        frames = cache.get_frames(frames_key) if cache else None
+        if frames:
+            print(f"♻️  {len(frames)} frames décodées trouvées dans le cache (extraction ignorée)")
+        else:
+            # Extraction des frames
+            if extraction == 'disk':
+                temp_dir = tempfile.mkdtemp(prefix='mp4-sprite-')
+                with profiler.stage('extraction'):
+                    frames = extract_frames(video_path, start_time, end_time, fps, temp_dir, seek)
+            else:
+                frames = profiler.iterate('extraction', stream_frames(video_path, start_time, end_time, fps,
+                                                                      pix_fmt, seek))
+            if cache:
+                frames = cache.record_frames(frames_key, frames)
         
-        print(f"📐 Sprite sheet finale: {actual_width}x{sprite_height}px ({num_lines} ligne(s))")
+        # Création de la sprite sheet
+        num_frames, frame_w, frame_h, formats = create_sprite_sheet(
+            frames,
+            output_path,
+            target_height,
+            transparent,
+            tolerance,
+            target_width=target_width,
+            jobs=jobs,
+            png_preset=png_preset,
+            palette=palette,
+            sheet_format=sheet_format,
+            webp_mode=webp_mode,
+            profiler=profiler,
+            background_model=background_model,
+            model_frames=model_frames,
+            background_detection=background_detection,
+            assembly=assembly,
+            expected_frames=round((end_time - start_time) * fps),
+            sheet_layout=sheet_layout,
+            fps=fps,
+            dedup=dedup
+        )
+    finally:
+        # Nettoie le dossier temporaire
+        if temp_dir:
+            shutil.rmtree(temp_dir)
+    
+    if cache:
+        with profiler.stage('cache_store'):
+            cache.put_sheet(sheet_key, sheet_outputs(output_path, sheet_format, sheet_layout, dedup), {
+                'frames': num_frames,
+                'frame_width': frame_w,
+                'frame_height': frame_h,
+            })
+            cache.evict()
+    
+    return num_frames, frame_w, frame_h, formats
+
+def print_react_src(output_path, sheet_format, indent='     ', sheet_layout=DEFAULT_LAYOUT, dedup=None):
+    """
+    Ligne src de l'exemple React (le WebP en priorité, le PNG en repli s'il est aussi produit)
+    et, avec --layout packed ou --dedup, la table des frames à charger avec la sheet
+    """
+    names = [path.name for path in sheet_outputs(output_path, sheet_format).values()]
+    print(f"{indent}src: '/assets/{names[-1]}',")
+    if len(names) > 1:
+        print(f"{indent}// Repli PNG: '/assets/{names[0]}'")
+    if 'json' in sheet_outputs(output_path, sheet_format, sheet_layout, dedup):
+        print(f"{indent}atlas: '/assets/{frame_map_path(output_path).name}',  // Position, rognage et durée par frame")
+
+def report_profile(profiler, args, **result):
+    """Affiche le profil par étape (--profile) et/ou écrit les mesures JSON (--metrics-json)"""
+    if args.profile:
+        profiler.report()
+    if args.metrics_json:
+        profiler.write_json(args.metrics_json, tool='mp4-to-sprite', input=args.input,
+                            options=vars(args), result=result)
+        print(f"📈 Mesures écrites: {args.metrics_json}")
+
+def run_segments(args, profiler=None):
+    """Génère une sprite sheet par segment du manifeste --segments (un seul décodage)"""
+    defaults = {
+        'fps': args.fps,
+        'size': args.size,
+        'width': args.width,
+        'transparent': args.transparent,
+        'tolerance': args.tolerance,
+    }
+    segments = load_segments(args.segments, defaults)
+    for segment in segments:
+        Path(segment['output']).parent.mkdir(parents=True, exist_ok=True)
+    
+    print("=" * 60)
+    print("🎬 MP4 to Sprite Sheet Converter (multi-segments)")
+    print("=" * 60)
+    print(f"📁 Entrée: {args.input}")
+    print(f"📋 Segments: {len(segments)} ({args.segments})")
+    for segment in segments:
+        print(f"   • {segment['name']:12} {segment['start']}s → {segment['end']}s | "
+              f"{segment['fps']} fps | {segment['size']}px → {segment['output']}")
+    print("=" * 60)
     
-    # Sauvegarde
-    sprite_sheet.save(output_path, 'PNG', optimize=True)
-    file_size = os.path.getsize(output_path)
-    print(f"💾 Sprite sheet sauvegardée: {output_path} ({file_size // 1024} KB)")
+    results = build_segment_sheets(
+        args.input,
+        segments,
+        jobs=args.jobs,
+        pix_fmt=args.pix_fmt,
+        seek=args.seek,
+        png_preset=args.png_preset,
+        palette=args.palette,
+        sheet_format=args.format,
+        webp_mode=args.webp_mode,
+        profiler=profiler,
+        background_model=args.background_model,
+        model_frames=args.model_frames,
+        background_detection=args.background_detection,
+        assembly=args.assembly,
+        sheet_layout=args.layout,
+        dedup=args.dedup
+    )
     
-    return len(processed_frames), frame_width, frame_height
+    print()
+    print("=" * 60)
+    print(f"✅ TERMINÉ ! {len(results)}/{len(segments)} sprite sheet(s)")
+    print("=" * 60)
+    print("💡 Utilisation dans React:")
+    print(f"   const animations = {{")
+    for segment, num_frames, frame_w, frame_h, _ in results:
+        print(f"     {segment['name']}: {{")
+        print_react_src(segment['output'], args.format, indent='       ', sheet_layout=args.layout,
+                        dedup=args.dedup)
+        print(f"       frames: {num_frames},")
+        print(f"       frameWidth: {frame_w},")
+        print(f"       frameHeight: {frame_h}")
+        print(f"     }},")
+    print(f"   }};")
+    
+    if profiler:
+        report_profile(profiler, args, segments={
+            segment['name']: {'frames': num_frames, 'frame_width': frame_w, 'frame_height': frame_h}
+            for segment, num_frames, frame_w, frame_h in results
+        })
+    
+    if len(results) < len(segments):
+        sys.exit(1)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -414,6 +1769,18 @@ Exemples:
   %(prog)s video.mp4 --transparent --tolerance=50 --start=1.5 --end=3
   %(prog)s video.mp4 --size=128 --width=128 --transparent --fps=12
   %(prog)s video.mp4 --config=config.json --output=avatar.png
+  %(prog)s master.mp4 --segments=segments.json --transparent
+  %(prog)s video.mp4 --png-preset=fast                 # Encodage rapide (CI)
+  %(prog)s video.mp4 --transparent --palette           # PNG8, palette de 256 couleurs partagée
+  %(prog)s video.mp4 --format=both                     # PNG + WebP sans perte, avec comparaison
+  %(prog)s video.mp4 --format=webp --webp-mode=near-lossless
+  %(prog)s video.mp4 --transparent --profile --metrics-json=metrics.json
+  %(prog)s video.mp4 --transparent --background-model=temporal   # Caméra fixe, fond stable
+  %(prog)s video.mp4 --transparent --background-detection=every  # Fond qui change de couleur
+  %(prog)s video.mp4 --assembly=frames                            # Ancien assemblage (comparaison mémoire)
+  %(prog)s video.mp4 --transparent --layout=packed                # Atlas rogné + table des frames JSON
+  %(prog)s idle.mp4 --transparent --dedup                         # Poses tenues stockées une fois
+  %(prog)s idle.mp4 --transparent --dedup=6                       # Quasi-doublons (écart ≤ 6/255)
 
 Fichier de configuration (config.json):
   {
@@ -423,7 +1790,25 @@ Fichier de configuration (config.json):
     "tolerance": 30,
     "fps": 12,
     "start": 0,
-    "end": 1.5
+    "end": 1.5,
+    "png_preset": "smallest",
+    "palette": 256,
+    "format": "both",
+    "webp_mode": "lossless",
+    "background_model": "frame",
+    "background_detection": "first",
+    "layout": "grid",
+    "dedup": 0
+  }
+
+Manifeste de segments (segments.json):
+  {
+    "output_dir": "sprites",
+    "segments": [
+      {"name": "idle", "start": 0, "end": 3, "fps": 8},
+      {"name": "wave", "start": 3, "end": 4.5, "fps": 12, "size": 256},
+      {"name": "nod", "start": 5, "end": 5.8, "tolerance": 40}
+    ]
   }
         """
     )
@@ -447,13 +1832,79 @@ Fichier de configuration (config.json):
                        help='Largeur fixe en pixels pour toutes les frames (force crop/pad si nécessaire)')
     parser.add_argument('--config', '-c', type=str, default=None,
                        help='Fichier de configuration JSON avec les options par défaut')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                       help='Nombre de processus pour traiter les frames en parallèle (0 = tous les cœurs, défaut: 1)')
+    parser.add_argument('--segments', type=str, default=None,
+                       help='Manifeste JSON de segments nommés: une sprite sheet par segment, '
+                            'la vidéo n\'est décodée qu\'une seule fois')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Désactive le cache incrémental (tout est régénéré)')
+    parser.add_argument('--cache-dir', default=None,
+                       help='Dossier du cache (défaut: $MP4_SPRITE_CACHE ou ~/.cache/mp4-to-sprite)')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE_MB,
+                       help=f'Taille max du cache en Mo, éviction LRU au-delà (défaut: {DEFAULT_CACHE_SIZE_MB})')
+    parser.add_argument('--extraction', choices=EXTRACTION_MODES, default='pipe',
+                       help='Extraction des frames: pipe = flux mémoire depuis ffmpeg, '
+                            'disk = fichiers PNG temporaires (défaut: pipe)')
+    parser.add_argument('--seek', choices=['input', 'output'], default='input',
+                       help='Positionnement sur --start: input = saut direct à la keyframe précédente puis '
+                            'découpe exacte, output = décodage depuis le début du fichier (défaut: input)')
+    parser.add_argument('--pix-fmt', choices=['rgb24', 'rgba'], default='rgb24',
+                       help='Format des frames brutes en mode pipe (rgba pour les sources avec alpha, défaut: rgb24)')
+    parser.add_argument('--png-preset', choices=list(PNG_PRESETS), default=DEFAULT_PNG_PRESET,
+                       help='Encodage PNG de la sprite sheet: fast (CI), balanced, smallest (release), '
+                            f'palette (PNG8 256 couleurs, avec perte) (défaut: {DEFAULT_PNG_PRESET})')
+    parser.add_argument('--palette', type=int, nargs='?', const=DEFAULT_PALETTE_COLORS, default=None,
+                       metavar='COULEURS',
+                       help='Quantifie la sprite sheet en PNG8 indexé avec une palette unique partagée par '
+                            f'toutes les frames, alpha compris (sans valeur: {DEFAULT_PALETTE_COLORS} couleurs)')
+    parser.add_argument('--format', choices=SHEET_FORMATS, default=DEFAULT_SHEET_FORMAT,
+                       help='Format de la sprite sheet: png, webp, ou both pour les deux côte à côte '
+                            f'avec un rapport comparatif (défaut: {DEFAULT_SHEET_FORMAT})')
+    parser.add_argument('--webp-mode', choices=list(WEBP_MODES), default=DEFAULT_WEBP_MODE,
+                       help='Encodage WebP: lossless (pixels identiques) ou near-lossless '
+                            f'(écart RGB ≤ 2, alpha intact, plus léger) (défaut: {DEFAULT_WEBP_MODE})')
+    parser.add_argument('--background-model', choices=BACKGROUND_MODELS, default=DEFAULT_BACKGROUND_MODEL,
+                       help='Suppression du fond: frame = analyse complète de chaque frame, temporal = modèle '
+                            'de fond appris sur les premières frames, seuls les pixels qui changent sont '
+                            f'réexaminés (caméra fixe, séquentiel) (défaut: {DEFAULT_BACKGROUND_MODEL})')
+    parser.add_argument('--model-frames', type=int, default=DEFAULT_MODEL_FRAMES,
+                       help='Frames d\'apprentissage du modèle de fond temporel '
+                            f'(défaut: {DEFAULT_MODEL_FRAMES})')
+    parser.add_argument('--background-detection', choices=BACKGROUND_DETECTIONS,
+                       default=DEFAULT_BACKGROUND_DETECTION,
+                       help='Détection de la couleur de fond: first = sur la première frame, every = sur chaque '
+                            f'frame (fond qui change au cours du clip) (défaut: {DEFAULT_BACKGROUND_DETECTION})')
+    parser.add_argument('--assembly', choices=ASSEMBLY_MODES, default=DEFAULT_ASSEMBLY,
+                       help='Assemblage de la sheet: direct = chaque frame traitée est copiée dans la sheet '
+                            'préallouée puis libérée (pic mémoire ≈ une sheet), frames = toutes les frames '
+                            f'gardées en mémoire puis collées (défaut: {DEFAULT_ASSEMBLY})')
+    parser.add_argument('--layout', choices=LAYOUTS, default=DEFAULT_LAYOUT,
+                       help='Disposition de la sheet: grid = grille de cases de taille fixe, packed = frames '
+                            'rognées à leur contenu, dédupliquées et placées au plus serré, avec une table '
+                            f'des frames JSON (position, rognage, durée) (défaut: {DEFAULT_LAYOUT})')
+    parser.add_argument('--dedup', type=int, nargs='?', const=0, default=None, metavar='SEUIL',
+                       help='Déduplication des frames consécutives dès l\'extraction: une pose tenue n\'est '
+                            'traitée et stockée qu\'une fois, sa durée va dans la table des frames JSON. '
+                            'Sans valeur: frames identiques au pixel près ; avec SEUIL (1-255): écart maximal '
+                            'entre vignettes en niveaux de gris (quasi-doublons, bruit d\'encodage)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Affiche un tableau par étape (extraction, détection du fond, suppression du fond, '
+                            'redimensionnement, assemblage, encodage): temps mur, temps CPU et pic RSS')
+    parser.add_argument('--metrics-json', default=None, metavar='FICHIER',
+                       help='Écrit les mêmes mesures, plus les timings par frame, dans un fichier JSON')
     
     # Parse une première fois pour obtenir --config
     temp_args, _ = parser.parse_known_args()
     
     # Charge la configuration si fournie
     if temp_args.config:
-        config = load_config(temp_args.config)
+        try:
+            config = load_config(temp_args.config)
+            validate_config(config, temp_args.config)
+        except SpriteSheetError as e:
+            print(f"❌ Erreur: {e}")
+            sys.exit(1)
         # Remplace les valeurs par défaut du parser par celles de la config
         # (les arguments en ligne de commande auront toujours priorité)
         if 'size' in config:
@@ -474,6 +1925,30 @@ Fichier de configuration (config.json):
             parser.set_defaults(output=config['output'])
         if 'line' in config:
             parser.set_defaults(line=config['line'])
+        if 'jobs' in config:
+            parser.set_defaults(jobs=config['jobs'])
+        if 'extraction' in config:
+            parser.set_defaults(extraction=config['extraction'])
+        if 'png_preset' in config:
+            parser.set_defaults(png_preset=config['png_preset'])
+        if 'palette' in config:
+            parser.set_defaults(palette=config['palette'])
+        if 'format' in config:
+            parser.set_defaults(format=config['format'])
+        if 'webp_mode' in config:
+            parser.set_defaults(webp_mode=config['webp_mode'])
+        if 'background_model' in config:
+            parser.set_defaults(background_model=config['background_model'])
+        if 'model_frames' in config:
+            parser.set_defaults(model_frames=config['model_frames'])
+        if 'background_detection' in config:
+            parser.set_defaults(background_detection=config['background_detection'])
+        if 'assembly' in config:
+            parser.set_defaults(assembly=config['assembly'])
+        if 'layout' in config:
+            parser.set_defaults(layout=config['layout'])
+        if 'dedup' in config:
+            parser.set_defaults(dedup=config['dedup'])
     
     # Parse définitivement (les arguments CLI ont priorité sur la config)
     args = parser.parse_args()
@@ -486,20 +1961,39 @@ Fichier de configuration (config.json):
     # Vérifie les dépendances
     check_dependencies()
     
+    if args.palette is not None and not 2 <= args.palette <= 256:
+        print("❌ Erreur: --palette doit être compris entre 2 et 256 couleurs")
+        sys.exit(1)
+    
+    if args.model_frames < 1:
+        print("❌ Erreur: --model-frames doit être au moins 1")
+        sys.exit(1)
+    if args.dedup is not None and not 0 <= args.dedup <= 255:
+        print("❌ Erreur: --dedup doit être compris entre 0 et 255")
+        sys.exit(1)
+    
+    if args.jobs < 0:
+        print("❌ Erreur: --jobs doit être positif (0 = tous les cœurs)")
+        sys.exit(1)
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    
+    profiler = None
+    if args.profile or args.metrics_json:
+        profiler = StageProfiler()
+    
+    # Mode multi-segments : une seule passe de décodage pour tout le manifeste
+    if args.segments:
+        try:
+            run_segments(args, profiler)
+        except SpriteSheetError as e:
+            print(f"\n❌ {e}")
+            sys.exit(1)
+        return
+    
     # Obtient la durée de la vidéo si --end n'est pas spécifié
     if args.end is None:
-        cmd = [
-            'ffprobe', '-v', 'error',
-            '-show_entries', 'format=duration',
-            '-of', 'default=noprint_wrappers=1:nokey=1',
-            args.input
-        ]
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            args.end = float(result.stdout.strip())
-        except:
-            print("⚠️  Impossible de détecter la durée, utilisation de 10s")
-            args.end = 10
+        args.end = get_video_duration(args.input)
     
     # Valide les paramètres
     if args.start >= args.end:
@@ -515,7 +2009,8 @@ Fichier de configuration (config.json):
     print("🎬 MP4 to Sprite Sheet Converter")
     print("=" * 60)
     print(f"📁 Entrée: {args.input}")
-    print(f"📁 Sortie: {args.output}")
+    print(f"📁 Sortie: "
+          f"{', '.join(str(path) for path in sheet_outputs(args.output, args.format, args.layout, args.dedup).values())}")
     print(f"⏱️  Segment: {args.start}s → {args.end}s")
     print(f"📏 Hauteur: {args.size}px")
     if args.width:
@@ -524,46 +2019,82 @@ Fichier de configuration (config.json):
     print(f"👻 Transparence: {'✅ Activée' if args.transparent else '❌ Désactivée'}")
     if args.transparent:
         print(f"🎯 Tolérance: {args.tolerance}")
+        if args.background_model != DEFAULT_BACKGROUND_MODEL:
+            print(f"🧠 Modèle de fond: {args.background_model} ({args.model_frames} frame(s) d'apprentissage)")
+        if args.background_detection != DEFAULT_BACKGROUND_DETECTION:
+            print(f"🔍 Détection du fond: sur chaque frame")
+    if args.jobs > 1:
+        print(f"⚙️  Processus: {args.jobs}")
+    if args.png_preset != DEFAULT_PNG_PRESET:
+        print(f"🗜️  Encodage PNG: {args.png_preset}")
+    if args.palette:
+        print(f"🎨 Palette partagée: {args.palette} couleurs (PNG8)")
+    if args.format != DEFAULT_SHEET_FORMAT:
+        print(f"🖼️  Format: {args.format} (WebP {args.webp_mode})")
+    if args.layout != DEFAULT_LAYOUT:
+        print(f"📦 Disposition: atlas rogné et dédupliqué (+ table des frames JSON)")
+    if args.dedup is not None:
+        print(f"🔁 Déduplication: {'frames identiques' if not args.dedup else f'seuil {args.dedup}'}")
     print("=" * 60)
     print()
     
-    # Crée un dossier temporaire
-    temp_dir = tempfile.mkdtemp(prefix='mp4-sprite-')
+    cache = None
+    if not args.no_cache:
+        cache = SpriteCache(args.cache_dir, args.cache_size)
     
+    # Extraction + création de la sprite sheet
     try:
-        # Extraction des frames
-        frames = extract_frames(args.input, args.start, args.end, args.fps, temp_dir)
-        
-        # Création de la sprite sheet
-        num_frames, frame_w, frame_h = create_sprite_sheet(
-            frames, 
-            args.output, 
-            args.size, 
-            args.transparent,
-            args.tolerance,
-            args.width
+        num_frames, frame_w, frame_h, _ = build_sprite_sheet(
+            args.input,
+            args.output,
+            target_height=args.size,
+            transparent=args.transparent,
+            tolerance=args.tolerance,
+            fps=args.fps,
+            start_time=args.start,
+            end_time=args.end,
+            target_width=args.width,
+            jobs=args.jobs,
+            extraction=args.extraction,
+            pix_fmt=args.pix_fmt,
+            cache=cache,
+            seek=args.seek,
+            png_preset=args.png_preset,
+            palette=args.palette,
+            sheet_format=args.format,
+            webp_mode=args.webp_mode,
+            profiler=profiler,
+            background_model=args.background_model,
+            model_frames=args.model_frames,
+            background_detection=args.background_detection,
+            assembly=args.assembly,
+            sheet_layout=args.layout,
+            dedup=args.dedup
         )
-        
-        print()
-        print("=" * 60)
-        print("✅ TERMINÉ !")
-        print("=" * 60)
-        print(f"📊 Résumé:")
-        print(f"   • Frames: {num_frames}")
-        print(f"   • Taille frame: {frame_w}x{frame_h}px")
-        print(f"   • Fichier: {args.output}")
-        print()
-        print("💡 Utilisation dans React:")
-        print(f"   const config = {{")
-        print(f"     src: '/assets/{Path(args.output).name}',")
-        print(f"     frames: {num_frames},")
-        print(f"     frameWidth: {frame_w},")
-        print(f"     frameHeight: {frame_h}")
-        print(f"   }};")
-        
-    finally:
-        # Nettoie le dossier temporaire
-        shutil.rmtree(temp_dir)
+    except SpriteSheetError as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
+    
+    print()
+    print("=" * 60)
+    print("✅ TERMINÉ !")
+    print("=" * 60)
+    print(f"📊 Résumé:")
+    print(f"   • Frames: {num_frames}")
+    print(f"   • Taille frame: {frame_w}x{frame_h}px")
+    for path in sheet_outputs(args.output, args.format, args.layout, args.dedup).values():
+        print(f"   • Fichier: {path}")
+    print()
+    print("💡 Utilisation dans React:")
+    print(f"   const config = {{")
+    print_react_src(args.output, args.format, sheet_layout=args.layout, dedup=args.dedup)
+    print(f"     frames: {num_frames},")
+    print(f"     frameWidth: {frame_w},")
+    print(f"     frameHeight: {frame_h}")
+    print(f"   }};")
+    
+    if profiler:
+        report_profile(profiler, args, frames=num_frames, frame_width=frame_w, frame_height=frame_h)
 
 if __name__ == '__main__':
     main()
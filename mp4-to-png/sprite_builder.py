@@ -0,0 +1,235 @@
+"""
+API bibliothèque de mp4-to-sprite : génération de sprite sheets en mémoire
+Pour un service (backend web, worker de longue durée) : pas d'argparse, pas de sys.exit,
+les octets de la sprite sheet et ses métadonnées sont retournés à l'appelant
+
+    from sprite_builder import SpriteSheetBuilder, SpriteSheetError
+
+    builder = SpriteSheetBuilder(size=256, transparent=True, fps=12)
+    data, meta = builder.build(request.body, start=0, end=2)
+    # data : octets PNG (ou WebP) ; meta : frames, frame_width, frame_height, columns, rows...
+
+- Entrée : octets, objet fichier (ouvert en lecture binaire) ou chemin de fichier
+- Sortie : (octets, métadonnées) ; un seul format par appel (png ou webp)
+- Erreurs : ValueError pour des paramètres invalides, SpriteSheetError pour un échec du
+  pipeline (vidéo illisible, erreur ffmpeg, aucune frame)
+
+Les mêmes fonctions que la ligne de commande sont utilisées (extraction en flux mémoire,
+suppression du fond, redimensionnement, assemblage, encodage). Les octets de la vidéo sont
+écrits dans un fichier temporaire : un MP4 n'est pas lisible en flux (index moov souvent en fin
+de fichier) et ffprobe puis ffmpeg doivent tous deux le lire.
+
+Les messages de progression du pipeline sont capturés (redirect_stdout, global au processus) :
+utiliser un builder par processus worker, pas de partage entre threads.
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager, redirect_stdout
+
+from converter_loader import load_converter
+from stage_profiler import StageProfiler
+
+
+converter = load_converter()
+SpriteSheetError = converter.SpriteSheetError
+
+MIME_TYPES = {
+    'png': 'image/png',
+    'webp': 'image/webp',
+}
+
+DEFAULT_OPTIONS = {
+    'size': 128,
+    'width': None,
+    'transparent': False,
+    'tolerance': 30,
+    'fps': 10,
+    'pix_fmt': 'rgb24',
+    'seek': 'input',
+    'jobs': 1,
+    'png_preset': converter.DEFAULT_PNG_PRESET,
+    'palette': None,
+    'format': converter.DEFAULT_SHEET_FORMAT,
+    'webp_mode': converter.DEFAULT_WEBP_MODE,
+    'background_model': converter.DEFAULT_BACKGROUND_MODEL,
+    'model_frames': converter.DEFAULT_MODEL_FRAMES,
+    'background_detection': converter.DEFAULT_BACKGROUND_DETECTION,
+    'layout': converter.DEFAULT_LAYOUT,
+    'dedup': None,
+}
+
+
+def validate_options(options):
+    """Vérifie les options (mêmes règles que la ligne de commande) ; lève ValueError"""
+    unknown = set(options) - set(DEFAULT_OPTIONS)
+    if unknown:
+        raise ValueError(f"Option(s) inconnue(s): {', '.join(sorted(unknown))}")
+    if options['size'] <= 0:
+        raise ValueError("size doit être strictement positif")
+    if options['width'] is not None and options['width'] <= 0:
+        raise ValueError("width doit être strictement positif")
+    if options['fps'] <= 0:
+        raise ValueError("fps doit être strictement positif")
+    if not 0 <= options['tolerance'] <= 255:
+        raise ValueError("tolerance doit être compris entre 0 et 255")
+    if options['jobs'] < 1:
+        raise ValueError("jobs doit être au moins 1")
+    if options['pix_fmt'] not in ('rgb24', 'rgba'):
+        raise ValueError(f"Format de pixels inconnu: {options['pix_fmt']} (disponibles: rgb24, rgba)")
+    if options['seek'] not in ('input', 'output'):
+        raise ValueError(f"Positionnement inconnu: {options['seek']} (disponibles: input, output)")
+    if options['png_preset'] not in converter.PNG_PRESETS:
+        raise ValueError(f"Préréglage PNG inconnu: {options['png_preset']} "
+                         f"(disponibles: {', '.join(converter.PNG_PRESETS)})")
+    if options['palette'] is not None and not 2 <= options['palette'] <= 256:
+        raise ValueError("palette doit être compris entre 2 et 256 couleurs")
+    if options['format'] not in MIME_TYPES:
+        raise ValueError(f"Format inconnu: {options['format']} (disponibles: {', '.join(MIME_TYPES)})")
+    if options['webp_mode'] not in converter.WEBP_MODES:
+        raise ValueError(f"Mode WebP inconnu: {options['webp_mode']} "
+                         f"(disponibles: {', '.join(converter.WEBP_MODES)})")
+    if options['background_model'] not in converter.BACKGROUND_MODELS:
+        raise ValueError(f"Modèle de fond inconnu: {options['background_model']} "
+                         f"(disponibles: {', '.join(converter.BACKGROUND_MODELS)})")
+    if options['model_frames'] < 1:
+        raise ValueError("model_frames doit être au moins 1")
+    if options['background_detection'] not in converter.BACKGROUND_DETECTIONS:
+        raise ValueError(f"Détection du fond inconnue: {options['background_detection']} "
+                         f"(disponibles: {', '.join(converter.BACKGROUND_DETECTIONS)})")
+    if options['layout'] not in converter.LAYOUTS:
+        raise ValueError(f"Disposition inconnue: {options['layout']} "
+                         f"(disponibles: {', '.join(converter.LAYOUTS)})")
+    if options['dedup'] is not None and not 0 <= options['dedup'] <= 255:
+        raise ValueError("dedup doit être compris entre 0 et 255 (ou None)")
+
+
+@contextmanager
+def video_file(video):
+    """
+    Chemin lisible par ffmpeg pour la vidéo : le chemin lui-même, ou un fichier temporaire
+    (supprimé en sortie) contenant les octets ou le contenu de l'objet fichier
+    """
+    if isinstance(video, (str, os.PathLike)):
+        if not os.path.exists(video):
+            raise SpriteSheetError(f"Le fichier '{video}' n'existe pas")
+        yield str(video)
+        return
+
+    with tempfile.NamedTemporaryFile(prefix='mp4-sprite-', suffix='.mp4') as f:
+        if isinstance(video, (bytes, bytearray, memoryview)):
+            f.write(video)
+        elif hasattr(video, 'read'):
+            shutil.copyfileobj(video, f)
+        else:
+            raise TypeError(f"Vidéo attendue en octets, objet fichier ou chemin, pas {type(video).__name__}")
+        if f.tell() == 0:
+            raise SpriteSheetError("Vidéo vide")
+        f.flush()
+        yield f.name
+
+
+class SpriteSheetBuilder:
+    """
+    Génère des sprite sheets en mémoire avec des options fixées à la construction
+    Chaque appel à build() peut redéfinir certaines options (ex. size, fps, format)
+    """
+
+    def __init__(self, verbose=False, **options):
+        """
+        verbose: laisse passer les messages de progression du pipeline sur stdout
+        options: size, width, transparent, tolerance, fps, pix_fmt, seek, jobs, png_preset,
+                 palette, format (png ou webp), webp_mode, background_model, model_frames,
+                 background_detection, layout (grid ou packed), dedup (None, 0 = frames identiques,
+                 ou seuil de quasi-doublons) (voir DEFAULT_OPTIONS)
+        Lève ValueError si une option est invalide, SpriteSheetError si ffmpeg/ffprobe sont absents
+        """
+        self.options = {**DEFAULT_OPTIONS, **options}
+        validate_options(self.options)
+        self.verbose = verbose
+        missing = [tool for tool in ('ffmpeg', 'ffprobe') if shutil.which(tool) is None]
+        if missing:
+            raise SpriteSheetError(f"{' et '.join(missing)} introuvable(s) dans le PATH")
+
+    def build(self, video, start=0, end=None, profile=False, **overrides):
+        """
+        Génère la sprite sheet d'un segment de la vidéo
+
+        Args:
+            video: Octets de la vidéo, objet fichier binaire ou chemin
+            start: Début du segment en secondes
+            end: Fin du segment en secondes (None = durée totale)
+            profile: Ajoute les mesures par étape (StageProfiler) aux métadonnées
+            overrides: Options redéfinies pour cet appel uniquement
+
+        Returns:
+            Tuple (octets, métadonnées) ; métadonnées sérialisables en JSON
+            Avec layout='packed', les métadonnées contiennent unique_frames et frame_map (table des
+            frames : position dans la sheet, rognage et durée de chaque frame) à la place de columns/rows
+            Avec dedup, les métadonnées contiennent durations (ms par frame gardée) et frame_map
+        """
+        options = {**self.options, **overrides}
+        if overrides:
+            validate_options(options)
+        profiler = StageProfiler(enabled=profile)
+        log = io.StringIO()
+        fps = options['fps']
+
+        with video_file(video) as path:
+            with redirect_stdout(sys.stdout if self.verbose else log):
+                if end is None:
+                    end = converter.get_video_duration(path, default=None)
+                    if end is None:
+                        raise SpriteSheetError("Impossible de lire la durée de la vidéo")
+                if start >= end:
+                    raise ValueError("start doit être inférieur à end")
+
+                frames = profiler.iterate('extraction', converter.stream_frames(
+                    path, start, end, fps, options['pix_fmt'], options['seek']
+                ))
+                sprite_sheet, layout, bg_colors, transparent_pixels = converter.render_sprite_sheet(
+                    frames,
+                    options['size'],
+                    options['transparent'],
+                    options['tolerance'],
+                    target_width=options['width'],
+                    jobs=options['jobs'],
+                    profiler=profiler,
+                    background_model=options['background_model'],
+                    model_frames=options['model_frames'],
+                    background_detection=options['background_detection'],
+                    expected_frames=round((end - start) * fps),
+                    sheet_layout=options['layout'],
+                    fps=fps,
+                    dedup=options['dedup']
+                )
+
+        buffer = io.BytesIO()
+        if options['format'] == 'png':
+            colors = options['palette'] or converter.PNG_PRESETS[options['png_preset']]['colors']
+            with profiler.stage('encode_png'):
+                encode_time, size = converter.save_png(sprite_sheet, buffer, options['png_preset'], colors=colors)
+        else:
+            with profiler.stage('encode_webp'):
+                encode_time, size = converter.save_webp(sprite_sheet, buffer, options['webp_mode'])
+
+        meta = {
+            **layout,
+            'width': sprite_sheet.width,
+            'height': sprite_sheet.height,
+            'format': options['format'],
+            'mime_type': MIME_TYPES[options['format']],
+            'bytes': size,
+            'encode_seconds': encode_time,
+            'start': float(start),
+            'end': float(end),
+            'fps': fps,
+            'background_colors': [[int(c) for c in color] for color in bg_colors] if bg_colors else None,
+            'transparent_pixels_per_frame': transparent_pixels,
+        }
+        if profile:
+            meta['metrics'] = profiler.metrics()
+        return buffer.getvalue(), meta
@@ -0,0 +1,180 @@
+"""
+Cache incrémental pour la génération de sprite sheets
+Les entrées sont adressées par le contenu : hash des octets de la vidéo + paramètres effectifs
+
+Deux niveaux d'entrées :
+- sheets/<clé> : sprite sheet(s) finale(s) (PNG et/ou WebP) + métadonnées (hit = ni extraction ni traitement)
+- frames/<clé> : frames décodées (réutilisées si seuls les paramètres de traitement changent),
+  stockées brutes (.npy, aucun ré-encodage sur le chemin critique) ou copiées telles quelles (PNG de --extraction disk)
+
+Éviction LRU bornée en taille : chaque accès met à jour la date de modification de l'entrée
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Module partagé entre les outils du dépôt (hash des fichiers, réexporté pour mp4-to-sprite)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'shared'))
+from file_hashing import hash_file
+
+# À incrémenter quand l'algorithme de génération change (invalide tout le cache)
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_SIZE_MB = 2048
+
+
+def default_cache_dir():
+    """Dossier de cache par défaut (MP4_SPRITE_CACHE ou ~/.cache/mp4-to-sprite)"""
+    if os.environ.get('MP4_SPRITE_CACHE'):
+        return Path(os.environ['MP4_SPRITE_CACHE'])
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'mp4-to-sprite'
+
+
+def load_frame(path):
+    """Frame d'une entrée du cache : image décodée depuis les pixels bruts (.npy), ou chemin du PNG"""
+    if path.suffix == '.npy':
+        return Image.fromarray(np.load(path))
+    return path
+
+
+class CachedFrames:
+    """
+    Frames d'une entrée du cache, chargées une par une à l'itération
+    (la mémoire ne dépend pas du nombre de frames, comme pour le flux ffmpeg)
+    """
+
+    def __init__(self, paths):
+        self.paths = paths
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        return map(load_frame, self.paths)
+
+
+class SpriteCache:
+    """Cache disque des sprite sheets et des frames décodées"""
+
+    def __init__(self, cache_dir=None, max_size_mb=DEFAULT_CACHE_SIZE_MB):
+        self.root = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_size = max_size_mb * 1024 * 1024
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(video_hash, **params):
+        """Clé d'entrée : hash vidéo + paramètres effectifs (ordre indifférent)"""
+        payload = json.dumps(
+            {'version': CACHE_VERSION, 'video': video_hash, 'params': params},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _entry(self, kind, key):
+        return self.root / kind / key
+
+    def _lookup(self, kind, key):
+        """Retourne le dossier de l'entrée et ses métadonnées si elle est complète"""
+        entry = self._entry(kind, key)
+        try:
+            with open(entry / 'meta.json', 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None, None
+        # Accès : l'entrée devient la plus récente pour l'éviction LRU
+        os.utime(entry)
+        return entry, meta
+
+    def _commit(self, kind, key, staging, meta):
+        """Publie atomiquement une entrée préparée dans un dossier temporaire"""
+        with open(staging / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        entry = self._entry(kind, key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.rename(staging, entry)
+        except OSError:
+            # Entrée déjà publiée par un autre processus : on garde la sienne
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _staging_dir(self):
+        return Path(tempfile.mkdtemp(prefix='tmp-', dir=self.root))
+
+    def get_sheet(self, key):
+        """Retourne ({format: chemin}, métadonnées) ou (None, None)"""
+        entry, meta = self._lookup('sheets', key)
+        if entry is None:
+            return None, None
+        return {path.suffix[1:]: path for path in entry.glob('sheet.*')}, meta
+
+    def put_sheet(self, key, sheet_paths, meta):
+        """Enregistre une sprite sheet générée ({format: chemin}, un fichier par format) et ses métadonnées"""
+        staging = self._staging_dir()
+        for sheet_format, sheet_path in sheet_paths.items():
+            shutil.copyfile(sheet_path, staging / f'sheet.{sheet_format}')
+        self._commit('sheets', key, staging, meta)
+
+    def get_frames(self, key):
+        """Retourne les frames en cache dans l'ordre (CachedFrames) ou None"""
+        entry, meta = self._lookup('frames', key)
+        if entry is None:
+            return None
+        return CachedFrames([entry / name for name in meta['frames']])
+
+    def record_frames(self, key, frames):
+        """
+        Générateur transparent : laisse passer les frames tout en les enregistrant
+        L'entrée n'est publiée que si toutes les frames ont été consommées
+        """
+        staging = self._staging_dir()
+        names = []
+        try:
+            for i, frame in enumerate(frames, 1):
+                if isinstance(frame, Image.Image):
+                    # Pixels bruts : une simple copie mémoire -> disque, sans encodage PNG
+                    name = f'frame_{i:04d}.npy'
+                    np.save(staging / name, np.asarray(frame))
+                else:
+                    name = f'frame_{i:04d}.png'
+                    shutil.copyfile(frame, staging / name)
+                names.append(name)
+                yield frame
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self._commit('frames', key, staging, {'frames': names})
+
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de la taille max"""
+        entries = []
+        total = 0
+        for kind in ('sheets', 'frames'):
+            kind_dir = self.root / kind
+            if not kind_dir.is_dir():
+                continue
+            for entry in kind_dir.iterdir():
+                try:
+                    size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+                    entries.append((entry.stat().st_mtime, size, entry))
+                except FileNotFoundError:
+                    # Entrée supprimée entre-temps par un autre processus
+                    continue
+                total += size
+
+        removed = 0
+        for _, size, entry in sorted(entries):
+            if total <= self.max_size:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,173 @@
+"""
+Instrumentation par étape du pipeline mp4-to-sprite (--profile, --metrics-json)
+Mesure pour chaque étape le temps mur, le temps CPU et le pic de mémoire résidente
+
+- Temps CPU : processus courant + sous-processus terminés (ffmpeg, workers du pool)
+- Pic RSS : sous Linux, le compteur VmHWM est remis à zéro au début de chaque étape
+  (/proc/self/clear_refs) pour obtenir le pic propre à l'étape ; ailleurs, c'est le pic
+  cumulé du processus à la fin de l'étape
+- Les étapes exécutées dans un pool de processus (--jobs) sont chronométrées dans les
+  workers puis enregistrées avec record() ; leur pic RSS est celui du processus principal
+"""
+
+import json
+import os
+import resource
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+def cpu_seconds():
+    """Temps CPU utilisateur + système du processus et de ses enfants terminés"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus en Mo (VmHWM sous Linux, ru_maxrss sinon)"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def reset_peak_rss():
+    """Remet le pic RSS (VmHWM) à la mémoire courante ; retourne False si non supporté"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class StageProfiler:
+    """Agrège les mesures par étape et par frame ; désactivé, toutes les méthodes sont neutres"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = {}
+        self.frames = defaultdict(dict)
+        self.peak_rss = 0.0
+        self.per_stage_peak = enabled and reset_peak_rss()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = cpu_seconds()
+
+    def _entry(self, name):
+        return self.stages.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'peak_rss_mb': 0.0})
+
+    def _begin_peak(self):
+        # Le pic courant est conservé dans le pic global avant la remise à zéro
+        self.peak_rss = max(self.peak_rss, peak_rss_mb())
+        if self.per_stage_peak:
+            reset_peak_rss()
+
+    def _end(self, name, wall, cpu, frame=None):
+        entry = self._entry(name)
+        entry['calls'] += 1
+        entry['wall'] += wall
+        entry['cpu'] += cpu
+        peak = peak_rss_mb()
+        entry['peak_rss_mb'] = max(entry['peak_rss_mb'], peak)
+        self.peak_rss = max(self.peak_rss, peak)
+        if frame is not None:
+            self.frames[frame][name] = wall
+
+    @contextmanager
+    def stage(self, name, frame=None):
+        """Mesure le bloc comme une exécution de l'étape `name` (frame : index optionnel)"""
+        if not self.enabled:
+            yield
+            return
+        self._begin_peak()
+        begin_wall = time.perf_counter()
+        begin_cpu = cpu_seconds()
+        try:
+            yield
+        finally:
+            self._end(name, time.perf_counter() - begin_wall, cpu_seconds() - begin_cpu, frame)
+
+    def record(self, name, wall, cpu, frame=None):
+        """Enregistre une mesure prise ailleurs (ex. dans un worker du pool de processus)"""
+        if self.enabled:
+            self._end(name, wall, cpu, frame)
+
+    def iterate(self, name, iterable, per_frame=True):
+        """
+        Parcourt un itérable (ex. flux de frames ffmpeg) en mesurant chaque élément produit
+        comme une exécution de l'étape `name`, indexée par frame si per_frame
+        """
+        if not self.enabled:
+            return iterable
+        return self._iterate(name, iterable, per_frame)
+
+    def _iterate(self, name, iterable, per_frame):
+        iterator = iter(iterable)
+        index = 0
+        try:
+            while True:
+                self._begin_peak()
+                begin_wall = time.perf_counter()
+                begin_cpu = cpu_seconds()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    # Fin du flux (attente de la fin du sous-processus) : comptée sans frame
+                    self._end(name, time.perf_counter() - begin_wall, cpu_seconds() - begin_cpu)
+                    return
+                self._end(name, time.perf_counter() - begin_wall, cpu_seconds() - begin_cpu,
+                          index if per_frame else None)
+                yield item
+                index += 1
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close:
+                close()
+
+    def metrics(self):
+        """Mesures complètes : total, étapes et timings par frame (sérialisables en JSON)"""
+        self.peak_rss = max(self.peak_rss, peak_rss_mb())
+        return {
+            'total': {
+                'wall': time.perf_counter() - self.start_wall,
+                'cpu': cpu_seconds() - self.start_cpu,
+                'peak_rss_mb': self.peak_rss,
+            },
+            'per_stage_peak_rss': self.per_stage_peak,
+            'stages': self.stages,
+            'frames': [{'index': index, **self.frames[index]} for index in sorted(self.frames)],
+        }
+
+    def report(self):
+        """Affiche le tableau par étape (temps mur, CPU, part du temps total, pic RSS)"""
+        metrics = self.metrics()
+        total = metrics['total']
+        print()
+        print("⏱️  Profil par étape:")
+        print(f"   {'étape':<24} | {'appels':>6} | {'mur':>9} | {'CPU':>9} | {'part':>6} | {'pic RSS':>10}")
+        print(f"   {'-' * 24}-+-{'-' * 6}-+-{'-' * 9}-+-{'-' * 9}-+-{'-' * 6}-+-{'-' * 10}")
+        for name, entry in self.stages.items():
+            share = entry['wall'] / total['wall'] * 100 if total['wall'] else 0
+            print(f"   {name:<24} | {entry['calls']:>6} | {entry['wall']:>8.3f}s | {entry['cpu']:>8.3f}s | "
+                  f"{share:>5.1f}% | {entry['peak_rss_mb']:>7.1f} Mo")
+        print(f"   {'-' * 24}-+-{'-' * 6}-+-{'-' * 9}-+-{'-' * 9}-+-{'-' * 6}-+-{'-' * 10}")
+        print(f"   {'total':<24} | {'':>6} | {total['wall']:>8.3f}s | {total['cpu']:>8.3f}s | "
+              f"{100:>5.1f}% | {total['peak_rss_mb']:>7.1f} Mo")
+        if self.stages:
+            hottest = max(self.stages, key=lambda name: self.stages[name]['wall'])
+            print(f"   🔥 Étape la plus coûteuse: {hottest}")
+        if not metrics['per_stage_peak_rss']:
+            print("   (pic RSS cumulé du processus : remise à zéro par étape non supportée sur ce système)")
+
+    def write_json(self, path, **context):
+        """Écrit les mesures dans un fichier JSON, avec le contexte de l'exécution (paramètres...)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({**context, **self.metrics()}, f, indent=2)
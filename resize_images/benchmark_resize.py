@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la réduction des grandes photos
+=============================================
+Compare le décodage complet suivi de LANCZOS (--reducing-gap 0) avec la réduction rapide
+(décodage JPEG à l'échelle + reduce()) pour plusieurs marges : temps de décodage et de
+réduction, pic de mémoire (RSS) et écart de qualité (PSNR) par rapport au résultat exact.
+Chaque configuration tourne dans un processus neuf pour que le pic RSS soit mesuré isolément.
+"""
+
+import argparse
+import math
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageStat
+
+from resize_images import SUPPORTED_EXTENSIONS, downscale
+
+# En dessous de ce PSNR (dB), l'écart avec la réduction exacte est signalé
+QUALITY_TOLERANCE_DB = 40.0
+
+
+def make_photo(path, size, seed=0):
+    """
+    Crée une photo JPEG synthétique : dégradés, formes floues et grain,
+    pour un contenu proche d'une vraie photo (ni aplats purs, ni bruit pur).
+
+    Args:
+        path: Chemin du fichier JPEG à créer
+        size: Tuple (width, height)
+        seed: Graine du générateur aléatoire
+    """
+    rng = random.Random(seed)
+    width, height = size
+    red = Image.linear_gradient('L').resize(size)
+    green = Image.radial_gradient('L').resize(size)
+    blue = Image.linear_gradient('L').rotate(90).resize(size)
+    photo = Image.merge('RGB', (red, green, blue))
+
+    draw = ImageDraw.Draw(photo)
+    for _ in range(80):
+        x, y = rng.randint(0, width), rng.randint(0, height)
+        radius = rng.randint(width // 60, width // 8)
+        color = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color)
+    photo = photo.filter(ImageFilter.GaussianBlur(2))
+
+    grain = Image.effect_noise(size, 12).convert('RGB')
+    photo = Image.blend(photo, grain, 0.08)
+    photo.save(path, quality=90)
+
+
+def downscale_all(paths, target_width, reducing_gap):
+    """
+    Ouvre et réduit chaque image comme resize_images (processus dédié).
+
+    Returns:
+        Tuple (secondes, pic_RSS_en_Mo, liste des images réduites sérialisées)
+    """
+    results = []
+    elapsed = 0.0
+    for path in paths:
+        begin = time.perf_counter()
+        with Image.open(path) as img:
+            width, height = img.size
+            target_size = (target_width, max(1, round(height * target_width / width)))
+            resized = downscale(img, target_size, reducing_gap)
+        elapsed += time.perf_counter() - begin
+        results.append((resized.mode, resized.size, resized.tobytes()))
+
+    return elapsed, peak_rss_mb(), results
+
+
+def peak_rss_mb():
+    """
+    Pic de mémoire résidente du processus en Mo.
+    Sous Linux, VmHWM est lu dans /proc : contrairement à ru_maxrss, il n'hérite pas
+    du pic du processus parent au lancement.
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_isolated(paths, target_width, reducing_gap):
+    """Exécute downscale_all dans un processus neuf (pic RSS propre à la configuration)"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(downscale_all, paths, target_width, reducing_gap).result()
+
+
+def psnr(reference, candidate):
+    """PSNR en dB entre deux images de même taille (inf si identiques)"""
+    diff = ImageChops.difference(reference, candidate)
+    squares = ImageStat.Stat(diff).sum2
+    mse = sum(squares) / (reference.size[0] * reference.size[1] * len(squares))
+    if mse == 0:
+        return math.inf
+    return 10 * math.log10(255 ** 2 / mse)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Mesure le gain de la réduction rapide (draft JPEG + reduce()) sur de grandes photos',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  %(prog)s                              # 3 photos synthétiques 6000x4000 réduites à 800px
+  %(prog)s ./photos/ --width 1200       # Vos propres photos
+  %(prog)s --gaps 0 2 3 4 --count 5
+        """
+    )
+
+    parser.add_argument(
+        'directory',
+        nargs='?',
+        default=None,
+        help='Dossier de photos à utiliser (défaut: photos synthétiques générées)'
+    )
+
+    parser.add_argument(
+        '--width', '-w',
+        type=int,
+        default=800,
+        help='Largeur cible en pixels, hauteur proportionnelle (défaut: 800)'
+    )
+
+    parser.add_argument(
+        '--gaps',
+        type=float,
+        nargs='+',
+        default=[0, 2, 3],
+        help='Valeurs de --reducing-gap comparées, 0 = référence exacte (défaut: 0 2 3)'
+    )
+
+    parser.add_argument(
+        '--count',
+        type=int,
+        default=3,
+        help='Nombre de photos synthétiques (défaut: 3)'
+    )
+
+    parser.add_argument(
+        '--size',
+        default='6000x4000',
+        help='Taille des photos synthétiques (défaut: 6000x4000)'
+    )
+
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("⏱️  Benchmark réduction des grandes photos")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.directory:
+            directory = Path(args.directory)
+            if not directory.is_dir():
+                print(f"❌ Erreur: '{args.directory}' n'est pas un dossier")
+                sys.exit(1)
+            paths = sorted(p for p in directory.iterdir() if p.suffix.lower() in SUPPORTED_EXTENSIONS)
+            if not paths:
+                print(f"❌ Erreur: Aucune image trouvée dans '{args.directory}'")
+                sys.exit(1)
+        else:
+            try:
+                size = tuple(int(v) for v in args.size.lower().split('x'))
+            except ValueError:
+                print(f"❌ Erreur: --size doit être au format LARGEURxHAUTEUR (reçu: {args.size})")
+                sys.exit(1)
+            print(f"🎨 Génération de {args.count} photo(s) {size[0]}x{size[1]}...")
+            paths = []
+            for i in range(args.count):
+                path = Path(temp_dir) / f'photo_{i:02d}.jpg'
+                make_photo(path, size, seed=i)
+                paths.append(path)
+
+        print(f"📊 {len(paths)} image(s) → largeur {args.width}px")
+        print()
+
+        gaps = sorted(set(args.gaps))
+        if gaps[0] != 0:
+            gaps.insert(0, 0)
+        results = {gap: run_isolated(paths, args.width, gap) for gap in gaps}
+
+        reference_time, _, reference_images = results[0]
+        reference = [Image.frombytes(mode, size, data) for mode, size, data in reference_images]
+
+        print(f"   {'marge':>7} | {'temps':>9} | {'gain':>6} | {'pic RSS':>10} | {'PSNR min':>9}")
+        print(f"   {'-' * 7}-+-{'-' * 9}-+-{'-' * 6}-+-{'-' * 10}-+-{'-' * 9}")
+        worst = math.inf
+        for gap in gaps:
+            elapsed, peak, images = results[gap]
+            if gap == 0:
+                label, quality = 'exacte', 'réf.'
+            else:
+                label = f"{gap:g}"
+                scores = [psnr(ref, Image.frombytes(mode, size, data))
+                          for ref, (mode, size, data) in zip(reference, images)]
+                score = min(scores)
+                worst = min(worst, score)
+                quality = '∞' if math.isinf(score) else f"{score:.1f} dB"
+            print(f"   {label:>7} | {elapsed:>8.3f}s | {reference_time / elapsed:>5.1f}x | "
+                  f"{peak:>7.1f} Mo | {quality:>9}")
+
+    print()
+    if worst >= QUALITY_TOLERANCE_DB:
+        print(f"✅ Écart de qualité dans la tolérance (PSNR ≥ {QUALITY_TOLERANCE_DB:g} dB)")
+    else:
+        print(f"⚠️  PSNR minimal {worst:.1f} dB sous la tolérance de {QUALITY_TOLERANCE_DB:g} dB")
+    print()
+
+
+if __name__ == '__main__':
+    main()
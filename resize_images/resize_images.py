@@ -7,15 +7,39 @@ Par défaut, les images sont étirées pour correspondre aux dimensions cibles.
 Avec l'option --padding, les images conservent leur ratio d'aspect avec du padding transparent.
 """
 
+import hashlib
+import io
+import json
 import os
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, tee
 from pathlib import Path
 from PIL import Image
 import argparse
 
+# Modules partagés entre les outils du dépôt (encodage PNG, hash des fichiers)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'shared'))
+from png_encoding import PNG_PRESETS, save_png, format_size
+from file_hashing import hash_file
+
 # Extensions d'images supportées
 SUPPORTED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.tiff', '.tif'}
 
+# Marge gardée avant le filtre LANCZOS final lors des fortes réductions :
+# l'image est d'abord réduite (décodage JPEG à l'échelle, puis reduce()) jusqu'à
+# environ REDUCING_GAP fois la taille cible. 0 ou None = décodage et filtrage complets.
+DEFAULT_REDUCING_GAP = 2.0
+
+# Manifeste du mode incrémental, enregistré dans le dossier de sortie
+MANIFEST_NAME = '.resize_manifest.json'
+MANIFEST_VERSION = 1
+
+# Préréglage d'encodage des sorties PNG (équivalent de l'ancien optimize=True)
+DEFAULT_PNG_PRESET = 'smallest'
+
 
 def get_image_files(directory):
     """
@@ -50,6 +74,60 @@ def get_image_files(directory):
     return sorted(image_files)
 
 
+def iter_image_files(directory, exclude=None):
+    """
+    Parcourt récursivement un dossier et produit les fichiers images dossier par dossier
+    (os.scandir, sans liste complète ni tri global) : le traitement peut commencer avant la fin
+    du parcours et la mémoire ne dépend que du plus gros dossier, pas du nombre total de fichiers.
+    Ordre déterministe : dans chaque dossier, les images par nom (comme get_image_files), puis
+    les sous-dossiers par nom. Les liens symboliques vers des dossiers ne sont pas suivis.
+    
+    Args:
+        directory: Chemin du dossier racine
+        exclude: Dossier à ne pas parcourir (typiquement le dossier de sortie)
+        
+    Returns:
+        Générateur de chemins (Path) des fichiers images
+    """
+    directory_path = Path(directory)
+    
+    if not directory_path.exists():
+        print(f"❌ Erreur: Le dossier '{directory}' n'existe pas")
+        sys.exit(1)
+    
+    if not directory_path.is_dir():
+        print(f"❌ Erreur: '{directory}' n'est pas un dossier")
+        sys.exit(1)
+    
+    excluded = os.path.normpath(exclude) if exclude is not None else None
+    
+    def walk():
+        # Pile des dossiers restant à parcourir : seuls les dossiers sont gardés en mémoire
+        pending_dirs = [str(directory_path)]
+        while pending_dirs:
+            current = pending_dirs.pop()
+            subdirs = []
+            files = []
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if os.path.normpath(entry.path) != excluded:
+                                subdirs.append(entry.path)
+                        elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS:
+                            files.append(entry.path)
+            except PermissionError:
+                print(f"   ⚠️  Dossier ignoré (accès refusé): {current}")
+                continue
+            # os.scandir suit l'ordre du système de fichiers : tri par nom dans chaque dossier
+            for path in sorted(files):
+                yield Path(path)
+            # Ordre alphabétique des sous-dossiers d'un même niveau
+            pending_dirs.extend(sorted(subdirs, reverse=True))
+    
+    return walk()
+
+
 def get_target_size_for_image(image_size, target_width=None, target_height=None, reference_size=None):
     """
     Détermine la taille cible pour le redimensionnement d'une image.
@@ -82,82 +160,267 @@ def get_target_size_for_image(image_size, target_width=None, target_height=None,
             return (original_width, original_height)
 
 
-def resize_image(image_path, target_size, output_path, use_padding=False):
+def read_image_size(image_path):
     """
-    Redimensionne une image aux dimensions cibles.
+    Lit les dimensions d'une image sans la décoder (en-tête uniquement).
     
     Args:
-        image_path: Chemin de l'image source
+        image_path: Chemin de l'image
+        
+    Returns:
+        Tuple (width, height)
+    """
+    with Image.open(image_path) as img:
+        return img.size
+
+
+def padding_warning(image_path, original_size, target_size):
+    """
+    Message d'avertissement si l'image ne rentre pas dans le canvas en mode padding.
+    
+    Returns:
+        Le message, ou None si l'image rentre dans les dimensions cibles
+    """
+    original_width, original_height = original_size
+    target_width, target_height = target_size
+    if original_width > target_width or original_height > target_height:
+        return f"Image {image_path.name} ({original_width}x{original_height}) plus grande que la cible ({target_width}x{target_height}), elle sera rognée"
+    return None
+
+
+def downscale(img, target_size, reducing_gap=DEFAULT_REDUCING_GAP):
+    """
+    Redimensionne une image ouverte avec LANCZOS, en réduisant d'abord rapidement
+    les grandes images si reducing_gap est défini.
+    
+    Args:
+        img: Image PIL ouverte, pas encore décodée pour profiter du décodage JPEG à l'échelle
+        target_size: Tuple (width, height) pour la taille cible
+        reducing_gap: Marge gardée avant LANCZOS (0 ou None = décodage et filtrage complets)
+        
+    Returns:
+        Image redimensionnée
+    """
+    if not reducing_gap:
+        return img.resize(target_size, Image.LANCZOS)
+    
+    target_width, target_height = target_size
+    # JPEG : décodage directement à l'échelle 1/2, 1/4 ou 1/8 si l'image reste
+    # au moins reducing_gap fois plus grande que la cible (sans effet sur les autres formats)
+    img.draft(img.mode, (int(target_width * reducing_gap), int(target_height * reducing_gap)))
+    # reduce() par blocs entiers, puis LANCZOS sur les derniers facteurs
+    return img.resize(target_size, Image.LANCZOS, reducing_gap=reducing_gap)
+
+
+def resize_opened_image(img, image_path, target_size, output_path, use_padding=False, reducing_gap=DEFAULT_REDUCING_GAP,
+                        png_preset=DEFAULT_PNG_PRESET):
+    """
+    Redimensionne une image déjà ouverte et l'enregistre.
+    Lève une exception en cas d'échec.
+    
+    Args:
+        img: Image PIL ouverte (décodée à la demande)
+        image_path: Chemin de l'image source (détermine le format de sortie)
         target_size: Tuple (width, height) pour la taille cible
         output_path: Chemin de l'image de sortie
         use_padding: Si True, conserve le ratio d'aspect avec padding transparent (défaut: False)
+        reducing_gap: Marge de réduction rapide avant LANCZOS (défaut: DEFAULT_REDUCING_GAP, 0 = désactivée)
+        png_preset: Préréglage d'encodage des sorties PNG (fast, balanced, smallest, palette)
         
     Returns:
-        True si succès, False sinon
+        Tuple (secondes, octets) : durée de l'encodage et taille du fichier produit
     """
-    try:
-        img = Image.open(image_path)
-        target_width, target_height = target_size
-        original_width, original_height = img.size
+    target_width, target_height = target_size
+    original_width, original_height = img.size
+    
+    if use_padding:
+        # Mode padding : on garde l'image à sa taille originale et on ajoute du padding transparent
+        # Convertit l'image en RGBA si nécessaire pour gérer la transparence
+        if img.mode == 'P':
+            # Mode palette : convertit en RGBA pour préserver la transparence
+            img = img.convert('RGBA')
+        elif img.mode not in ('RGBA', 'LA'):
+            # Convertit en RGBA pour avoir un fond transparent
+            img = img.convert('RGBA')
+        elif img.mode == 'LA':
+            # Mode LA (Luminance + Alpha) : convertit en RGBA
+            img = img.convert('RGBA')
         
-        if use_padding:
-            # Mode padding : on garde l'image à sa taille originale et on ajoute du padding transparent
-            # Vérifie que l'image originale rentre dans les dimensions cibles
-            if original_width > target_width or original_height > target_height:
-                print(f"   ⚠️  Image {image_path.name} ({original_width}x{original_height}) plus grande que la cible ({target_width}x{target_height}), elle sera rognée")
-            
-            # Convertit l'image en RGBA si nécessaire pour gérer la transparence
-            if img.mode == 'P':
-                # Mode palette : convertit en RGBA pour préserver la transparence
-                img = img.convert('RGBA')
-            elif img.mode not in ('RGBA', 'LA'):
-                # Convertit en RGBA pour avoir un fond transparent
-                img = img.convert('RGBA')
-            elif img.mode == 'LA':
-                # Mode LA (Luminance + Alpha) : convertit en RGBA
-                img = img.convert('RGBA')
-            
-            # Crée un canvas transparent de la taille cible exacte
-            canvas = Image.new('RGBA', (target_width, target_height), (0, 0, 0, 0))
-            
-            # Calcule les offsets pour centrer l'image (padding équilibré)
-            x_offset = (target_width - original_width) // 2
-            y_offset = (target_height - original_height) // 2
-            
-            # Colle l'image originale (sans redimensionnement) au centre du canvas
-            if img.mode == 'RGBA':
-                canvas.paste(img, (x_offset, y_offset), img)
-            else:
-                canvas.paste(img, (x_offset, y_offset))
-            
-            resized_img = canvas
-            
-            # Vérification : le canvas final doit avoir exactement la taille cible
-            assert resized_img.size == (target_width, target_height), \
-                f"Taille du canvas incorrecte: {resized_img.size} au lieu de {(target_width, target_height)}"
+        # Crée un canvas transparent de la taille cible exacte
+        canvas = Image.new('RGBA', (target_width, target_height), (0, 0, 0, 0))
+        
+        # Calcule les offsets pour centrer l'image (padding équilibré)
+        x_offset = (target_width - original_width) // 2
+        y_offset = (target_height - original_height) // 2
+        
+        # Colle l'image originale (sans redimensionnement) au centre du canvas
+        if img.mode == 'RGBA':
+            canvas.paste(img, (x_offset, y_offset), img)
         else:
-            # Redimensionne en étirant (pas de padding)
-            resized_img = img.resize(target_size, Image.LANCZOS)
+            canvas.paste(img, (x_offset, y_offset))
         
-        # Sauvegarde en préservant le format original si possible
-        # Convertit en RGB pour les formats qui ne supportent pas RGBA
-        if resized_img.mode == 'RGBA' and image_path.suffix.lower() in {'.jpg', '.jpeg'}:
-            # JPG ne supporte pas la transparence : on utilise un fond blanc
-            # IMPORTANT: préserver la taille exacte lors de la conversion
-            background = Image.new('RGB', resized_img.size, (255, 255, 255))
-            background.paste(resized_img, mask=resized_img.split()[3] if resized_img.mode == 'RGBA' else None)
-            resized_img = background
+        resized_img = canvas
         
-        # Vérification finale : l'image doit avoir la taille cible
-        if use_padding:
-            assert resized_img.size == (target_width, target_height), \
-                f"Taille finale incorrecte: {resized_img.size} au lieu de {(target_width, target_height)}"
+        # Vérification : le canvas final doit avoir exactement la taille cible
+        assert resized_img.size == (target_width, target_height), \
+            f"Taille du canvas incorrecte: {resized_img.size} au lieu de {(target_width, target_height)}"
+    else:
+        # Redimensionne en étirant (pas de padding)
+        resized_img = downscale(img, target_size, reducing_gap)
+    
+    # Sauvegarde en préservant le format original si possible
+    # Convertit en RGB pour les formats qui ne supportent pas RGBA
+    if resized_img.mode == 'RGBA' and image_path.suffix.lower() in {'.jpg', '.jpeg'}:
+        # JPG ne supporte pas la transparence : on utilise un fond blanc
+        # IMPORTANT: préserver la taille exacte lors de la conversion
+        background = Image.new('RGB', resized_img.size, (255, 255, 255))
+        background.paste(resized_img, mask=resized_img.split()[3] if resized_img.mode == 'RGBA' else None)
+        resized_img = background
+    
+    # Vérification finale : l'image doit avoir la taille cible
+    if use_padding:
+        assert resized_img.size == (target_width, target_height), \
+            f"Taille finale incorrecte: {resized_img.size} au lieu de {(target_width, target_height)}"
+    
+    if Path(output_path).suffix.lower() == '.png':
+        return save_png(resized_img, output_path, png_preset)
+    
+    begin = time.perf_counter()
+    resized_img.save(output_path, quality=95, optimize=True)
+    return time.perf_counter() - begin, os.path.getsize(output_path)
+
+
+def process_image(task):
+    """
+    Traite une image de bout en bout avec une seule ouverture du fichier :
+    lecture de l'en-tête, calcul de la taille cible, décodage, redimensionnement et encodage.
+    Exécutée dans les processus du pool : rien n'est affiché, tout est retourné.
+    
+    Args:
+        task: Tuple (image_path, output_path, target_width, target_height, reference_size, use_padding,
+              reducing_gap, png_preset, with_signature)
+              with_signature : lit aussi la signature de la source (mtime, taille, SHA-256) pour le manifeste
         
-        resized_img.save(output_path, quality=95, optimize=True)
-        return True
+    Returns:
+        Dictionnaire {original_size, target_size, warning, error, signature, encode_time, bytes}
+    """
+    (image_path, output_path, target_width, target_height, reference_size, use_padding,
+     reducing_gap, png_preset, with_signature) = task
+    result = {'original_size': None, 'target_size': None, 'warning': None, 'error': None, 'signature': None,
+              'encode_time': 0.0, 'bytes': 0}
+    try:
+        # Mode récursif : l'arborescence source est reproduite dans le dossier de sortie
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        source = image_path
+        if with_signature:
+            # Une seule lecture du fichier : les octets servent au hash puis au décodage
+            stat = image_path.stat()
+            data = image_path.read_bytes()
+            result['signature'] = {
+                'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size,
+                'sha256': hashlib.sha256(data).hexdigest()
+            }
+            source = io.BytesIO(data)
+        with Image.open(source) as img:
+            result['original_size'] = img.size
+            target_size = get_target_size_for_image(img.size, target_width, target_height, reference_size)
+            result['target_size'] = target_size
+            if use_padding:
+                result['warning'] = padding_warning(image_path, img.size, target_size)
+            result['encode_time'], result['bytes'] = resize_opened_image(
+                img, image_path, target_size, output_path, use_padding, reducing_gap, png_preset
+            )
     except Exception as e:
-        print(f"   ❌ Erreur lors du traitement de {image_path.name}: {e}")
-        return False
+        result['error'] = str(e)
+    return result
+
+
+def map_ordered(func, tasks, jobs=1):
+    """
+    Applique func à chaque tâche en conservant l'ordre des résultats
+    jobs > 1 : répartit le travail sur un pool de processus, avec un nombre borné
+    de tâches en cours pour ne pas consommer tout l'itérable d'avance
+    Les tâches None (rien à faire) donnent un résultat None sans passer par le pool
+    """
+    if jobs <= 1:
+        for task in tasks:
+            yield None if task is None else func(task)
+        return
+    
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(None if task is None else executor.submit(func, task))
+            if len(pending) >= jobs * 2:
+                future = pending.popleft()
+                yield None if future is None else future.result()
+        while pending:
+            future = pending.popleft()
+            yield None if future is None else future.result()
+
+
+def load_manifest(output_dir):
+    """
+    Charge le manifeste du mode incrémental.
+    
+    Args:
+        output_dir: Dossier de sortie contenant le manifeste
+        
+    Returns:
+        Dictionnaire {chemin relatif de la source: entrée}, vide si absent, illisible ou d'une autre version
+    """
+    try:
+        with open(Path(output_dir) / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('files', {})
+
+
+def save_manifest(output_dir, entries):
+    """
+    Enregistre atomiquement le manifeste du mode incrémental.
+    
+    Args:
+        output_dir: Dossier de sortie
+        entries: Dictionnaire {chemin relatif de la source: entrée}
+    """
+    manifest_path = Path(output_dir) / MANIFEST_NAME
+    temp_path = manifest_path.with_suffix('.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'files': entries}, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+
+def check_up_to_date(entry, image_path, output_path, params):
+    """
+    Vérifie si la sortie d'une image enregistrée dans le manifeste est à jour.
+    La source est considérée inchangée si sa date de modification et sa taille sont identiques ;
+    sinon (copie, checkout git...) son contenu est comparé au hash enregistré.
+    
+    Args:
+        entry: Entrée du manifeste pour cette image (ou None)
+        image_path: Chemin de l'image source
+        output_path: Chemin de l'image de sortie
+        params: Paramètres effectifs du redimensionnement
+        
+    Returns:
+        L'entrée (signature mise à jour si besoin) si la sortie est à jour, None sinon
+    """
+    if entry is None or entry.get('params') != params or not output_path.exists():
+        return None
+    
+    stat = image_path.stat()
+    signature = entry['signature']
+    if stat.st_mtime_ns == signature['mtime_ns'] and stat.st_size == signature['size']:
+        return entry
+    if stat.st_size == signature['size'] and hash_file(image_path) == signature['sha256']:
+        # Contenu identique, seule la date a changé
+        return dict(entry, signature=dict(signature, mtime_ns=stat.st_mtime_ns))
+    return None
 
 
 def ask_confirmation(directory, num_images, target_info):
@@ -166,7 +429,7 @@ def ask_confirmation(directory, num_images, target_info):
     
     Args:
         directory: Chemin du dossier
-        num_images: Nombre d'images à traiter
+        num_images: Nombre d'images à traiter (None si inconnu : parcours récursif en flux)
         target_info: Information sur la taille cible
         
     Returns:
@@ -176,7 +439,10 @@ def ask_confirmation(directory, num_images, target_info):
     print("🖼️  Redimensionnement d'images")
     print("=" * 60)
     print(f"📁 Dossier source: {directory}")
-    print(f"📊 Nombre d'images: {num_images}")
+    if num_images is None:
+        print("📊 Nombre d'images: parcours récursif, compté pendant le traitement")
+    else:
+        print(f"📊 Nombre d'images: {num_images}")
     print(f"📐 {target_info}")
     print("=" * 60)
     print()
@@ -185,9 +451,13 @@ def ask_confirmation(directory, num_images, target_info):
     return response in ['o', 'oui', 'y', 'yes']
 
 
-def resize_images(directory, output_subdir='resized', target_width=None, target_height=None, confirm=True, use_padding=False):
+def resize_images(directory, output_subdir='resized', target_width=None, target_height=None, confirm=True, use_padding=False, jobs=1,
+                  reducing_gap=DEFAULT_REDUCING_GAP, incremental=False, recursive=False,
+                  png_preset=DEFAULT_PNG_PRESET):
     """
     Redimensionne toutes les images d'un dossier.
+    Chaque fichier n'est ouvert qu'une fois ; avec jobs > 1 le décodage, le redimensionnement
+    et l'encodage sont répartis sur un pool de processus (affichage dans l'ordre des fichiers).
     
     Args:
         directory: Chemin du dossier contenant les images
@@ -196,17 +466,38 @@ def resize_images(directory, output_subdir='resized', target_width=None, target_
         target_height: Hauteur cible (optionnel)
         confirm: Demander confirmation avant de traiter (défaut: True)
         use_padding: Utiliser le padding transparent au lieu d'étirer (défaut: False)
+        jobs: Nombre de processus de traitement (défaut: 1, séquentiel)
+        reducing_gap: Marge de réduction rapide avant LANCZOS (défaut: DEFAULT_REDUCING_GAP, 0 = désactivée)
+        incremental: Ne retraite que les images nouvelles ou modifiées, d'après le manifeste du dossier
+                     de sortie, et supprime les sorties dont la source a disparu (défaut: False)
+        recursive: Parcourt aussi les sous-dossiers, en flux, et reproduit l'arborescence dans
+                   le dossier de sortie (défaut: False)
+        png_preset: Préréglage d'encodage des sorties PNG (défaut: DEFAULT_PNG_PRESET)
     """
+    directory_path = Path(directory)
+    output_dir = directory_path / output_subdir
+    
     # Récupère les fichiers images
-    image_files = get_image_files(directory)
+    if recursive:
+        # Parcours en flux : le nombre total d'images n'est pas connu à l'avance
+        image_files = iter_image_files(directory, exclude=output_dir)
+        first_image = next(image_files, None)
+        if first_image is None:
+            print(f"⚠️  Aucune image trouvée dans '{directory}' ni dans ses sous-dossiers")
+            print(f"   Extensions supportées: {', '.join(SUPPORTED_EXTENSIONS)}")
+            sys.exit(1)
+        image_files = chain([first_image], image_files)
+        total = None
+    else:
+        image_files = get_image_files(directory)
+        first_image = image_files[0]
+        total = len(image_files)
     
     # Obtient la taille de référence (première image) si aucune dimension n'est spécifiée
     reference_size = None
     mode_text = "avec padding transparent" if use_padding else "étirement"
     if target_width is None and target_height is None:
-        first_image = Image.open(image_files[0])
-        reference_size = first_image.size
-        first_image.close()
+        reference_size = read_image_size(first_image)
         target_info = f"Taille cible: {reference_size[0]}x{reference_size[1]}px (basée sur la première image, mode: {mode_text})"
     elif target_width is not None and target_height is not None:
         target_info = f"Taille cible: {target_width}x{target_height}px (dimensions spécifiées, mode: {mode_text})"
@@ -215,16 +506,9 @@ def resize_images(directory, output_subdir='resized', target_width=None, target_
     else:
         target_info = f"Hauteur cible: {target_height}px (largeur originale conservée pour chaque image, mode: {mode_text})"
     
-    # Obtient la taille de référence (première image) si aucune dimension n'est spécifiée
-    reference_size = None
-    if target_width is None and target_height is None:
-        first_image = Image.open(image_files[0])
-        reference_size = first_image.size
-        first_image.close()
-    
     # Demande confirmation
     if confirm:
-        if not ask_confirmation(directory, len(image_files), target_info):
+        if not ask_confirmation(directory, total, target_info):
             print("❌ Opération annulée par l'utilisateur")
             return
         print()
@@ -234,45 +518,113 @@ def resize_images(directory, output_subdir='resized', target_width=None, target_
     print("🖼️  Traitement en cours...")
     print("=" * 60)
     print(f"📁 Dossier source: {directory}")
-    print(f"📊 {len(image_files)} image(s) à traiter")
+    if total is None:
+        print("📊 Parcours récursif des sous-dossiers (traitement pendant le parcours)")
+    else:
+        print(f"📊 {total} image(s) à traiter")
     print(f"📐 {target_info}")
+    if jobs > 1:
+        print(f"⚙️  Processus: {jobs}")
     
     # Crée le dossier de sortie
-    directory_path = Path(directory)
-    output_dir = directory_path / output_subdir
     output_dir.mkdir(exist_ok=True)
     print(f"📂 Dossier de sortie: {output_dir}")
     print()
     
+    # Manifeste du mode incrémental : paramètres effectifs communs à toutes les images
+    manifest = load_manifest(output_dir) if incremental else None
+    new_manifest = {}
+    params = {
+        'width': target_width,
+        'height': target_height,
+        'reference_size': list(reference_size) if reference_size else None,
+        'padding': use_padding,
+        'reducing_gap': reducing_gap,
+        'png_preset': png_preset
+    }
+    
+    def plan():
+        """Associe à chaque image sa tâche de traitement, ou None si sa sortie est à jour"""
+        for image_path in image_files:
+            relative_path = image_path.relative_to(directory_path)
+            key = relative_path.as_posix()
+            output_path = output_dir / relative_path
+            entry = None
+            if incremental:
+                entry = check_up_to_date(manifest.get(key), image_path, output_path, params)
+            task = None
+            if entry is None:
+                task = (image_path, output_path, target_width, target_height, reference_size, use_padding,
+                        reducing_gap, png_preset, incremental)
+            yield image_path, key, output_path, entry, task
+    
+    # Le plan est lu deux fois : par le pool (tâches) et par l'affichage (ordre des fichiers)
+    plan_for_pool, plan_for_display = tee(plan())
+    results = map_ordered(process_image, (item[4] for item in plan_for_pool), jobs)
+    
     # Traite chaque image
     success_count = 0
     failed_count = 0
+    skipped_count = 0
+    encode_time = 0.0
+    encoded_bytes = 0
     
-    for i, image_path in enumerate(image_files, 1):
-        print(f"   [{i}/{len(image_files)}] {image_path.name}...", end=' ')
-        
-        # Obtient les dimensions originales
-        original_img = Image.open(image_path)
-        original_size = original_img.size
-        original_img.close()
-        
-        # Calcule la taille cible pour cette image spécifique
-        target_size = get_target_size_for_image(
-            original_size,
-            target_width,
-            target_height,
-            reference_size
-        )
-        
-        # Chemin de sortie
-        output_path = output_dir / image_path.name
-        
-        # Redimensionne
-        if resize_image(image_path, target_size, output_path, use_padding=use_padding):
-            print(f"✅ {original_size[0]}x{original_size[1]} → {target_size[0]}x{target_size[1]}")
-            success_count += 1
-        else:
-            failed_count += 1
+    try:
+        for i, ((image_path, key, output_path, entry, _), result) in enumerate(zip(plan_for_display, results), 1):
+            progress = f"{i}" if total is None else f"{i}/{total}"
+            print(f"   [{progress}] {key}...", end=' ')
+            
+            if result is None:
+                # Sortie à jour d'après le manifeste
+                original_size = entry['original_size']
+                target_size = entry['target_size']
+                print(f"⏭️  inchangée ({original_size[0]}x{original_size[1]} → {target_size[0]}x{target_size[1]})")
+                new_manifest[key] = entry
+                skipped_count += 1
+                continue
+            
+            if result['warning']:
+                print(f"   ⚠️  {result['warning']}")
+            
+            if result['error'] is None:
+                original_size = result['original_size']
+                target_size = result['target_size']
+                print(f"✅ {original_size[0]}x{original_size[1]} → {target_size[0]}x{target_size[1]}")
+                success_count += 1
+                encode_time += result['encode_time']
+                encoded_bytes += result['bytes']
+                if incremental:
+                    new_manifest[key] = {
+                        'output': output_path.relative_to(output_dir).as_posix(),
+                        'signature': result['signature'],
+                        'params': params,
+                        'original_size': list(original_size),
+                        'target_size': list(target_size)
+                    }
+            else:
+                print(f"   ❌ Erreur lors du traitement de {key}: {result['error']}")
+                failed_count += 1
+    finally:
+        if incremental:
+            # Sources supprimées : leurs sorties sont retirées du dossier de sortie
+            pruned_count = 0
+            for key, entry in manifest.items():
+                if key in new_manifest:
+                    continue
+                if (directory_path / key).exists():
+                    # Image non atteinte (interruption) : l'entrée sera revérifiée au prochain lancement
+                    new_manifest[key] = entry
+                    continue
+                stale_output = output_dir / entry['output']
+                if stale_output.exists():
+                    stale_output.unlink()
+                    pruned_count += 1
+                    # Supprime les sous-dossiers de sortie devenus vides
+                    parent = stale_output.parent
+                    while parent != output_dir and not any(parent.iterdir()):
+                        parent.rmdir()
+                        parent = parent.parent
+            save_manifest(output_dir, new_manifest)
     
     print()
     print("=" * 60)
@@ -280,6 +632,12 @@ def resize_images(directory, output_subdir='resized', target_width=None, target_
     print("=" * 60)
     print(f"📊 Résumé:")
     print(f"   • Images traitées: {success_count}")
+    if success_count > 0:
+        print(f"   • Encodage des sorties: {encode_time:.2f}s, {format_size(encoded_bytes)} (préréglage PNG: {png_preset})")
+    if incremental:
+        print(f"   • Images inchangées (ignorées): {skipped_count}")
+        if pruned_count > 0:
+            print(f"   • Sorties supprimées (source disparue): {pruned_count}")
     if failed_count > 0:
         print(f"   • Échecs: {failed_count}")
     print(f"   • Dossier de sortie: {output_dir}")
@@ -301,6 +659,12 @@ Exemples:
   %(prog)s ./images/ -w 800 -h 600 --padding  # 800x600px avec padding transparent
   %(prog)s ./images/ -o resized_images        # Dossier de sortie personnalisé
   %(prog)s ./images/ --no-confirm             # Pas de confirmation
+  %(prog)s ./images/ --jobs 8                 # 8 processus en parallèle
+  %(prog)s ./images/ --jobs 0                 # Un processus par cœur
+  %(prog)s ./photos/ -w 800 --reducing-gap 0  # Décodage complet (réduction exacte, plus lente)
+  %(prog)s ./images/ -w 800 --incremental     # Ne retraite que les images nouvelles ou modifiées
+  %(prog)s ./assets/ -w 512 --recursive       # Inclut les sous-dossiers (arborescence reproduite)
+  %(prog)s ./images/ -w 800 --png-preset fast # Encodage PNG rapide (CI)
         """
     )
     
@@ -343,6 +707,42 @@ Exemples:
         help='Conserve le ratio d\'aspect avec padding transparent au lieu d\'étirer les images'
     )
     
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=1,
+        help='Nombre de processus de traitement (défaut: 1 = séquentiel, 0 = tous les cœurs)'
+    )
+    
+    parser.add_argument(
+        '--reducing-gap',
+        type=float,
+        default=DEFAULT_REDUCING_GAP,
+        help=f'Réduction rapide des grandes images (décodage JPEG à l\'échelle + reduce()) jusqu\'à N fois '
+             f'la taille cible avant LANCZOS (défaut: {DEFAULT_REDUCING_GAP:g}, 0 = désactivée)'
+    )
+    
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help=f'Ne retraite que les images nouvelles ou modifiées (manifeste {MANIFEST_NAME} dans le dossier de sortie) '
+             f'et supprime les sorties dont la source a disparu'
+    )
+    
+    parser.add_argument(
+        '--recursive', '-r',
+        action='store_true',
+        help='Parcourt aussi les sous-dossiers (en flux) et reproduit l\'arborescence dans le dossier de sortie'
+    )
+    
+    parser.add_argument(
+        '--png-preset',
+        choices=list(PNG_PRESETS),
+        default=DEFAULT_PNG_PRESET,
+        help=f'Encodage des sorties PNG: fast (CI), balanced, smallest (release), '
+             f'palette (PNG8 256 couleurs, avec perte) (défaut: {DEFAULT_PNG_PRESET})'
+    )
+    
     args = parser.parse_args()
     
     # Valide les arguments
@@ -354,6 +754,16 @@ Exemples:
         print("❌ Erreur: --height doit être un nombre positif")
         sys.exit(1)
     
+    if args.reducing_gap != 0 and args.reducing_gap < 1:
+        print("❌ Erreur: --reducing-gap doit être 0 (désactivé) ou supérieur ou égal à 1")
+        sys.exit(1)
+    
+    if args.jobs < 0:
+        print("❌ Erreur: --jobs doit être positif (0 = tous les cœurs)")
+        sys.exit(1)
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    
     # Convertit le chemin en chemin absolu
     directory = os.path.abspath(args.directory)
     
@@ -365,7 +775,12 @@ Exemples:
             args.width,
             args.height,
             confirm=not args.no_confirm,
-            use_padding=args.padding
+            use_padding=args.padding,
+            jobs=args.jobs,
+            reducing_gap=args.reducing_gap,
+            incremental=args.incremental,
+            recursive=args.recursive,
+            png_preset=args.png_preset
         )
     except KeyboardInterrupt:
         print("\n\n⚠️  Interrompu par l'utilisateur")
@@ -0,0 +1,17 @@
+"""
+Hash du contenu des fichiers, partagé par les outils (mp4-to-png, resize_images)
+==============================================================================
+Sert de clé aux caches incrémentaux : une entrée est invalidée dès que les octets du fichier
+source changent, quelles que soient sa date de modification ou son nom.
+"""
+
+import hashlib
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """Hash SHA-256 du contenu d'un fichier, lu par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
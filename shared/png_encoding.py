@@ -0,0 +1,123 @@
+"""
+Encodage PNG partagé par les outils (mp4-to-png, sprite_cutter, resize_images)
+=============================================================================
+Préréglages permettant d'arbitrer entre temps d'encodage et taille de fichier :
+
+- fast     : zlib niveau 1, stratégie RLE (adaptée aux lignes filtrées des sprites) — builds CI
+- balanced : zlib niveau 6, stratégie Z_FILTERED (réglages par défaut de Pillow)
+- smallest : optimize=True (zlib niveau 9, effort maximal) — builds de release
+- palette  : quantification en palette de 256 couleurs avec alpha (PNG8, avec perte) + smallest
+
+Chaque encodage retourne sa durée et la taille produite pour pouvoir les afficher.
+"""
+
+import os
+import time
+import zlib
+
+from PIL import Image
+
+PNG_PRESETS = {
+    'fast': {
+        'compress_level': 1,
+        'compress_type': zlib.Z_RLE,
+        'optimize': False,
+        'colors': None,
+    },
+    'balanced': {
+        'compress_level': 6,
+        'compress_type': zlib.Z_FILTERED,
+        'optimize': False,
+        'colors': None,
+    },
+    'smallest': {
+        'compress_level': 9,
+        'compress_type': zlib.Z_FILTERED,
+        'optimize': True,
+        'colors': None,
+    },
+    'palette': {
+        'compress_level': 9,
+        'compress_type': zlib.Z_FILTERED,
+        'optimize': True,
+        'colors': 256,
+    },
+}
+
+DEFAULT_PRESET = 'balanced'
+
+
+def quantize(img, colors=256):
+    """
+    Réduit une image à une palette de couleurs (mode P), transparence comprise.
+    Les images RGBA gardent une palette RGBA : les PNG8 produits conservent l'alpha.
+    La palette est calculée sur l'image entière : pour une sprite sheet, toutes les frames
+    partagent la même palette et une même couleur garde le même index d'une frame à l'autre
+    (pas de scintillement). Les pixels entièrement transparents sont ramenés à (0, 0, 0, 0)
+    pour n'occuper qu'une seule entrée de la palette.
+
+    Args:
+        img: Image PIL
+        colors: Nombre maximal de couleurs de la palette (2 à 256)
+
+    Returns:
+        Image PIL en mode P
+    """
+    if img.mode == 'P':
+        return img
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+    if img.mode == 'RGBA':
+        transparent = img.getchannel('A').point(lambda a: 255 if a == 0 else 0)
+        if transparent.getbbox():
+            img = img.copy()
+            img.paste((0, 0, 0, 0), mask=transparent)
+    # FASTOCTREE est la seule méthode de Pillow qui gère le canal alpha
+    return img.quantize(colors, method=Image.Quantize.FASTOCTREE)
+
+
+def save_png(img, output, preset=DEFAULT_PRESET, colors=None):
+    """
+    Encode une image en PNG avec un préréglage.
+
+    Args:
+        img: Image PIL
+        output: Chemin du fichier ou objet fichier (ouvert en écriture binaire)
+        preset: Nom du préréglage (voir PNG_PRESETS)
+        colors: Taille de la palette PNG8 (None = celle du préréglage, 0 = pas de quantification)
+
+    Returns:
+        Tuple (secondes, octets) : durée de l'encodage (quantification comprise) et taille produite
+    """
+    if preset not in PNG_PRESETS:
+        raise ValueError(f"Préréglage PNG inconnu: {preset} (disponibles: {', '.join(PNG_PRESETS)})")
+    options = PNG_PRESETS[preset]
+
+    if colors is None:
+        colors = options['colors']
+
+    begin = time.perf_counter()
+    if colors:
+        img = quantize(img, colors)
+    start_offset = None if isinstance(output, (str, os.PathLike)) else output.tell()
+    img.save(
+        output,
+        'PNG',
+        optimize=options['optimize'],
+        compress_level=options['compress_level'],
+        compress_type=options['compress_type']
+    )
+    elapsed = time.perf_counter() - begin
+
+    if start_offset is None:
+        size = os.path.getsize(output)
+    else:
+        size = output.tell() - start_offset
+    return elapsed, size
+
+
+def format_size(size):
+    """Taille lisible en Ko / Mo"""
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} Mo"
+    return f"{size / 1024:.1f} Ko"
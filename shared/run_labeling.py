@@ -0,0 +1,100 @@
+"""
+Étiquetage de composantes connexes par runs, partagé par les outils (mp4-to-png, sprite_cutter)
+==============================================================================================
+Un masque booléen est décrit par ses segments horizontaux (runs) plutôt que pixel par pixel :
+
+- label_runs          : composantes connexes (4- ou 8-connexité) par union-find vectorisé sur les runs
+- runs_to_mask        : masque booléen reconstruit à partir d'une liste de runs
+- edge_connected_mask : zones du masque qui touchent un bord de l'image (flood fill depuis les bords)
+
+Utilisé pour la suppression de fond : seules les zones de la couleur du fond reliées aux bords
+deviennent transparentes, les pixels de même couleur à l'intérieur du sujet sont conservés.
+"""
+
+import numpy as np
+
+
+def label_runs(mask, connectivity=4):
+    """
+    Étiquette les composantes connexes d'un masque booléen par segments horizontaux (runs)
+    Les runs de deux lignes consécutives qui se chevauchent sont fusionnés par union-find
+    vectorisé (accrochage au plus petit label + compression de chemins)
+    Retourne (lignes, débuts, fins, labels) : un run couvre [début, fin) sur sa ligne
+    """
+    height, width = mask.shape
+    
+    # Détecte les débuts/fins de runs ligne par ligne (fin exclusive)
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    
+    num_runs = len(rows)
+    labels = np.arange(num_runs)
+    if num_runs == 0:
+        return rows, starts, ends, labels
+    
+    # Clés globales triées (ligne, colonne) pour trouver les runs voisins de la ligne suivante
+    stride = width + 2
+    start_keys = rows * stride + starts
+    end_keys = rows * stride + ends
+    
+    # 4-connexité : chevauchement strict ; 8-connexité : les diagonales comptent aussi
+    reach = 0 if connectivity == 4 else 1
+    next_row = (rows + 1) * stride
+    first = np.searchsorted(end_keys, next_row + starts - reach, side='right')
+    last = np.searchsorted(start_keys, next_row + ends + reach, side='left')
+    counts = np.maximum(last - first, 0)
+    
+    # Paires de runs adjacents (a sur la ligne y, b sur la ligne y+1)
+    a = np.repeat(np.arange(num_runs), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    b = np.repeat(first, counts) + offsets
+    
+    # Union-find vectorisé
+    while len(a):
+        la = labels[a]
+        lb = labels[b]
+        differ = la != lb
+        if not differ.any():
+            break
+        a, b = a[differ], b[differ]
+        la, lb = la[differ], lb[differ]
+        np.minimum.at(labels, np.maximum(la, lb), np.minimum(la, lb))
+        # Compression : chaque run pointe directement sur sa racine
+        while True:
+            compressed = labels[labels]
+            if np.array_equal(compressed, labels):
+                break
+            labels = compressed
+    
+    return rows, starts, ends, labels
+
+
+def runs_to_mask(shape, rows, starts, ends):
+    """Reconstruit un masque booléen à partir d'une liste de runs"""
+    height, width = shape
+    delta = np.zeros(height * (width + 1) + 1, dtype=np.int8)
+    delta[rows * (width + 1) + starts] += 1
+    delta[rows * (width + 1) + ends] -= 1
+    filled = np.cumsum(delta[:-1], dtype=np.int8).reshape(height, width + 1)
+    return filled[:, :width].astype(bool)
+
+
+def edge_connected_mask(match, connectivity=4):
+    """
+    Ne garde que les zones du masque connectées aux bords de l'image
+    (équivalent d'un flood fill lancé depuis tous les pixels de bord)
+    connectivity: 4 ou 8 (8 = les diagonales relient aussi les pixels)
+    """
+    height, width = match.shape
+    rows, starts, ends, labels = label_runs(match, connectivity)
+    
+    # Un run touche un bord s'il est sur la première/dernière ligne ou la première/dernière colonne
+    on_edge = (rows == 0) | (rows == height - 1) | (starts == 0) | (ends == width)
+    edge_labels = np.zeros(len(labels), dtype=bool)
+    edge_labels[labels[on_edge]] = True
+    keep = edge_labels[labels]
+    
+    return runs_to_mask(match.shape, rows[keep], starts[keep], ends[keep])
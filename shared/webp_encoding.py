@@ -0,0 +1,98 @@
+"""
+Encodage WebP partagé par les outils (encodeur intégré à Pillow)
+================================================================
+Modes proposés :
+
+- lossless      : WebP sans perte, pixels identiques au PNG
+- near-lossless : composantes RGB arrondies au multiple de 4 le plus proche (écart max ±2,
+                  canal alpha intact) puis encodage sans perte, pour des fichiers plus légers
+
+L'encodeur de Pillow n'expose pas l'option near_lossless de libwebp : le mode near-lossless
+applique donc lui-même une quantification bornée avant l'encodage sans perte.
+"""
+
+import os
+import time
+
+from PIL import Image
+
+WEBP_MODES = {
+    'lossless': {
+        'step': 1,
+    },
+    'near-lossless': {
+        'step': 4,
+    },
+}
+
+DEFAULT_WEBP_MODE = 'lossless'
+
+# Effort de compression en mode sans perte (0-100) et méthode d'encodage (0 = rapide, 6 = plus compact)
+WEBP_EFFORT = 100
+WEBP_METHOD = 4
+
+
+def round_colors(img, step):
+    """
+    Arrondit les composantes RGB au multiple de `step` le plus proche (alpha inchangé).
+
+    Args:
+        img: Image PIL RGB ou RGBA
+        step: Pas de quantification (1 = aucune modification)
+
+    Returns:
+        Image PIL du même mode
+    """
+    if step <= 1:
+        return img
+    lut = [min(255, round(value / step) * step) for value in range(256)]
+    identity = list(range(256))
+    if img.mode == 'RGBA':
+        return img.point(lut * 3 + identity)
+    return img.point(lut * 3)
+
+
+def save_webp(img, output, mode=DEFAULT_WEBP_MODE):
+    """
+    Encode une image en WebP (sans perte ou quasi sans perte).
+
+    Args:
+        img: Image PIL
+        output: Chemin du fichier ou objet fichier (ouvert en écriture binaire)
+        mode: Nom du mode (voir WEBP_MODES)
+
+    Returns:
+        Tuple (secondes, octets) : durée de l'encodage et taille produite
+    """
+    if mode not in WEBP_MODES:
+        raise ValueError(f"Mode WebP inconnu: {mode} (disponibles: {', '.join(WEBP_MODES)})")
+
+    begin = time.perf_counter()
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA')
+    img = round_colors(img, WEBP_MODES[mode]['step'])
+    start_offset = None if isinstance(output, (str, os.PathLike)) else output.tell()
+    img.save(output, 'WEBP', lossless=True, quality=WEBP_EFFORT, method=WEBP_METHOD)
+    elapsed = time.perf_counter() - begin
+
+    if start_offset is None:
+        size = os.path.getsize(output)
+    else:
+        size = output.tell() - start_offset
+    return elapsed, size
+
+
+def decode_time(path, repeat=3):
+    """
+    Meilleur temps de décodage complet d'un fichier image (PNG, WebP...) sur `repeat` essais.
+
+    Returns:
+        Durée en secondes
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        with Image.open(path) as img:
+            img.load()
+        best = min(best, time.perf_counter() - begin)
+    return best
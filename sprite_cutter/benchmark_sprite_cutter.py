@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'outil de découpe de sprites
+===========================================
+Génère des atlas synthétiques (fond blanc, sprites avec zones blanches internes)
+à plusieurs résolutions et mesure le temps et la mémoire des étapes de sprite_cutter.
+La fusion des fragments est mesurée sur des listes de boîtes de 100 à 100 000 éléments.
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from PIL import Image, ImageDraw
+
+from sprite_cutter import remove_white_background, find_sprite_bounds, merge_nearby_sprites
+
+
+def make_atlas(size, sprite_size=128, seed=0):
+    """
+    Crée un atlas carré synthétique sur fond blanc.
+    Chaque sprite est un corps coloré avec deux "yeux" blancs internes,
+    qui doivent rester opaques après suppression du fond.
+
+    Args:
+        size: Côté de l'atlas en pixels
+        sprite_size: Taille d'une cellule de la grille
+        seed: Graine du générateur aléatoire (atlas reproductibles)
+
+    Returns:
+        Image PIL en mode RGB
+    """
+    rng = random.Random(seed)
+    atlas = Image.new('RGB', (size, size), (255, 255, 255))
+    draw = ImageDraw.Draw(atlas)
+
+    for top in range(0, size - sprite_size + 1, sprite_size):
+        for left in range(0, size - sprite_size + 1, sprite_size):
+            margin = rng.randint(8, sprite_size // 4)
+            color = (rng.randint(0, 200), rng.randint(0, 200), rng.randint(0, 200))
+            body = (left + margin, top + margin, left + sprite_size - margin, top + sprite_size - margin)
+            draw.ellipse(body, fill=color)
+
+            # Yeux blancs à l'intérieur du corps
+            eye = max(2, (body[2] - body[0]) // 8)
+            cx = (body[0] + body[2]) // 2
+            cy = (body[1] + body[3]) // 2
+            draw.ellipse((cx - 2 * eye, cy - eye, cx - eye, cy), fill=(255, 255, 255))
+            draw.ellipse((cx + eye, cy - eye, cx + 2 * eye, cy), fill=(255, 255, 255))
+
+    return atlas
+
+
+def make_fragments(count, seed=0):
+    """
+    Crée une liste de boîtes simulant des sprites découpés en morceaux :
+    chaque personnage est un corps accompagné de deux petits fragments proches (yeux, accessoires),
+    les personnages étant disposés sur une grille assez espacée pour rester séparés.
+
+    Args:
+        count: Nombre total de fragments
+        seed: Graine du générateur aléatoire
+
+    Returns:
+        Liste de tuples (x1, y1, x2, y2)
+    """
+    rng = random.Random(seed)
+    columns = max(1, int((count / 3) ** 0.5))
+    fragments = []
+    index = 0
+    while len(fragments) < count:
+        left = (index % columns) * 160
+        top = (index // columns) * 160
+        index += 1
+        width, height = rng.randint(40, 90), rng.randint(40, 90)
+        fragments.append((left, top, left + width, top + height))
+        for _ in range(2):
+            x = left + rng.randint(0, width)
+            y = top + height + rng.randint(2, 15)
+            fragments.append((x, y, x + rng.randint(3, 12), y + rng.randint(3, 12)))
+    rng.shuffle(fragments)
+    return fragments[:count]
+
+
+def measure(func, *args):
+    """
+    Exécute func(*args) en mesurant la durée et le pic de mémoire alloué par Python/NumPy.
+    tracemalloc ralentit fortement le code Python pur : la durée est mesurée sur
+    une première exécution sans traçage, la mémoire sur une seconde.
+
+    Returns:
+        Tuple (résultat, secondes, pic_mémoire_en_Mo)
+    """
+    begin = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - begin
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mesure les performances de sprite_cutter sur des atlas synthétiques",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  %(prog)s                          # Atlas de 1024 à 4096px
+  %(prog)s --sizes 2048 8192        # Inclut un atlas 8K
+  %(prog)s --threshold 230
+  %(prog)s --stages bounds          # Uniquement la détection des sprites
+  %(prog)s --stages merge --fragments 1000 100000
+        """
+    )
+
+    parser.add_argument(
+        '--sizes',
+        type=int,
+        nargs='+',
+        default=[1024, 2048, 4096],
+        help='Côtés des atlas synthétiques en pixels (défaut: 1024 2048 4096)'
+    )
+
+    parser.add_argument(
+        '-t', '--threshold',
+        type=int,
+        default=240,
+        help='Seuil de détection du fond blanc (défaut: 240)'
+    )
+
+    parser.add_argument(
+        '--fragments',
+        type=int,
+        nargs='+',
+        default=[100, 1000, 10000, 100000],
+        help='Nombres de fragments pour la fusion (défaut: 100 1000 10000 100000)'
+    )
+
+    parser.add_argument(
+        '-m', '--merge-distance',
+        type=int,
+        default=20,
+        help='Distance maximale de fusion (défaut: 20)'
+    )
+
+    parser.add_argument(
+        '--stages',
+        nargs='+',
+        choices=['background', 'bounds', 'merge'],
+        default=['background', 'bounds', 'merge'],
+        help='Étapes à mesurer (défaut: toutes)'
+    )
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("⏱️  Benchmark sprite_cutter")
+    print("=" * 60)
+    print()
+
+    atlases = {}
+    if 'background' in args.stages or 'bounds' in args.stages:
+        atlases = {size: make_atlas(size) for size in args.sizes}
+
+    if 'background' in args.stages:
+        print("🎨 remove_white_background")
+        print(f"   {'atlas':>11} | {'temps':>9} | {'mémoire':>10}")
+        for size, atlas in atlases.items():
+            _, elapsed, peak = measure(remove_white_background, atlas, args.threshold)
+            print(f"   {size:>5}x{size:<5} | {elapsed:>8.3f}s | {peak:>7.1f} Mo")
+        print()
+
+    if 'bounds' in args.stages:
+        print("🔍 find_sprite_bounds")
+        print(f"   {'atlas':>11} | {'temps':>9} | {'mémoire':>10} | sprites")
+        for size, atlas in atlases.items():
+            bounds, elapsed, peak = measure(find_sprite_bounds, atlas, args.threshold)
+            print(f"   {size:>5}x{size:<5} | {elapsed:>8.3f}s | {peak:>7.1f} Mo | {len(bounds)}")
+        print()
+
+    if 'merge' in args.stages:
+        print("🧩 merge_nearby_sprites")
+        print(f"   {'fragments':>11} | {'temps':>9} | {'mémoire':>10} | sprites")
+        for count in args.fragments:
+            fragments = make_fragments(count)
+            merged, elapsed, peak = measure(merge_nearby_sprites, fragments, args.merge_distance)
+            print(f"   {count:>11} | {elapsed:>8.3f}s | {peak:>7.1f} Mo | {len(merged)}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -11,9 +11,16 @@ Cet outil permet de :
 
 import os
 import sys
-from PIL import Image, ImageChops
+from pathlib import Path
+from PIL import Image
+import numpy as np
 import argparse
 
+# Modules partagés entre les outils du dépôt (encodage PNG, étiquetage par runs)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'shared'))
+from png_encoding import PNG_PRESETS, DEFAULT_PRESET, save_png, format_size
+from run_labeling import label_runs, edge_connected_mask
+
 
 def remove_white_background(image, threshold=240):
     """
@@ -32,169 +39,99 @@ def remove_white_background(image, threshold=240):
     if image.mode != 'RGBA':
         image = image.convert('RGBA')
     
-    width, height = image.size
-    pixels = image.load()
-    
-    # Créer une matrice pour marquer les pixels blancs connectés aux bords
-    is_background = [[False] * width for _ in range(height)]
-    visited = [[False] * width for _ in range(height)]
+    pixels = np.array(image)
     
-    def is_white(x, y):
-        """Vérifie si un pixel est blanc selon le seuil"""
-        if x < 0 or x >= width or y < 0 or y >= height:
-            return False
-        r, g, b = pixels[x, y][:3]
-        return r > threshold and g > threshold and b > threshold
+    # Masque des pixels blancs en une seule opération vectorisée
+    white = np.minimum(np.minimum(pixels[..., 0], pixels[..., 1]), pixels[..., 2]) > threshold
     
-    def flood_fill_background(start_x, start_y):
-        """Marque tous les pixels blancs connectés aux bords comme fond"""
-        stack = [(start_x, start_y)]
-        
-        while stack:
-            x, y = stack.pop()
-            
-            if x < 0 or x >= width or y < 0 or y >= height:
-                continue
-            if visited[y][x] or not is_white(x, y):
-                continue
-            
-            visited[y][x] = True
-            is_background[y][x] = True
-            
-            # Ajouter les voisins (8-connectivité)
-            stack.extend([
-                (x+1, y), (x-1, y), (x, y+1), (x, y-1),
-                (x+1, y+1), (x-1, y-1), (x+1, y-1), (x-1, y+1)
-            ])
-    
-    # Lancer le flood-fill depuis tous les pixels blancs des bords
-    # Bord haut et bas
-    for x in range(width):
-        if is_white(x, 0):
-            flood_fill_background(x, 0)
-        if is_white(x, height - 1):
-            flood_fill_background(x, height - 1)
-    
-    # Bord gauche et droite
-    for y in range(height):
-        if is_white(0, y):
-            flood_fill_background(0, y)
-        if is_white(width - 1, y):
-            flood_fill_background(width - 1, y)
-    
-    # Créer la nouvelle image avec transparence seulement pour le fond
-    new_data = []
-    for y in range(height):
-        for x in range(width):
-            r, g, b, a = pixels[x, y] if image.mode == 'RGBA' else (*pixels[x, y], 255)
-            
-            if is_background[y][x]:
-                # Rendre le fond transparent
-                new_data.append((255, 255, 255, 0))
-            else:
-                # Conserver le pixel (même s'il est blanc mais à l'intérieur)
-                new_data.append((r, g, b, a))
+    # Zones blanches (8-connectivité) qui touchent un bord
+    is_background = edge_connected_mask(white, connectivity=8)
     
-    image.putdata(new_data)
-    return image
+    # Rendre le fond transparent, conserver les autres pixels (même blancs mais à l'intérieur)
+    # (chaque pixel RGBA vu comme un entier 32 bits : une seule écriture par pixel)
+    transparent_white = np.array([255, 255, 255, 0], dtype=np.uint8).view(np.uint32)[0]
+    np.putmask(pixels.view(np.uint32)[..., 0], is_background, transparent_white)
+    return Image.fromarray(pixels, 'RGBA')
 
 
 def find_sprite_bounds(image, threshold=240):
     """
     Trouve les limites de chaque sprite dans l'image.
+    Les pixels non-blancs sont étiquetés par segments horizontaux (8-connectivité)
+    et les boîtes englobantes sont calculées en une passe sur les segments.
     
     Args:
         image: Image PIL
         threshold: Seuil pour considérer un pixel comme fond blanc
     
     Returns:
-        Liste de tuples (x1, y1, x2, y2) représentant les boîtes englobantes
+        Liste de tuples (x1, y1, x2, y2) représentant les boîtes englobantes,
+        dans l'ordre de lecture (premier pixel rencontré ligne par ligne)
     """
     if image.mode != 'RGB':
         image = image.convert('RGB')
     
-    width, height = image.size
-    pixels = image.load()
-    
-    # Créer une matrice booléenne pour les pixels non-blancs
-    non_white = [[False] * width for _ in range(height)]
-    
-    for y in range(height):
-        for x in range(width):
-            r, g, b = pixels[x, y]
-            if r < threshold or g < threshold or b < threshold:
-                non_white[y][x] = True
-    
-    # Trouver les sprites en utilisant un algorithme de remplissage (flood fill)
-    visited = [[False] * width for _ in range(height)]
-    sprites = []
-    
-    def flood_fill(start_x, start_y):
-        """Remplissage récursif pour trouver tous les pixels connectés"""
-        stack = [(start_x, start_y)]
-        min_x = start_x
-        max_x = start_x
-        min_y = start_y
-        max_y = start_y
-        
-        while stack:
-            x, y = stack.pop()
-            
-            if x < 0 or x >= width or y < 0 or y >= height:
-                continue
-            if visited[y][x] or not non_white[y][x]:
-                continue
-            
-            visited[y][x] = True
-            min_x = min(min_x, x)
-            max_x = max(max_x, x)
-            min_y = min(min_y, y)
-            max_y = max(max_y, y)
-            
-            # Ajouter les voisins (4-connectivité)
-            stack.extend([(x+1, y), (x-1, y), (x, y+1), (x, y-1)])
-            # Ajouter les diagonales (8-connectivité pour de meilleurs résultats)
-            stack.extend([(x+1, y+1), (x-1, y-1), (x+1, y-1), (x-1, y+1)])
-        
-        return (min_x, min_y, max_x + 1, max_y + 1)
+    pixels = np.array(image)
     
-    # Parcourir l'image pour trouver tous les sprites
-    for y in range(height):
-        for x in range(width):
-            if non_white[y][x] and not visited[y][x]:
-                bounds = flood_fill(x, y)
-                # Ignorer les très petits sprites (probablement du bruit)
-                width_sprite = bounds[2] - bounds[0]
-                height_sprite = bounds[3] - bounds[1]
-                if width_sprite > 10 and height_sprite > 10:
-                    sprites.append(bounds)
+    # Pixels non-blancs : au moins une composante sous le seuil
+    non_white = np.minimum(np.minimum(pixels[..., 0], pixels[..., 1]), pixels[..., 2]) < threshold
+    del pixels
     
-    return sprites
+    rows, starts, ends, labels = label_runs(non_white, connectivity=8)
+    if len(labels) == 0:
+        return []
+    
+    # Le label d'une composante est l'indice de son premier run (ordre de lecture) :
+    # les composantes sont donc déjà triées comme lors d'un parcours ligne par ligne
+    components = np.unique(labels)
+    index = np.searchsorted(components, labels)
+    count = len(components)
+    
+    x1 = np.full(count, np.iinfo(np.int64).max)
+    y1 = np.full(count, np.iinfo(np.int64).max)
+    x2 = np.zeros(count, dtype=np.int64)
+    y2 = np.zeros(count, dtype=np.int64)
+    np.minimum.at(x1, index, starts)
+    np.minimum.at(y1, index, rows)
+    np.maximum.at(x2, index, ends)
+    np.maximum.at(y2, index, rows + 1)
+    
+    # Ignorer les très petits sprites (probablement du bruit)
+    large = ((x2 - x1) > 10) & ((y2 - y1) > 10)
+    
+    return [
+        (int(a), int(b), int(c), int(d))
+        for a, b, c, d in zip(x1[large], y1[large], x2[large], y2[large])
+    ]
 
 
 def merge_nearby_sprites(sprites, max_distance=20):
     """
     Fusionne les sprites qui sont proches les uns des autres.
     Cela permet de regrouper les parties d'un même personnage (corps + yeux, etc.)
-    
+
+    Les paires candidates sont cherchées dans une grille uniforme (seules les boîtes
+    des cellules voisines sont comparées) et les groupes sont tenus dans un union-find.
+    Une boîte de groupe qui grandit peut devenir proche d'une autre : les passes sont
+    répétées sur les boîtes des groupes jusqu'à ce que plus aucune fusion n'ait lieu.
+    Le résultat est identique à la fusion itérative par paires, ordre compris
+    (les groupes sont rendus dans l'ordre de leur premier sprite).
+
     Args:
         sprites: Liste de tuples (x1, y1, x2, y2)
         max_distance: Distance maximale pour considérer deux sprites comme proches
-    
+
     Returns:
         Liste de sprites fusionnés
     """
     if not sprites:
         return []
-    
-    # Créer une liste de sprites avec un indicateur de groupe
-    sprite_groups = [[sprite] for sprite in sprites]
-    
+
     # Fonction pour vérifier si deux boîtes sont proches
     def are_close(box1, box2, max_dist):
         x1_1, y1_1, x2_1, y2_1 = box1
         x1_2, y1_2, x2_2, y2_2 = box2
-        
+
         # Calculer la distance entre les boîtes
         # Distance horizontale
         if x2_1 < x1_2:
@@ -203,7 +140,7 @@ def merge_nearby_sprites(sprites, max_distance=20):
             dx = x1_1 - x2_2
         else:
             dx = 0
-        
+
         # Distance verticale
         if y2_1 < y1_2:
             dy = y1_2 - y2_1
@@ -211,69 +148,66 @@ def merge_nearby_sprites(sprites, max_distance=20):
             dy = y1_1 - y2_2
         else:
             dy = 0
-        
+
         # Distance euclidienne
         distance = (dx**2 + dy**2)**0.5
         return distance <= max_dist
-    
-    # Fonction pour fusionner deux boîtes
-    def merge_boxes(box1, box2):
-        x1_1, y1_1, x2_1, y2_1 = box1
-        x1_2, y1_2, x2_2, y2_2 = box2
-        return (
-            min(x1_1, x1_2),
-            min(y1_1, y1_2),
-            max(x2_1, x2_2),
-            max(y2_1, y2_2)
-        )
-    
-    # Fusionner itérativement les sprites proches
+
+    # Union-find : la racine d'un groupe est toujours son plus petit indice
+    parent = list(range(len(sprites)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    margin = max(max_distance, 0)
+    boxes = {i: tuple(sprite) for i, sprite in enumerate(sprites)}
+
     changed = True
     while changed:
         changed = False
-        new_groups = []
-        used = set()
-        
-        for i, group1 in enumerate(sprite_groups):
-            if i in used:
-                continue
-            
-            # Calculer la boîte englobante du groupe
-            box1 = group1[0]
-            for sprite in group1[1:]:
-                box1 = merge_boxes(box1, sprite)
-            
-            # Chercher d'autres groupes à fusionner
-            merged = False
-            for j, group2 in enumerate(sprite_groups[i+1:], i+1):
-                if j in used:
-                    continue
-                
-                # Calculer la boîte englobante du groupe 2
-                box2 = group2[0]
-                for sprite in group2[1:]:
-                    box2 = merge_boxes(box2, sprite)
-                
-                # Si les boîtes sont proches, fusionner les groupes
-                if are_close(box1, box2, max_distance):
-                    group1.extend(group2)
-                    used.add(j)
-                    changed = True
-                    merged = True
-            
-            new_groups.append(group1)
-        
-        sprite_groups = new_groups
-    
-    # Créer les boîtes englobantes finales
-    merged_sprites = []
-    for group in sprite_groups:
-        box = group[0]
-        for sprite in group[1:]:
-            box = merge_boxes(box, sprite)
-        merged_sprites.append(box)
-    
-    return merged_sprites
+
+        # Taille de cellule adaptée aux boîtes courantes : la plupart couvrent 1 à 4 cellules
+        extents = sorted(max(x2 - x1, y2 - y1) for x1, y1, x2, y2 in boxes.values())
+        cell = max(1, int(margin), int(extents[len(extents) // 2]))
+
+        grid = {}
+        for i, (x1, y1, x2, y2) in boxes.items():
+            for cx in range(int(x1 // cell), int(x2 // cell) + 1):
+                for cy in range(int(y1 // cell), int(y2 // cell) + 1):
+                    grid.setdefault((cx, cy), []).append(i)
+
+        # Paires candidates : boîtes partageant une cellule avec la boîte élargie de max_distance
+        for i, box1 in boxes.items():
+            x1, y1, x2, y2 = box1
+            seen = set()
+            for cx in range(int((x1 - margin) // cell), int((x2 + margin) // cell) + 1):
+                for cy in range(int((y1 - margin) // cell), int((y2 + margin) // cell) + 1):
+                    for j in grid.get((cx, cy), ()):
+                        if j <= i or j in seen:
+                            continue
+                        seen.add(j)
+                        if are_close(box1, boxes[j], max_distance):
+                            root_i, root_j = find(i), find(j)
+                            if root_i != root_j:
+                                parent[max(root_i, root_j)] = min(root_i, root_j)
+                                changed = True
+
+        if changed:
+            # Boîtes englobantes des nouveaux groupes (racines triées = ordre du premier sprite)
+            merged = {}
+            for i, (x1, y1, x2, y2) in boxes.items():
+                root = find(i)
+                if root in merged:
+                    mx1, my1, mx2, my2 = merged[root]
+                    merged[root] = (min(mx1, x1), min(my1, y1), max(mx2, x2), max(my2, y2))
+                else:
+                    merged[root] = (x1, y1, x2, y2)
+            boxes = dict(sorted(merged.items()))
+
+    return list(boxes.values())
 
 
 def add_padding(bounds, padding, image_width, image_height):
@@ -326,7 +260,7 @@ def normalize_sprite_size(sprite, target_width, target_height):
     return normalized
 
 
-def remove_background_only(input_path, output_path, threshold=240):
+def remove_background_only(input_path, output_path, threshold=240, png_preset=DEFAULT_PRESET):
     """
     Supprime uniquement le fond blanc d'une image sans découper ni redimensionner.
     
@@ -334,6 +268,7 @@ def remove_background_only(input_path, output_path, threshold=240):
         input_path: Chemin de l'image source
         output_path: Chemin de l'image de sortie
         threshold: Seuil pour la détection du fond blanc (0-255)
+        png_preset: Préréglage d'encodage PNG (fast, balanced, smallest, palette)
     """
     # Charger l'image
     print(f"📁 Chargement de l'image: {input_path}")
@@ -350,13 +285,14 @@ def remove_background_only(input_path, output_path, threshold=240):
         os.makedirs(output_dir, exist_ok=True)
     
     # Sauvegarder l'image
-    image.save(output_path, 'PNG')
+    encode_time, size = save_png(image, output_path, png_preset)
     print(f"✅ Image sauvegardée: {output_path}")
+    print(f"🗜️  Encodage PNG ({png_preset}): {encode_time:.2f}s, {format_size(size)}")
     print(f"\n🎉 Terminé ! Fond blanc supprimé et sauvegardé dans {output_path}")
 
 
 def cut_sprites(input_path, output_dir, threshold=240, padding=5, merge_distance=20, 
-                min_size=200, normalize_size=None):
+                min_size=200, normalize_size=None, png_preset=DEFAULT_PRESET):
     """
     Découpe les sprites d'une image et les sauvegarde.
     
@@ -368,6 +304,7 @@ def cut_sprites(input_path, output_dir, threshold=240, padding=5, merge_distance
         merge_distance: Distance max pour fusionner les sprites proches (0 = désactivé)
         min_size: Taille minimale d'un côté pour garder un sprite (0 = désactivé)
         normalize_size: Tuple (width, height) pour normaliser ou "auto" pour la taille max
+        png_preset: Préréglage d'encodage PNG (fast, balanced, smallest, palette)
     """
     # Charger l'image
     print(f"📁 Chargement de l'image: {input_path}")
@@ -444,6 +381,8 @@ def cut_sprites(input_path, output_dir, threshold=240, padding=5, merge_distance
         print(f"📐 Normalisation à la taille: {target_width}x{target_height}px")
     
     # Sauvegarder les sprites
+    total_encode_time = 0.0
+    total_size = 0
     for data in sprites_data:
         sprite = data['sprite']
         
@@ -453,12 +392,15 @@ def cut_sprites(input_path, output_dir, threshold=240, padding=5, merge_distance
         
         # Sauvegarder
         output_path = os.path.join(output_dir, f"{base_name}_sprite_{data['index']:03d}.png")
-        sprite.save(output_path, 'PNG')
+        encode_time, size = save_png(sprite, output_path, png_preset)
+        total_encode_time += encode_time
+        total_size += size
         
         width = sprite.size[0]
         height = sprite.size[1]
         print(f"   ✅ Sprite {data['index']:2d}: {width}x{height}px → {output_path}")
     
+    print(f"🗜️  Encodage PNG ({png_preset}): {total_encode_time:.2f}s, {format_size(total_size)} au total")
     print(f"\n🎉 Terminé ! {len(sprites_data)} sprite(s) sauvegardé(s) dans {output_dir}")
 
 
@@ -479,6 +421,7 @@ Exemples:
   %(prog)s sprites.png --min-size 100 -n auto  # Filtrer + normaliser
   %(prog)s image.png --remove-background-only  # Supprime uniquement le fond blanc
   %(prog)s image.png --remove-background-only -o output.png  # Spécifier le fichier de sortie
+  %(prog)s sprites.png --png-preset smallest   # Fichiers les plus petits (release)
         """
     )
     
@@ -537,6 +480,14 @@ Exemples:
         help='Supprime uniquement le fond blanc sans découper ni redimensionner l\'image'
     )
     
+    parser.add_argument(
+        '--png-preset',
+        choices=list(PNG_PRESETS),
+        default=DEFAULT_PRESET,
+        help=f'Encodage PNG: fast (CI), balanced, smallest (release), '
+             f'palette (PNG8 256 couleurs, avec perte) (défaut: {DEFAULT_PRESET})'
+    )
+    
     args = parser.parse_args()
     
     # Vérifier que le fichier existe
@@ -562,7 +513,7 @@ Exemples:
                 output_path = args.output
         
         try:
-            remove_background_only(args.input, output_path, args.threshold)
+            remove_background_only(args.input, output_path, args.threshold, args.png_preset)
         except Exception as e:
             print(f"❌ Erreur: {e}")
             import traceback
@@ -595,7 +546,7 @@ Exemples:
         # Découper les sprites
         try:
             cut_sprites(args.input, args.output, args.threshold, args.padding, args.merge,
-                       args.min_size, normalize_size)
+                       args.min_size, normalize_size, args.png_preset)
         except Exception as e:
             print(f"❌ Erreur: {e}")
             import traceback
@@ -0,0 +1,276 @@
+"""
+Équivalence des fonctions réécrites avec leur version d'origine
+================================================================
+Les versions vectorisées (NumPy, étiquetage par runs, index spatial) doivent produire exactement
+le même résultat que les implémentations pixel par pixel qu'elles remplacent. Les références
+ci-dessous sont les fonctions d'origine, comparées sur de petites images aléatoires.
+
+Lancement : python -m pytest -q tests
+"""
+
+import io
+import random
+import sys
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'shared'))
+sys.path.insert(0, str(ROOT / 'sprite_cutter'))
+sys.path.insert(0, str(ROOT / 'mp4-to-png'))
+
+import sprite_cutter  # noqa: E402
+from converter_loader import load_converter  # noqa: E402
+from png_encoding import save_png  # noqa: E402
+
+converter = load_converter()
+
+SEEDS = range(8)
+
+
+# ============================================================================
+# IMPLÉMENTATIONS DE RÉFÉRENCE (versions d'origine, pixel par pixel)
+# ============================================================================
+
+def reference_remove_background(img, bg_colors, tolerance):
+    """Flood fill 4-connexe depuis les bords, tolérance |dr|+|dg|+|db| < tolerance"""
+    img = img.convert('RGBA')
+    width, height = img.size
+    pixels = img.load()
+
+    def is_background(x, y):
+        r, g, b = pixels[x, y][:3]
+        return any(abs(r - br) + abs(g - bg) + abs(b - bb) < tolerance for br, bg, bb in bg_colors)
+
+    mask = [[False] * width for _ in range(height)]
+    queue = deque()
+    for y in range(height):
+        for x in range(width):
+            if (x in (0, width - 1) or y in (0, height - 1)) and is_background(x, y):
+                mask[y][x] = True
+                queue.append((x, y))
+    while queue:
+        x, y = queue.popleft()
+        for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if 0 <= nx < width and 0 <= ny < height and not mask[ny][nx] and is_background(nx, ny):
+                mask[ny][nx] = True
+                queue.append((nx, ny))
+
+    transparent = 0
+    for y in range(height):
+        for x in range(width):
+            if mask[y][x]:
+                r, g, b, _ = pixels[x, y]
+                pixels[x, y] = (r, g, b, 0)
+                transparent += 1
+    return img, transparent
+
+
+def white_mask(img, threshold):
+    """Pixels dont les trois canaux dépassent le seuil, en liste de listes"""
+    width, height = img.size
+    pixels = img.load()
+    return [[all(c > threshold for c in pixels[x, y][:3]) for x in range(width)] for y in range(height)]
+
+
+def reference_remove_white_background(img, threshold):
+    """Flood fill 8-connexe des zones blanches touchant un bord, remplacées par (255, 255, 255, 0)"""
+    img = img.convert('RGBA')
+    width, height = img.size
+    pixels = img.load()
+    white = white_mask(img, threshold)
+    visited = [[False] * width for _ in range(height)]
+
+    stack = [(x, y) for x in range(width) for y in (0, height - 1)]
+    stack += [(x, y) for y in range(height) for x in (0, width - 1)]
+    while stack:
+        x, y = stack.pop()
+        if not (0 <= x < width and 0 <= y < height) or visited[y][x] or not white[y][x]:
+            continue
+        visited[y][x] = True
+        pixels[x, y] = (255, 255, 255, 0)
+        stack.extend((x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy)
+    return img
+
+
+def reference_find_sprite_bounds(img, threshold):
+    """Composantes 8-connexes des pixels non blancs, dans l'ordre de parcours, bruit <= 10px ignoré"""
+    img = img.convert('RGB')
+    width, height = img.size
+    pixels = img.load()
+    non_white = [[any(c < threshold for c in pixels[x, y]) for x in range(width)] for y in range(height)]
+    visited = [[False] * width for _ in range(height)]
+    sprites = []
+    for y0 in range(height):
+        for x0 in range(width):
+            if not non_white[y0][x0] or visited[y0][x0]:
+                continue
+            min_x = max_x = x0
+            min_y = max_y = y0
+            stack = [(x0, y0)]
+            while stack:
+                x, y = stack.pop()
+                if not (0 <= x < width and 0 <= y < height) or visited[y][x] or not non_white[y][x]:
+                    continue
+                visited[y][x] = True
+                min_x, max_x = min(min_x, x), max(max_x, x)
+                min_y, max_y = min(min_y, y), max(max_y, y)
+                stack.extend((x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy)
+            if max_x + 1 - min_x > 10 and max_y + 1 - min_y > 10:
+                sprites.append((min_x, min_y, max_x + 1, max_y + 1))
+    return sprites
+
+
+def reference_merge_nearby_sprites(sprites, max_distance):
+    """Fusion itérative par paires de groupes, jusqu'à ce que plus rien ne fusionne"""
+    def bounding_box(group):
+        return (min(b[0] for b in group), min(b[1] for b in group),
+                max(b[2] for b in group), max(b[3] for b in group))
+
+    def are_close(box1, box2):
+        dx = max(box2[0] - box1[2], box1[0] - box2[2], 0)
+        dy = max(box2[1] - box1[3], box1[1] - box2[3], 0)
+        return (dx ** 2 + dy ** 2) ** 0.5 <= max_distance
+
+    groups = [[sprite] for sprite in sprites]
+    changed = True
+    while changed:
+        changed = False
+        new_groups = []
+        used = set()
+        for i, group1 in enumerate(groups):
+            if i in used:
+                continue
+            box1 = bounding_box(group1)
+            for j in range(i + 1, len(groups)):
+                if j not in used and are_close(box1, bounding_box(groups[j])):
+                    group1.extend(groups[j])
+                    used.add(j)
+                    changed = True
+            new_groups.append(group1)
+        groups = new_groups
+    return [bounding_box(group) for group in groups]
+
+
+# ============================================================================
+# IMAGES ALÉATOIRES
+# ============================================================================
+
+def random_image(seed, colors, size=(37, 29), mode='RGB'):
+    """Image aléatoire tirée parmi quelques couleurs (régions connexes non triviales)"""
+    rng = np.random.default_rng(seed)
+    palette = np.array(colors, dtype=np.uint8)
+    pixels = palette[rng.integers(len(palette), size=(size[1], size[0]))]
+    if mode == 'RGBA':
+        alpha = rng.integers(0, 256, size=(size[1], size[0], 1), dtype=np.uint8)
+        pixels = np.concatenate([pixels, alpha], axis=2)
+    return Image.fromarray(pixels, mode)
+
+
+def random_atlas(seed, size=(96, 80)):
+    """Atlas blanc avec des rectangles et du bruit (composantes de toutes tailles)"""
+    rng = random.Random(seed)
+    img = Image.new('RGB', size, (255, 255, 255))
+    pixels = img.load()
+    for _ in range(8):
+        x, y = rng.randrange(size[0] - 8), rng.randrange(size[1] - 8)
+        w, h = rng.randint(3, 24), rng.randint(3, 24)
+        color = tuple(rng.randrange(200) for _ in range(3))
+        img.paste(color, (x, y, min(x + w, size[0]), min(y + h, size[1])))
+    for _ in range(60):
+        pixels[rng.randrange(size[0]), rng.randrange(size[1])] = (rng.randrange(256), 0, 0)
+    return img
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_remove_background_matches_reference(seed):
+    """user-001 : masque de tolérance + étiquetage des régions connectées aux bords"""
+    colors = [(255, 255, 255), (250, 245, 252), (200, 200, 200), (30, 120, 60), (10, 10, 10)]
+    img = random_image(seed, colors)
+    bg_colors = [(255, 255, 255), (205, 195, 200)]
+
+    result, transparent = converter.remove_background(img, bg_colors, tolerance=30)
+    expected, expected_transparent = reference_remove_background(img, bg_colors, tolerance=30)
+
+    assert transparent == expected_transparent
+    assert result.tobytes() == expected.tobytes()
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('mode', ['RGB', 'RGBA'])
+def test_remove_white_background_matches_reference(seed, mode):
+    """user-008 : zones blanches 8-connexes touchant un bord"""
+    colors = [(255, 255, 255), (245, 250, 241), (240, 255, 255), (90, 40, 200)]
+    img = random_image(seed, colors, mode=mode)
+
+    result = sprite_cutter.remove_white_background(img.copy(), threshold=240)
+    expected = reference_remove_white_background(img, threshold=240)
+
+    assert result.tobytes() == expected.tobytes()
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_find_sprite_bounds_matches_reference(seed):
+    """user-009 : mêmes boîtes, même ordre, même filtre de bruit (> 10px)"""
+    img = random_atlas(seed)
+    assert sprite_cutter.find_sprite_bounds(img, threshold=240) == reference_find_sprite_bounds(img, 240)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('max_distance', [0, 5, 20])
+def test_merge_nearby_sprites_matches_reference(seed, max_distance):
+    """user-010 : index spatial + union-find, mêmes boîtes fusionnées dans le même ordre"""
+    rng = random.Random(seed)
+    sprites = []
+    for _ in range(60):
+        x, y = rng.randrange(500), rng.randrange(500)
+        sprites.append((x, y, x + rng.randint(1, 40), y + rng.randint(1, 40)))
+
+    result = sprite_cutter.merge_nearby_sprites(list(sprites), max_distance)
+    assert result == reference_merge_nearby_sprites(sprites, max_distance)
+
+
+@pytest.mark.parametrize('seed', SEEDS[:3])
+@pytest.mark.parametrize('preset, options', [
+    ('smallest', {'optimize': True}),  # ancien encodage de mp4-to-sprite et resize_images
+    ('balanced', {}),                  # ancien encodage de sprite_cutter
+])
+def test_png_presets_match_previous_encoding(seed, preset, options):
+    """user-015 : les préréglages par défaut des outils gardent la sortie octet pour octet"""
+    img = random_image(seed, [(255, 255, 255), (0, 0, 0), (200, 30, 30)], size=(64, 48), mode='RGBA')
+
+    encoded = io.BytesIO()
+    _, size = save_png(img, encoded, preset)
+    previous = io.BytesIO()
+    img.save(previous, 'PNG', **options)
+
+    assert encoded.getvalue() == previous.getvalue()
+    assert size == len(previous.getvalue())
+
+
+def held_frames():
+    """Trois frames dont les deux dernières identiques (pose tenue)"""
+    frames = [Image.new('RGB', (20, 20), (255, 255, 255)) for _ in range(3)]
+    frames[0].paste((0, 0, 0), (5, 5, 15, 15))
+    return frames
+
+
+@pytest.mark.parametrize('options', [{'sheet_layout': 'packed'}, {'dedup': 0}])
+def test_durations_without_fps_raise(options):
+    """user-024 / user-025 : packed et dedup calculent des durées, fps=None est refusé clairement"""
+    with pytest.raises(converter.SpriteSheetError, match='fps requis'):
+        converter.render_sprite_sheet(held_frames(), 10, True, 30, fps=None, **options)
+
+
+def test_dedup_durations_with_fps():
+    """Avec fps, la pose tenue devient une seule frame de durée doublée"""
+    _, layout, _, _ = converter.render_sprite_sheet(held_frames(), 10, True, 30, fps=10, dedup=0)
+    assert layout['durations'] == [100, 200]